@@ -0,0 +1,64 @@
+import math
+import time
+from contextvars import ContextVar
+
+# Alexa waits 8 seconds for a response. We keep some of it for serializing and sending the response.
+ALEXA_RESPONSE_BUDGET = 7.0
+SAFETY_MARGIN = 0.3
+
+
+class Deadline:
+    """
+    The point in time an invocation has to answer by.
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    @classmethod
+    def from_context(cls, context) -> 'Deadline':
+        """
+        The Alexa response deadline, unless the Lambda timeout is even closer.
+        """
+        budget = ALEXA_RESPONSE_BUDGET
+        get_remaining_time_in_millis = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining_time_in_millis is not None:
+            budget = min(budget, get_remaining_time_in_millis() / 1000 - SAFETY_MARGIN)
+        return cls(budget)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def has_time_for(self, seconds: float) -> bool:
+        return self.remaining() > seconds
+
+
+NO_DEADLINE = Deadline(math.inf)
+
+_current_deadline = ContextVar("current_deadline", default=NO_DEADLINE)
+
+
+class within:
+    """
+    Sets the deadline of one invocation.
+    """
+
+    def __init__(self, deadline: Deadline):
+        self.deadline = deadline
+        self._token = None
+
+    def __enter__(self) -> Deadline:
+        self._token = _current_deadline.set(self.deadline)
+        return self.deadline
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_deadline.reset(self._token)
+        return False
+
+
+def get_deadline() -> Deadline:
+    """
+    The deadline of the current invocation. Outside of lambda_handler, e.g.: in tests, there is none.
+    """
+    return _current_deadline.get()
@@ -0,0 +1,25 @@
+import time
+from typing import List, Optional
+
+from skill.state import State
+
+# The poller refreshes the digest of every connected account more often than this, see skill.poller
+DIGEST_MAX_AGE = 120
+
+
+def build_digest(unread_dialogs: List[dict], now: float = None) -> dict:
+    return {"dialogs": unread_dialogs, "updated_at": int(now if now is not None else time.time())}
+
+
+def get_fresh_dialogs(state: State, now: float = None) -> Optional[List[dict]]:
+    """
+    The unread dialogs of the digest, or None if there is no digest or it is stale and Telegram must be asked.
+    """
+    digest = state.unread_digest
+    if not digest:
+        return None
+    now = now if now is not None else time.time()
+    if now - digest["updated_at"] > DIGEST_MAX_AGE:
+        return None
+    return digest["dialogs"]
+
@@ -1,18 +1,20 @@
-import traceback
+import logging
+import math
 
 from ask_sdk_runtime.dispatch_components import AbstractExceptionHandler
+from pyrogram.errors import FloodWait
 
 from skill.i18n.util import get_i18n
 
 
-def print_traceback(exception: Exception):
-    print("ENCOUNTERED FOLLOWING EXCEPTION:")
-    print("PRINTING: TRACEBACK: ")
-    print(traceback.format_exc())
-    print(exception)
-    print("PRINTING EXCEPTION ARGS:")
-    for idx, arg in enumerate(exception.args):
-        print("Arg number {}: {}".format(idx + 1, arg))
+logger = logging.getLogger(__name__)
+
+
+def log_exception(exception: Exception):
+    """
+    One log record with the traceback and the exception args, instead of one line each.
+    """
+    logger.error("Encountered exception: %r", exception, exc_info=exception, extra={"exception_args": exception.args})
 
 
 class NoSuccessRetrievingPhonenumberException(Exception):
@@ -29,11 +31,33 @@ class CatchNoSuccessRetrievingPhonenumberExceptionHandler(AbstractExceptionHandl
     def handle(self, handler_input, exception):
         rb = handler_input.response_builder
         i18n = get_i18n(handler_input)
-        print("CATCH EXCEPTION")
         sess_attrs = handler_input.attributes_manager.session_attributes
         sess_attrs.clear()
         speech = i18n.EXCEPTION_RETRIEVING_PHONE_NUM
-        print_traceback(exception)
+        log_exception(exception)
+
+        rb.speak(speech).set_should_end_session(True)
+        return rb.response
+
+
+class CatchFloodWaitExceptionHandler(AbstractExceptionHandler):
+    """
+    Telegram, or the rate limiter on its behalf, wants the user to wait. Tells them how long, instead of an error.
+    """
+
+    def can_handle(self, handler_input, exception):
+        return isinstance(exception, FloodWait)
+
+    def handle(self, handler_input, exception):
+        logger.warning("Flood wait of %s seconds", exception.x, extra={"exception": type(exception).__name__})
+        rb = handler_input.response_builder
+        i18n = get_i18n(handler_input)
+        handler_input.attributes_manager.session_attributes.clear()
+
+        if exception.x < 120:
+            speech = i18n.FLOOD_WAIT_SECONDS.format(exception.x)
+        else:
+            speech = i18n.FLOOD_WAIT_MINUTES.format(math.ceil(exception.x / 60))
 
         rb.speak(speech).set_should_end_session(True)
         return rb.response
@@ -50,7 +74,7 @@ class CatchAllExceptionHandler(AbstractExceptionHandler):
         return True
 
     def handle(self, handler_input, exception):
-        print_traceback(exception)
+        log_exception(exception)
         rb = handler_input.response_builder
         i18n = get_i18n(handler_input)
 
@@ -1,27 +1,62 @@
-from six import PY3
-from html.parser import HTMLParser
+import re
+from functools import lru_cache
+from html import unescape
+
+_SSML_BREAK = re.compile(r"<break\b[^>]*>")
+_SSML_TAG = re.compile(r"<[^>]*>")
+
+# Static phrases are short. Long outputs, e.g.: with telegrams, are hardly ever repeated and not worth caching.
+MEMOIZE_MAX_LENGTH = 512
 
 
 def remove_ssml_tags(ssml_speech):
-    # convert ssml speech to text, by removing html tags
-    s = SSMLStripper()
-    s.feed(ssml_speech)
-    return s.get_data()
+    # convert ssml speech to text, by removing tags, turning breaks into spaces and resolving entities
+    if len(ssml_speech) <= MEMOIZE_MAX_LENGTH:
+        return _remove_ssml_tags_memoized(ssml_speech)
+    return _remove_ssml_tags(ssml_speech)
+
+
+@lru_cache(maxsize=1024)
+def _remove_ssml_tags_memoized(ssml_speech):
+    return _remove_ssml_tags(ssml_speech)
+
+
+def _remove_ssml_tags(ssml_speech):
+    text = ssml_speech
+    if '<break' in text:
+        text = _SSML_BREAK.sub(_replace_break, text)
+    text = _SSML_TAG.sub('', text)
+    return unescape(text) if '&' in text else text
+
+
+def _replace_break(match):
+    # A break between two words separates them. Next to whitespace, punctuation, another break or at either end it is
+    # dropped. Other tags, e.g.: <lang>, are looked past, they don't separate words themselves.
+    s = match.string
+    before, after = _visible_before(s, match.start()), _visible_after(s, match.end())
+    if before and after and not before.isspace() and not after.isspace() and after not in '.,;:!?)':
+        return ' '
+    return ''
 
 
-class SSMLStripper(HTMLParser):
-    def __init__(self):
-        self.reset()
-        self.full_str_list = []
-        if PY3:
-            self.strict = False
-            self.convert_charrefs = True
+def _visible_before(s, idx):
+    while idx and s[idx - 1] == '>':
+        tag_start = s.rfind('<', 0, idx - 1)
+        if tag_start < 0:
+            break
+        idx = tag_start
+    return s[idx - 1] if idx else ''
 
-    def handle_data(self, d):
-        self.full_str_list.append(d)
 
-    def get_data(self):
-        return ''.join(self.full_str_list)
+def _visible_after(s, idx):
+    while idx < len(s) and s[idx] == '<':
+        if s.startswith('<break', idx):
+            # The following break separates the words
+            return ''
+        idx = s.find('>', idx) + 1
+        if not idx:
+            return ''
+    return s[idx] if idx < len(s) else ''
 
 
 class ExploreIntents:
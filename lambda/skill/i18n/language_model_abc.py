@@ -1,7 +1,8 @@
 import abc
 import random
 from datetime import datetime, tzinfo
-from typing import List
+from types import MappingProxyType
+from typing import Dict, List
 
 
 class LanguageModelABC(abc.ABC):
@@ -35,7 +36,10 @@ class LanguageModelABC(abc.ABC):
     GOOD_BYE_MORNING: str
 
     FALLBACK: str
+    FALLBACK_QUESTION: str
     EXCEPTION: str
+    FLOOD_WAIT_SECONDS: str
+    FLOOD_WAIT_MINUTES: str
 
     ##############################
     # LaunchRequestHandler
@@ -43,6 +47,7 @@ class LanguageModelABC(abc.ABC):
     WELCOME_BACK: str
     NO_NEW_TELEGRAMS: str
     NEW_TELEGRAMS: str
+    FETCHING_TELEGRAMS: str
     NEW_SETUP: str
 
     ##############################
@@ -72,9 +77,27 @@ class LanguageModelABC(abc.ABC):
     AND: str
     NO_MORE_TELEGRAMS: str
     NEXT_TELEGRAMS: str
+    TELEGRAMS_STILL_LOADING: str
+    MORE_UNREAD_DIALOGS: str
+    UNREAD_DIALOG_COUNT: str
+    OTHER_DIALOGS: str
     PERSONAL_DIALOG_INTRO: str
     GROUP_DIALOG_INTRO: str
     MEDIA_FILE_RECEIVED: str
+    EMOJI_RECEIVED: str
+    CODE_RECEIVED: str
+    MESSAGE_CONTINUES: str
+    MEDIA_RECEIVED: str
+    MEDIA_NAMES: Dict[str, str]
+    STICKER_RECEIVED: str
+    STICKER_EMOJIS: Dict[str, str]
+    MEDIA_TITLE: str
+    MEDIA_TITLE_BY: str
+    MEDIA_PERFORMER: str
+    MEDIA_FILE_NAME: str
+    MEDIA_SECONDS: str
+    MEDIA_MINUTES: str
+    MEDIA_CAPTION: str
     NOT_AUTHORIZED: str
 
     ##############################
@@ -87,11 +110,35 @@ class LanguageModelABC(abc.ABC):
     ##############################
     LEARN_MORE: str
 
+    _frozen = False
+
     @abc.abstractmethod
     def set_language_model(self):
         """ Set the language model for the specific language"""
         return
 
+    def __setattr__(self, key, value):
+        if self._frozen:
+            raise AttributeError("Language model is frozen, can't set {}".format(key))
+        super().__setattr__(key, value)
+
+    def freeze(self):
+        """
+        Language models are cached and shared between requests. Once frozen, they can't be changed anymore: lists
+        become tuples and dicts read-only mappings.
+        """
+        for key, value in vars(self).items():
+            if isinstance(value, list):
+                super().__setattr__(key, tuple(value))
+            elif isinstance(value, dict):
+                super().__setattr__(key, MappingProxyType(value))
+        super().__setattr__('_frozen', True)
+        return self
+
+    @property
+    def FALLBACK(self):
+        return self.get_random_dont_understand() + self.FALLBACK_QUESTION
+
     def get_daytime_greeting(self):
         now = datetime.now(self.timezone)
         if 6 <= now.hour < 12:
@@ -112,13 +159,9 @@ class LanguageModelABC(abc.ABC):
         return random.choice(self.DONE_ACKS)
 
     def get_random_goodbye(self):
-        goodbyes = self.GOODBYES
         now = datetime.now(self.timezone)
-        if now.hour < 18:
-            goodbyes.append(self.GOOD_BYE_MORNING)
-        else:
-            goodbyes.append(self.GOOD_EVENING)
-        return random.choice(goodbyes)
+        daytime_goodbye = self.GOOD_BYE_MORNING if now.hour < 18 else self.GOOD_BYE_EVENING
+        return random.choice([*self.GOODBYES, daytime_goodbye])
 
     def get_random_thinking(self):
         return random.choice(self.THINKING)
@@ -29,9 +29,11 @@ class LanguageModelDE(LanguageModelABC):
         self.GOOD_BYE_EVENING = "Schönen Abend noch!"
         self.GOOD_BYE_MORNING = "Schönen Tag noch!"
 
-        self.FALLBACK = self.get_random_dont_understand() + ", was hast du gesagt?"
+        self.FALLBACK_QUESTION = ", was hast du gesagt?"
         self.EXCEPTION = "Ein unerwarteter Fehler ist aufgetreten. Wenn du Zeit hast, lass uns auf <lang xml:lang='en-US'>GitHub</lang> wissen was passiert ist." \
                          " Bis später"
+        self.FLOOD_WAIT_SECONDS = 'Telegram bittet mich, langsamer zu machen. Versuche es bitte in {} Sekunden noch einmal.'
+        self.FLOOD_WAIT_MINUTES = 'Telegram bittet mich, langsamer zu machen. Versuche es bitte in {} Minuten noch einmal.'
 
         ##############################
         # LaunchRequestHandler
@@ -39,6 +41,7 @@ class LanguageModelDE(LanguageModelABC):
         self.WELCOME_BACK = 'Willkommen zurück!'
         self.NO_NEW_TELEGRAMS = "Du hast kein neues Telegramm."
         self.NEW_TELEGRAMS = 'Du hast neue Telegramme. Möchtest du sie hören?'
+        self.FETCHING_TELEGRAMS = 'Ich schaue nach deinen Telegrammen.'
         self.NEW_SETUP = 'Willkommen bei {}. {} verbindet Alexa mit dem Telegram Messenger. Bist du bereit, dass ' \
                          'Setup zu starten?'.format(self.SKILL_NAME_SPOKEN_EN, self.SKILL_NAME_SPOKEN_EN)
 
@@ -78,9 +81,31 @@ class LanguageModelDE(LanguageModelABC):
         self.AND = 'und'
         self.NO_MORE_TELEGRAMS = 'Es gibt keine weiteren Telegramme. Bis später.'
         self.NEXT_TELEGRAMS = 'Möchtest du die Telegramme vom nächsten Kontakt hören?'
+        self.TELEGRAMS_STILL_LOADING = 'Die Telegramme von {} werden noch geladen. Möchtest du sie jetzt hören?'
+        self.MORE_UNREAD_DIALOGS = 'Ungelesene Telegramme hast du außerdem in: {}. '
+        self.UNREAD_DIALOG_COUNT = '{} mit {}'
+        self.OTHER_DIALOGS = '{} weiteren Chats'
         self.PERSONAL_DIALOG_INTRO = '{} schrieb: '
         self.GROUP_DIALOG_INTRO = 'In {}'
         self.MEDIA_FILE_RECEIVED = '{} hat eine Datei geschickt.'
+        self.EMOJI_RECEIVED = '{} hat ein Emoji geschickt.'
+        self.CODE_RECEIVED = '{} hat einen Code-Schnipsel geschickt.'
+        self.MESSAGE_CONTINUES = 'Das Telegramm geht in der App weiter.'
+        self.MEDIA_RECEIVED = '{} hat {} geschickt.'
+        self.MEDIA_NAMES = {"photo": "ein Foto", "video": "ein Video", "voice": "eine Sprachnachricht",
+                            "audio": "eine Audiodatei", "document": "ein Dokument", "sticker": "einen Sticker",
+                            "animation": "ein GIF", "video_note": "eine Videonachricht"}
+        self.STICKER_RECEIVED = '{} hat einen Sticker geschickt: {}.'
+        self.STICKER_EMOJIS = {"😀": "ein lachendes Gesicht", "😂": "Freudentränen", "😍": "Herzaugen",
+                               "😢": "ein weinendes Gesicht", "👍": "Daumen hoch", "👋": "eine winkende Hand",
+                               "❤": "ein Herz", "🎉": "eine Konfettibombe", "🙏": "gefaltete Hände", "🔥": "Feuer"}
+        self.MEDIA_TITLE = 'Titel: {}.'
+        self.MEDIA_TITLE_BY = 'Titel: {} von {}.'
+        self.MEDIA_PERFORMER = 'Von {}.'
+        self.MEDIA_FILE_NAME = 'Dateiname: {}.'
+        self.MEDIA_SECONDS = 'Länge: {} Sekunden.'
+        self.MEDIA_MINUTES = 'Länge: {} Minuten.'
+        self.MEDIA_CAPTION = 'Beschriftung: {}'
         self.NOT_AUTHORIZED = "Du hast Alexa nicht mit Telegram veknüpft. Bis später."
 
         ##############################
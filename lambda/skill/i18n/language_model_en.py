@@ -31,9 +31,11 @@ class LanguageModelEN(LanguageModelABC):
         self.GOOD_BYE_EVENING = "Have a nice evening!"
         self.GOOD_BYE_MORNING = "Have a nice day!"
 
-        self.FALLBACK = self.get_random_dont_understand() + ", what did you say?"
+        self.FALLBACK_QUESTION = ", what did you say?"
         self.EXCEPTION = "An unexpected error happened. If you have some time, please let us know what happened on " \
                          "GitHub. Bye for now."
+        self.FLOOD_WAIT_SECONDS = 'Telegram asks me to slow down. Please try again in {} seconds.'
+        self.FLOOD_WAIT_MINUTES = 'Telegram asks me to slow down. Please try again in {} minutes.'
 
         ##############################
         # LaunchRequestHandler
@@ -41,6 +43,7 @@ class LanguageModelEN(LanguageModelABC):
         self.WELCOME_BACK = 'Welcome back!'
         self.NO_NEW_TELEGRAMS = "You don't have any new telegrams."
         self.NEW_TELEGRAMS = 'You have new telegrams. Do you want to hear them?'
+        self.FETCHING_TELEGRAMS = 'Let me check your telegrams.'
         self.NEW_SETUP = 'Welcome to {}. {} couples Alexa with your Telegram ' \
                          'Messenger. Now, are you ready to start the setup?'.format(self.SKILL_NAME_SPOKEN_EN,
                                                                                     self.SKILL_NAME_SPOKEN_EN)
@@ -80,9 +83,31 @@ class LanguageModelEN(LanguageModelABC):
         self.AND = 'and'
         self.NO_MORE_TELEGRAMS = 'There are no more new telegrams. Bye for now.'
         self.NEXT_TELEGRAMS = 'Do you want to hear the telegrams from your next contact?'
+        self.TELEGRAMS_STILL_LOADING = 'The telegrams from {} are still loading. Do you want to hear them now?'
+        self.MORE_UNREAD_DIALOGS = 'You also have unread telegrams in: {}. '
+        self.UNREAD_DIALOG_COUNT = '{} with {}'
+        self.OTHER_DIALOGS = '{} other chats'
         self.PERSONAL_DIALOG_INTRO = '{} wrote: '
         self.GROUP_DIALOG_INTRO = 'In {}'
         self.MEDIA_FILE_RECEIVED = '{} sent a media file.'
+        self.EMOJI_RECEIVED = '{} sent an emoji.'
+        self.CODE_RECEIVED = '{} sent a code snippet.'
+        self.MESSAGE_CONTINUES = 'The telegram continues in the app.'
+        self.MEDIA_RECEIVED = '{} sent {}.'
+        self.MEDIA_NAMES = {"photo": "a photo", "video": "a video", "voice": "a voice message", "audio": "an audio file",
+                            "document": "a document", "sticker": "a sticker", "animation": "a GIF",
+                            "video_note": "a video message"}
+        self.STICKER_RECEIVED = '{} sent a sticker: {}.'
+        self.STICKER_EMOJIS = {"😀": "a smiling face", "😂": "tears of joy", "😍": "heart eyes", "😢": "a crying face",
+                               "👍": "thumbs up", "👋": "a waving hand", "❤": "a heart", "🎉": "a party popper",
+                               "🙏": "folded hands", "🔥": "fire"}
+        self.MEDIA_TITLE = 'Title: {}.'
+        self.MEDIA_TITLE_BY = 'Title: {} by {}.'
+        self.MEDIA_PERFORMER = 'By {}.'
+        self.MEDIA_FILE_NAME = 'File name: {}.'
+        self.MEDIA_SECONDS = 'Length: {} seconds.'
+        self.MEDIA_MINUTES = 'Length: {} minutes.'
+        self.MEDIA_CAPTION = 'Caption: {}'
         self.NOT_AUTHORIZED = "You didn't couple Alexa with Telegram. Bye for now."
 
         ##############################
@@ -6,6 +6,7 @@ class LanguageModelIT(LanguageModelABC):
     def __init__(self, timezone: tzinfo):
         self.timezone = timezone
         self.SKILL_NAME = 'Telegram Connect'
+        self.SKILL_NAME_SPOKEN_EN = "<lang xml:lang='en-US'>Telegram Connect</lang>".format(self.SKILL_NAME)
         self.SKILL_NAME_SPOKEN_IT = "<lang xml:lang='it-IT'>Telegram Connect</lang>".format(self.SKILL_NAME)
 
         self.set_language_model()
@@ -31,9 +32,11 @@ class LanguageModelIT(LanguageModelABC):
         self.GOOD_BYE_EVENING = "Passa una buona serata!"
         self.GOOD_BYE_MORNING = "Passa una buona giornata!"
 
-        self.FALLBACK = self.get_random_dont_understand() + ", cosa hai detto?"
+        self.FALLBACK_QUESTION = ", cosa hai detto?"
         self.EXCEPTION = "Si è verificato un errore inaspettato. Se hai un po di tempo, dai il tuo feedbeck su " \
                          "GitHub. A presto."
+        self.FLOOD_WAIT_SECONDS = 'Telegram mi chiede di rallentare. Riprova tra {} secondi.'
+        self.FLOOD_WAIT_MINUTES = 'Telegram mi chiede di rallentare. Riprova tra {} minuti.'
 
         ##############################
         # LaunchRequestHandler
@@ -41,6 +44,7 @@ class LanguageModelIT(LanguageModelABC):
         self.WELCOME_BACK = 'Bentornato!'
         self.NO_NEW_TELEGRAMS = "Non hai nuovi messaggi telegram"
         self.NEW_TELEGRAMS = 'Hai nuovi messaggi telegram. Vuoi ascoltarli?'
+        self.FETCHING_TELEGRAMS = 'Controllo i tuoi messaggi telegram.'
         self.NEW_SETUP = 'Benvenuto a {}. {} integra Alexa con Telegram ' \
                          'Messenger. Sei pronto alla configurazione?'.format(self.SKILL_NAME_SPOKEN_IT,
                                                                                     self.SKILL_NAME_SPOKEN_IT)
@@ -78,9 +82,31 @@ class LanguageModelIT(LanguageModelABC):
         self.AND = 'e'
         self.NO_MORE_TELEGRAMS = 'Non ci sono più messaggi telegram. A dopo.'
         self.NEXT_TELEGRAMS = 'Vuoi ascoltare altri messaggi telegram?'
+        self.TELEGRAMS_STILL_LOADING = 'I messaggi di {} sono ancora in caricamento. Vuoi ascoltarli adesso?'
+        self.MORE_UNREAD_DIALOGS = 'Hai anche messaggi telegram non letti in: {}. '
+        self.UNREAD_DIALOG_COUNT = '{} con {}'
+        self.OTHER_DIALOGS = 'altre {} chat'
         self.PERSONAL_DIALOG_INTRO = '{} ha scritto: '
         self.GROUP_DIALOG_INTRO = 'In {}'
         self.MEDIA_FILE_RECEIVED = '{} ha inviato un file multimediale.'
+        self.EMOJI_RECEIVED = '{} ha inviato un\'emoji.'
+        self.CODE_RECEIVED = '{} ha inviato un frammento di codice.'
+        self.MESSAGE_CONTINUES = 'Il messaggio continua nell\'app.'
+        self.MEDIA_RECEIVED = '{} ha inviato {}.'
+        self.MEDIA_NAMES = {"photo": "una foto", "video": "un video", "voice": "un messaggio vocale",
+                            "audio": "un file audio", "document": "un documento", "sticker": "uno sticker",
+                            "animation": "una GIF", "video_note": "un videomessaggio"}
+        self.STICKER_RECEIVED = '{} ha inviato uno sticker: {}.'
+        self.STICKER_EMOJIS = {"😀": "una faccina sorridente", "😂": "lacrime di gioia", "😍": "occhi a cuore",
+                               "😢": "una faccina che piange", "👍": "pollice in su", "👋": "una mano che saluta",
+                               "❤": "un cuore", "🎉": "coriandoli", "🙏": "mani giunte", "🔥": "fuoco"}
+        self.MEDIA_TITLE = 'Titolo: {}.'
+        self.MEDIA_TITLE_BY = 'Titolo: {} di {}.'
+        self.MEDIA_PERFORMER = 'Di {}.'
+        self.MEDIA_FILE_NAME = 'Nome del file: {}.'
+        self.MEDIA_SECONDS = 'Durata: {} secondi.'
+        self.MEDIA_MINUTES = 'Durata: {} minuti.'
+        self.MEDIA_CAPTION = 'Didascalia: {}'
         self.NOT_AUTHORIZED = "Non hai integrato Alexa con Telegram. A dopo."
 
         ##############################
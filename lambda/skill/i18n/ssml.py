@@ -0,0 +1,129 @@
+from functools import lru_cache
+from html import escape
+from string import Formatter
+from typing import Iterable, List, Tuple, Union
+
+from ask_sdk_core.handler_input import HandlerInput
+from ask_sdk_core.response_helper import ResponseFactory
+
+from skill.helper_functions import remove_ssml_tags
+
+# Request attribute holding (output_speech, text) of the spoken Speech. The CardResponseInterceptor puts the text on
+# the card, as long as the response still has that very output speech.
+CARD_TEXT = "card_text"
+
+_formatter = Formatter()
+
+
+def escape_ssml(text: str) -> str:
+    """
+    Text from Telegram can contain characters like '<' or '&', which break the SSML of the response.
+    """
+    return escape(text, quote=False)
+
+
+class SSMLTemplate:
+    """
+    A template of the language model compiled into literal parts and placeholders. Literal parts are trusted SSML,
+    their plain text is computed once at compile time. Values are escaped for the SSML output and inserted
+    unchanged into the text output, so one render gives both.
+    """
+
+    def __init__(self, template: str):
+        self._parts = []  # type: List[Union[Tuple[str, str], str]]
+        auto_idx = 0
+        for literal, field_name, _, _ in _formatter.parse(template):
+            if literal:
+                self._parts.append((literal, remove_ssml_tags(literal)))
+            if field_name is not None:
+                if field_name == '':
+                    field_name = str(auto_idx)
+                    auto_idx += 1
+                self._parts.append(field_name)
+
+    def render(self, *args, **kwargs) -> Tuple[str, str]:
+        ssml_parts = []
+        text_parts = []
+        for part in self._parts:
+            if isinstance(part, tuple):
+                ssml_parts.append(part[0])
+                text_parts.append(part[1])
+                continue
+            value = args[int(part)] if part.isdigit() else kwargs[part]
+            if isinstance(value, Speech):
+                ssml_parts.append(value.ssml)
+                text_parts.append(value.text)
+            else:
+                value = str(value)
+                ssml_parts.append(escape_ssml(value))
+                text_parts.append(value)
+        return ''.join(ssml_parts), ''.join(text_parts)
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> SSMLTemplate:
+    """
+    Templates are strings of the cached language models, so every template is compiled only once per locale.
+    """
+    return SSMLTemplate(template)
+
+
+class Speech:
+    """
+    Builds the SSML and the plain text of an output speech side by side.
+    """
+
+    def __init__(self):
+        self._ssml = []
+        self._text = []
+
+    @property
+    def ssml(self) -> str:
+        return ''.join(self._ssml)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._text)
+
+    def add(self, template: str, *args, **kwargs) -> 'Speech':
+        """
+        Adds a template of the language model. Values are escaped, the template itself must be valid SSML.
+        """
+        ssml, text = compile_template(template).render(*args, **kwargs)
+        self._ssml.append(ssml)
+        self._text.append(text)
+        return self
+
+    def add_text(self, text: str) -> 'Speech':
+        """
+        Adds untrusted text, e.g.: a telegram.
+        """
+        self._ssml.append(escape_ssml(text))
+        self._text.append(text)
+        return self
+
+    def add_speech(self, speech: 'Speech') -> 'Speech':
+        self._ssml.append(speech.ssml)
+        self._text.append(speech.text)
+        return self
+
+    @classmethod
+    def join(cls, separator: str, items: Iterable[Union[str, 'Speech']]) -> 'Speech':
+        """
+        Joins templates and speeches with a separator template, e.g.: a break.
+        """
+        speech = cls()
+        for idx, item in enumerate(items):
+            if idx:
+                speech.add(separator)
+            if isinstance(item, Speech):
+                speech.add_speech(item)
+            else:
+                speech.add(item)
+        return speech
+
+    def speak(self, handler_input: HandlerInput) -> ResponseFactory:
+        response_builder = handler_input.response_builder.speak(self.ssml)
+        handler_input.attributes_manager.request_attributes[CARD_TEXT] = (response_builder.response.output_speech,
+                                                                           self.text)
+        return response_builder
@@ -1,18 +1,51 @@
-from typing import Union
+import importlib
+from functools import lru_cache
+from typing import Dict, Tuple, Type
 
 import pytz
 from ask_sdk_core.handler_input import HandlerInput
 
-from skill.i18n.language_model_de import LanguageModelDE
-from skill.i18n.language_model_en import LanguageModelEN
+from skill.i18n.language_model_abc import LanguageModelABC
 
+# Language -> (module, class) of its language model. Modules are only imported once a locale of that language is used.
+LANGUAGE_MODULES = {
+    'en': ('skill.i18n.language_model_en', 'LanguageModelEN'),
+    'de': ('skill.i18n.language_model_de', 'LanguageModelDE'),
+    'it': ('skill.i18n.language_model_it', 'LanguageModelIT'),
+}  # type: Dict[str, Tuple[str, str]]
+DEFAULT_LANGUAGE = 'en'
 
-def get_i18n(handler_input: HandlerInput) -> Union[LanguageModelEN, LanguageModelDE]:
+# Locale -> language model class. Filled on first use of a locale, so every further lookup is a single dictionary hit.
+_locale_registry = {}  # type: Dict[str, Type[LanguageModelABC]]
+
+
+def get_i18n(handler_input: HandlerInput) -> LanguageModelABC:
     tz_database_name = handler_input.attributes_manager.session_attributes.get("tz_database_name",
                                                                                "America/Los_Angeles")
-    timezone = pytz.timezone(tz_database_name)
-    language_model = LanguageModelEN(timezone)
     locale = handler_input.request_envelope.request.locale
-    if locale == 'de-DE':
-        language_model = LanguageModelDE(timezone)
-    return language_model
+    return get_language_model(locale, tz_database_name)
+
+
+@lru_cache(maxsize=256)
+def get_language_model(locale: str, tz_database_name: str) -> LanguageModelABC:
+    """
+    Language models are built once per (locale, timezone) and frozen, because they are shared between requests.
+    """
+    timezone = pytz.timezone(tz_database_name)
+    return get_language_model_class(locale)(timezone).freeze()
+
+
+def get_language_model_class(locale: str) -> Type[LanguageModelABC]:
+    language_model_class = _locale_registry.get(locale)
+    if language_model_class is None:
+        language_model_class = _locale_registry[locale] = _load_language_model_class(locale)
+    return language_model_class
+
+
+def _load_language_model_class(locale: str) -> Type[LanguageModelABC]:
+    """
+    Falls back from the locale (e.g.: 'de-AT') to its language ('de') and then to the default language.
+    """
+    language = (locale or DEFAULT_LANGUAGE).split('-')[0].lower()
+    module_name, class_name = LANGUAGE_MODULES.get(language, LANGUAGE_MODULES[DEFAULT_LANGUAGE])
+    return getattr(importlib.import_module(module_name), class_name)
@@ -1,12 +1,21 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
 from ask_sdk_core.dispatch_components import AbstractRequestHandler
 from ask_sdk_core.utils import is_intent_name
 
+from skill import tracing
+from skill.i18n.ssml import Speech
 from skill.i18n.util import get_i18n
+from skill.pyrogram import text_normalizer
 from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.services.directive_service import progressive_response
 from skill.state_manager import StateManager
 
+# Only the best ranked dialogs are read out, the ones get_unread_dialogs fetches the histories of.
+# The others are announced by name and count, up to ANNOUNCE_LIMIT by name.
+READ_LIMIT = PyrogramManager.HISTORY_LIMIT
+ANNOUNCE_LIMIT = 5
+
 
 class MessageIntentHandler(AbstractRequestHandler):
 
@@ -23,65 +32,145 @@ class MessageIntentHandler(AbstractRequestHandler):
             return handler_input.response_builder.speak(self.i18n.NOT_AUTHORIZED).set_should_end_session(True).response
 
         if 'unread_dialogs' not in sess_attrs:
-            unread_dialogs = pyrogram_manager.get_unread_dialogs()
+            with progressive_response(handler_input, self.i18n.FETCHING_TELEGRAMS,
+                                      pyrogram_manager.expected_unread_seconds()):
+                unread_dialogs = pyrogram_manager.get_unread_dialogs()
             sess_attrs['unread_dialogs'] = unread_dialogs
             if not unread_dialogs:
-                speech = self.i18n.NO_NEW_TELEGRAMS + ' ' + self.i18n.get_random_goodbye()
-                return handler_input.response_builder.speak(speech).response
+                speech = Speech().add(self.i18n.NO_NEW_TELEGRAMS + ' ' + self.i18n.get_random_goodbye())
+                return speech.speak(handler_input).response
 
         unread_dialogs_index = sess_attrs.get('unread_dialog_index', 0)
-        unread_dialogs = sess_attrs.get('unread_dialogs', [])
-
-        speech_text = ''
-        if unread_dialogs_index == 0:
-            first_names = self.get_first_names(unread_dialogs)
-            speech_text += self.i18n.NEW_TELEGRAMS_FROM.format(first_names)
+        unread_dialogs = sess_attrs.get('unread_dialogs', [])[:READ_LIMIT]
+        other_dialogs = sess_attrs.get('unread_dialogs', [])[READ_LIMIT:]
 
         dialog = unread_dialogs[unread_dialogs_index]
+        if dialog['telegrams'] is None:
+            # There wasn't enough time to fetch this dialog in an earlier turn
+            if not pyrogram_manager.can_fetch_history():
+                speech = Speech().add(self.i18n.TELEGRAMS_STILL_LOADING, dialog['name'])
+                return speech.speak(handler_input).ask(self.i18n.FALLBACK).response
+            dialog['telegrams'] = pyrogram_manager.get_unread_telegrams(dialog['chat_id'], dialog['unread_count'])
         pyrogram_manager.read_history(dialog['chat_id'])
-        speech_text += self.construct_output_speech_for_dialog(dialog)
+
+        with tracing.span("speech.render"):
+            speech = Speech()
+            if unread_dialogs_index == 0:
+                first_names = self.get_first_names(unread_dialogs)
+                speech.add(self.i18n.NEW_TELEGRAMS_FROM, first_names)
+            speech.add_speech(self.construct_output_speech_for_dialog(dialog))
+
+        if unread_dialogs_index == len(unread_dialogs) - 1 and other_dialogs:
+            speech.add(self.i18n.BREAK_2000 + ' ').add_speech(self.construct_other_dialogs(other_dialogs))
+            speech.add(self.i18n.get_random_goodbye())
+            return speech.speak(handler_input).set_should_end_session(True).response
 
         if unread_dialogs_index == len(unread_dialogs) - 1:
-            speech_text += self.i18n.BREAK_2000 + ' ' + self.i18n.NO_MORE_TELEGRAMS
-            return handler_input.response_builder.speak(speech_text).set_should_end_session(True).response
+            speech.add(self.i18n.BREAK_2000 + ' ' + self.i18n.NO_MORE_TELEGRAMS)
+            return speech.speak(handler_input).set_should_end_session(True).response
 
-        speech_text += self.i18n.BREAK_2000 + ' ' + self.i18n.NEXT_TELEGRAMS
+        speech.add(self.i18n.BREAK_2000 + ' ' + self.i18n.NEXT_TELEGRAMS)
         sess_attrs['unread_dialog_index'] = unread_dialogs_index + 1
-        return handler_input.response_builder.speak(speech_text).ask(self.i18n.FALLBACK).response
+        return speech.speak(handler_input).ask(self.i18n.FALLBACK).response
 
-    def get_first_names(self, unread_dialogs: List[dict]) -> str:
+    def get_first_names(self, unread_dialogs: List[dict]) -> Speech:
+        first_names = Speech()
         if len(unread_dialogs) == 1:
-            return unread_dialogs[0]['name'] + self.i18n.BREAK_200
+            return first_names.add_text(unread_dialogs[0]['name']).add(self.i18n.BREAK_200)
 
         # Don't loop over last, because we add an 'and' for the voice output
-        names = [telegram['name'] for telegram in unread_dialogs[:-1]]
-        first_names = ", ".join(names) + self.i18n.BREAK_200
-        first_names += ' ' + self.i18n.AND + ' ' + unread_dialogs[-1]['name'] + self.i18n.BREAK_200
-        # Constructs a string like: "Tom, Paul, and Julia"
+        names = [Speech().add_text(telegram['name']) for telegram in unread_dialogs[:-1]]
+        first_names.add_speech(Speech.join(", ", names)).add(self.i18n.BREAK_200)
+        first_names.add(' ' + self.i18n.AND + ' ').add_text(unread_dialogs[-1]['name']).add(self.i18n.BREAK_200)
+        # Constructs a speech like: "Tom, Paul, and Julia"
         return first_names
 
-    def construct_output_speech_for_dialog(self, dialog: dict):
-        speech_text = self.i18n.PERSONAL_DIALOG_INTRO.format(dialog['name'])
+    def construct_other_dialogs(self, other_dialogs: List[dict]) -> Speech:
+        """
+        Constructs a speech like: "You also have unread telegrams in: Family with 12, Work with 3, and 40 other chats"
+        """
+        counts = [Speech().add(self.i18n.UNREAD_DIALOG_COUNT, dialog['name'], dialog['unread_count'])
+                  for dialog in other_dialogs[:ANNOUNCE_LIMIT]]
+        if len(other_dialogs) > ANNOUNCE_LIMIT:
+            counts.append(Speech().add(self.i18n.OTHER_DIALOGS, len(other_dialogs) - ANNOUNCE_LIMIT))
+        if len(counts) == 1:
+            return Speech().add(self.i18n.MORE_UNREAD_DIALOGS, counts[0])
+        listing = Speech.join(", ", counts[:-1]).add(' ' + self.i18n.AND + ' ').add_speech(counts[-1])
+        return Speech().add(self.i18n.MORE_UNREAD_DIALOGS, listing)
+
+    def construct_output_speech_for_dialog(self, dialog: dict) -> Speech:
+        speech = Speech().add(self.i18n.PERSONAL_DIALOG_INTRO, dialog['name'])
         if dialog['is_group']:
-            speech_text = self.i18n.GROUP_DIALOG_INTRO.format(dialog['name']) + ': '
+            speech = Speech().add(self.i18n.GROUP_DIALOG_INTRO + ': ', dialog['name'])
             spoken_telegrams = self.construct_spoken_telegrams(dialog['telegrams'], True)
-            speech_text += (' ' + self.i18n.BREAK_350).join(spoken_telegrams)
-            return speech_text
+            return speech.add_speech(Speech.join(' ' + self.i18n.BREAK_350, spoken_telegrams))
 
         spoken_telegrams = self.construct_spoken_telegrams(dialog['telegrams'], False)
-        if dialog['telegrams'][0][0] == PyrogramManager.MEDIA_FILE_KEY:
-            speech_text = ''
+        first_telegram = dialog['telegrams'][0][0]
+        if isinstance(first_telegram, dict) or self.get_placeholder(first_telegram):
+            speech = Speech()
 
-        speech_text += (' ' + self.i18n.BREAK_350).join(spoken_telegrams)
-        return speech_text
+        return speech.add_speech(Speech.join(' ' + self.i18n.BREAK_350, spoken_telegrams))
 
-    def construct_spoken_telegrams(self, telegrams: List[Tuple[str, str]], is_group: bool):
+    def construct_spoken_telegrams(self, telegrams: List[Tuple[Union[str, dict], str]], is_group: bool) -> List[Speech]:
         spoken_telegrams = []
         for telegram, from_user in telegrams:
-            to_append = telegram
+            if isinstance(telegram, dict):
+                spoken_telegrams.append(self.construct_media(telegram, from_user))
+                continue
+            placeholder = self.get_placeholder(telegram)
+            if placeholder:
+                spoken_telegrams.append(Speech().add(placeholder, from_user))
+                continue
+            to_append = Speech()
             if is_group:
-                to_append = self.i18n.PERSONAL_DIALOG_INTRO.format(from_user) + self.i18n.BREAK_200 + telegram
-            if telegram == PyrogramManager.MEDIA_FILE_KEY:
-                to_append = self.i18n.MEDIA_FILE_RECEIVED.format(from_user)
+                to_append.add(self.i18n.PERSONAL_DIALOG_INTRO + self.i18n.BREAK_200, from_user)
+            to_append.add_text(telegram)
+            if telegram.endswith(text_normalizer.TRUNCATION_MARK):
+                to_append.add(' ' + self.i18n.MESSAGE_CONTINUES)
             spoken_telegrams.append(to_append)
         return spoken_telegrams
+
+    def construct_media(self, media: dict, from_user: str) -> Speech:
+        """
+        Constructs a speech like: "Bello sent a voice message. Length: 12 seconds."
+        See skill.pyrogram.media for the attributes.
+        """
+        speech = Speech()
+        sticker_emoji = self.i18n.STICKER_EMOJIS.get(media.get('emoji', '').replace('\ufe0f', ''))
+        if media['type'] == 'sticker' and sticker_emoji:
+            speech.add(self.i18n.STICKER_RECEIVED, from_user, sticker_emoji)
+        elif media['type'] in self.i18n.MEDIA_NAMES:
+            speech.add(self.i18n.MEDIA_RECEIVED, from_user, self.i18n.MEDIA_NAMES[media['type']])
+        else:
+            speech.add(self.i18n.MEDIA_FILE_RECEIVED, from_user)
+
+        if 'title' in media and 'performer' in media:
+            speech.add(' ' + self.i18n.MEDIA_TITLE_BY, media['title'], media['performer'])
+        elif 'title' in media:
+            speech.add(' ' + self.i18n.MEDIA_TITLE, media['title'])
+        elif 'file_name' in media:
+            speech.add(' ' + self.i18n.MEDIA_FILE_NAME, media['file_name'])
+        if 'performer' in media and 'title' not in media:
+            speech.add(' ' + self.i18n.MEDIA_PERFORMER, media['performer'])
+        if 'duration' in media:
+            seconds = int(media['duration'])
+            if seconds < 90:
+                speech.add(' ' + self.i18n.MEDIA_SECONDS, seconds)
+            else:
+                speech.add(' ' + self.i18n.MEDIA_MINUTES, round(seconds / 60))
+        if 'caption' in media:
+            speech.add(' ' + self.i18n.MEDIA_CAPTION, media['caption'])
+        return speech
+
+    def get_placeholder(self, telegram: str) -> Optional[str]:
+        """
+        The template for telegrams without text to read out, see PyrogramManager._extract_data.
+        """
+        if telegram == PyrogramManager.MEDIA_FILE_KEY:
+            return self.i18n.MEDIA_FILE_RECEIVED
+        if telegram == text_normalizer.EMOJI_KEY:
+            return self.i18n.EMOJI_RECEIVED
+        if telegram == text_normalizer.CODE_KEY:
+            return self.i18n.CODE_RECEIVED
+        return None
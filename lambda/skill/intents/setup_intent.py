@@ -8,7 +8,7 @@ from skill.exceptions.all_exceptions import CatchNoSuccessRetrievingPhonenumberE
     NoSuccessRetrievingPhonenumberException, CatchAllExceptionHandler
 from skill.i18n.util import get_i18n
 from skill.pyrogram.pyrogram_manager import PyrogramManager
-from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.services.alexa_settings_service import AlexaSettingsService, PREFETCHED_PHONE_NUMBER
 from skill.state_manager import StateManager
 
 
@@ -62,7 +62,8 @@ class SetupIntentHandler(AbstractRequestHandler):
                                                 self.handler_input.request_envelope.request.locale)
         phone_num = self.sess_attrs.get('phone_num')
         if not phone_num:
-            phone_num, success = settings_service.get_phone_number()
+            request_attrs = self.handler_input.attributes_manager.request_attributes
+            phone_num, success = request_attrs.get(PREFETCHED_PHONE_NUMBER) or settings_service.get_phone_number()
             if not success and phone_num == 'ACCESS_DENIED':
                 self.sess_attrs['show_permission_consent_card'] = True
                 return self.handler_input.response_builder.speak(self.i18n.NO_PERMISSION) \
@@ -1,17 +1,33 @@
+import logging
+
 import pytz
+import ask_sdk_core.utils as ask_utils
 from ask_sdk_core.dispatch_components import AbstractRequestInterceptor, AbstractResponseInterceptor
 from ask_sdk_core.handler_input import HandlerInput
 from ask_sdk_model.ui import SimpleCard, AskForPermissionsConsentCard
 
+from skill import log
 from skill.helper_functions import remove_ssml_tags
+from skill.i18n.ssml import CARD_TEXT
 from skill.i18n.util import get_i18n
-from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.services import http_client, timezone_cache
+from skill.services.alexa_settings_service import AlexaSettingsService, PREFETCHED_PHONE_NUMBER
 from skill.state_manager import StateManager
 
+logger = logging.getLogger(__name__)
+
 
 class LoggingRequestInterceptor(AbstractRequestInterceptor):
     def process(self, handler_input):
-        print("Request received: {}".format(handler_input.request_envelope.request))
+        if logger.isEnabledFor(logging.INFO):
+            request = handler_input.request_envelope.request
+            logger.info("Request received", extra={
+                "request_type": request.object_type,
+                "intent": getattr(getattr(request, 'intent', None), 'name', None),
+                "request_id": request.request_id,
+                "locale": request.locale
+            })
+        log.debug_payload(logger, "Request envelope: %s", handler_input.request_envelope)
 
 
 class CardResponseInterceptor(AbstractResponseInterceptor):
@@ -20,15 +36,22 @@ class CardResponseInterceptor(AbstractResponseInterceptor):
         i18n = get_i18n(handler_input)
 
         if response.output_speech:
+            # Speech built with the SSML templates already comes with its text. Only other speech must be stripped,
+            # e.g.: of an exception handler which replaced the output speech after a Speech was spoken.
+            card_text = handler_input.attributes_manager.request_attributes.get(CARD_TEXT)
+            if card_text and card_text[0] is response.output_speech:
+                content = card_text[1]
+            else:
+                content = remove_ssml_tags(response.output_speech.ssml)
             response.card = SimpleCard(
                 title=i18n.SKILL_NAME,
-                content=remove_ssml_tags(response.output_speech.ssml)
+                content=content
             )
 
         if sess_attrs.get('show_permission_consent_card', False):
             sess_attrs['show_permission_consent_card'] = False
             response.card = AskForPermissionsConsentCard(
-                ['alexa::profile:mobile_number:read']
+                ['alexa::profile:mobile_number:read', 'alexa::devices:all:notifications:write']
             )
 
 
@@ -36,13 +59,19 @@ class StateRequestInterceptor(AbstractRequestInterceptor):
     def process(self, handler_input: HandlerInput) -> None:
         if handler_input.request_envelope.session.new:
             sess_attrs = handler_input.attributes_manager.session_attributes
+            request_attrs = handler_input.attributes_manager.request_attributes
             settings_service = AlexaSettingsService(handler_input.request_envelope.context.system,
                                                     handler_input.request_envelope.request.locale)
-            tz_database_name = settings_service.get_tz_database_name()
-            sess_attrs["tz_database_name"] = tz_database_name
+            phone_number_future = None
+            if ask_utils.is_intent_name("SetupIntent")(handler_input):
+                # The SetupIntent will need the phone number as well, so we fetch it while resolving the timezone
+                phone_number_future = http_client.submit(settings_service.get_phone_number)
+
             state_manager = StateManager(handler_input)
+            tz_database_name = timezone_cache.get_tz_database_name(settings_service, state_manager.state)
+            sess_attrs["tz_database_name"] = tz_database_name
+            if phone_number_future:
+                request_attrs[PREFETCHED_PHONE_NUMBER] = phone_number_future.result()
 
             state_manager.state.new_session_count += 1
-
-            handler_input.attributes_manager.persistent_attributes = state_manager.state.to_dict()
-            handler_input.attributes_manager.save_persistent_attributes()
+            state_manager.save_to_database(optional=True)
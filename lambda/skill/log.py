@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict
+
+# Level of all loggers without an own level, e.g.: LOG_LEVEL=WARNING
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+# Levels per module, e.g.: LOG_LEVELS="skill.pyrogram=DEBUG,skill.interceptors=WARNING"
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+# Share of verbose payloads (whole request envelopes etc.) which are logged, when their level is enabled
+PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+# Loggers of libraries which are too chatty on INFO
+DEFAULT_MODULE_LEVELS = {
+    "pyrogram": "WARNING",
+    "botocore": "WARNING",
+    "urllib3": "WARNING",
+}
+
+# Attributes every LogRecord has. Everything else, e.g.: extra={...} or the aws_request_id of the Lambda runtime,
+# is added to the JSON record.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({})).keys()) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON line, so a traceback or a payload never spreads over several log events.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + ".%03dZ" % record.msecs,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+def parse_levels(levels: str) -> Dict[str, str]:
+    module_levels = {}
+    for entry in levels.split(","):
+        if "=" not in entry:
+            continue
+        module, level = entry.split("=", 1)
+        module_levels[module.strip()] = level.strip().upper()
+    return module_levels
+
+
+def configure(level: str = None, levels: str = None):
+    """
+    Installs the JSON formatter on the root handlers and sets the levels. The Lambda runtime already has a root
+    handler, locally we add one.
+    """
+    root = logging.getLogger()
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler())
+    for handler in root.handlers:
+        handler.setFormatter(JsonFormatter())
+    root.setLevel((level or LOG_LEVEL).upper())
+
+    module_levels = dict(DEFAULT_MODULE_LEVELS)
+    module_levels.update(parse_levels(LOG_LEVELS if levels is None else levels))
+    for module, module_level in module_levels.items():
+        logging.getLogger(module).setLevel(module_level)
+
+
+def is_payload_sampled() -> bool:
+    return PAYLOAD_SAMPLE_RATE > 0 and random.random() < PAYLOAD_SAMPLE_RATE
+
+
+def debug_payload(logger: logging.Logger, msg: str, payload):
+    """
+    Logs a verbose payload on DEBUG for a sample of the calls. The payload is only formatted if it is logged.
+    """
+    if logger.isEnabledFor(logging.DEBUG) and is_payload_sampled():
+        logger.debug(msg, payload)
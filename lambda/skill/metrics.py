@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from ask_sdk_core.attributes_manager import AbstractPersistenceAdapter
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "TelegramConnect")
+COUNT = "Count"
+BYTES = "Bytes"
+MILLISECONDS = "Milliseconds"
+
+_current_metrics = ContextVar("current_metrics", default=None)  # type: ContextVar[Optional[Metrics]]
+
+
+class Metrics:
+    """
+    Counters and timers of one invocation, flushed as one log line in the CloudWatch embedded metric format.
+    """
+
+    def __init__(self):
+        self.counters = {}  # type: Dict[str, float]
+        self.timers = {}  # type: Dict[str, List[float]]
+        self.units = {}  # type: Dict[str, str]
+        self.dimensions = {}  # type: Dict[str, str]
+
+    def increment(self, name: str, value: float = 1, unit: str = COUNT):
+        self.counters[name] = self.counters.get(name, 0) + value
+        self.units[name] = unit
+
+    def record_time(self, name: str, milliseconds: float):
+        self.timers.setdefault(name, []).append(round(milliseconds, 3))
+        self.units[name] = MILLISECONDS
+
+    def to_emf(self) -> dict:
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [sorted(self.dimensions)],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit in self.units.items()]
+                }]
+            },
+            **self.dimensions,
+            **self.counters,
+            **self.timers
+        }
+
+
+class collect:
+    """
+    Collects the metrics of one invocation and flushes them when it is done.
+    """
+
+    def __init__(self):
+        self.metrics = Metrics()
+        self._token = None
+
+    def __enter__(self) -> Metrics:
+        self._token = _current_metrics.set(self.metrics)
+        return self.metrics
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_metrics.reset(self._token)
+        emit(self.metrics)
+        return False
+
+
+class timer:
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        record_time(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def increment(name: str, value: float = 1, unit: str = COUNT):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.increment(name, value, unit)
+
+
+def record_time(name: str, milliseconds: float):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_time(name, milliseconds)
+
+
+def set_dimension(name: str, value: str):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.dimensions[name] = value
+
+
+def emit(metrics: Metrics):
+    """
+    EMF lines are parsed by CloudWatch Logs as they are, so they go straight to stdout and not through logging.
+    """
+    if metrics.units:
+        sys.stdout.write(json.dumps(metrics.to_emf()) + "\n")
+
+
+class MeteredPersistenceAdapter(AbstractPersistenceAdapter):
+    def __init__(self, persistence_adapter: AbstractPersistenceAdapter):
+        self.persistence_adapter = persistence_adapter
+
+    def get_attributes(self, request_envelope):
+        increment("storage.reads")
+        with timer("storage.read.latency"):
+            return self.persistence_adapter.get_attributes(request_envelope)
+
+    def save_attributes(self, request_envelope, attributes):
+        increment("storage.writes")
+        with timer("storage.write.latency"):
+            self.persistence_adapter.save_attributes(request_envelope, attributes)
+
+    def delete_attributes(self, request_envelope):
+        increment("storage.deletes")
+        self.persistence_adapter.delete_attributes(request_envelope)
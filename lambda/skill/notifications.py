@@ -0,0 +1,217 @@
+"""
+Proactive notifications about new telegrams, built on the unread dialogs the poller fetches for its digest.
+
+The new messages of a user are coalesced for COALESCE_WINDOW seconds into one notification. A dialog is only announced
+again when it has more unread messages than when the user was last notified, or when it was read in the meantime.
+Notifications are delivered in batches through a sender, by default to the Proactive Events API of Alexa.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import requests
+
+from skill.services import http_client
+
+logger = logging.getLogger(__name__)
+
+# Messages which arrive within this many seconds after the first new one share a notification
+COALESCE_WINDOW = 30
+# Notifications per call of the sender
+BATCH_SIZE = 25
+# Alexa drops notifications the user hasn't heard within this many seconds
+NOTIFICATION_EXPIRY = 3600
+
+
+def new_dialogs(notified_unread: Dict[str, int], unread_dialogs: List[dict]) -> List[dict]:
+    """
+    The unread dialogs with messages the user wasn't notified about, with their number as new_count.
+    """
+    dialogs = []
+    for dialog in unread_dialogs:
+        new_count = dialog["unread_count"] - notified_unread.get(str(dialog["chat_id"]), 0)
+        if new_count > 0:
+            dialogs.append({"name": dialog["name"], "is_group": dialog["is_group"], "chat_id": dialog["chat_id"],
+                            "new_count": new_count})
+    return dialogs
+
+
+class Notification:
+    def __init__(self, key: str, dialogs: List[dict]):
+        # The Alexa user id, which is also the key of the user in the storage
+        self.key = key
+        self.dialogs = dialogs
+
+    @property
+    def new_count(self) -> int:
+        return sum(d["new_count"] for d in self.dialogs)
+
+
+class NotificationPipeline:
+    """
+    Thread safe. The sender is any object with send(notifications) -> one bool per notification, which tells whether
+    it was delivered. Notifications which weren't delivered are offered again with the next refresh of the account.
+    """
+
+    def __init__(self, sender, window: float = COALESCE_WINDOW, batch_size: int = BATCH_SIZE):
+        self.sender = sender
+        self.window = window
+        self.batch_size = batch_size
+        # account -> (time.monotonic() the notification is due, state manager, latest unread dialogs). The account is
+        # the Alexa user id, or any other id when an item holds several accounts, e.g.: of voice profiles. The
+        # notification goes to the Alexa user id of the state manager.
+        self.pending = {}  # type: Dict[Hashable, Tuple[float, object, List[dict]]]
+        self.delivered = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def offer(self, key: Hashable, state_manager, unread_dialogs: List[dict], now: float = None) -> bool:
+        """
+        Called with the unread dialogs of an account after every refresh. Returns whether a notification is pending.
+        """
+        now = now if now is not None else time.monotonic()
+        state = state_manager.state
+        # Dialogs which were read since the last notification can be announced again
+        unread_counts = {str(d["chat_id"]): d["unread_count"] for d in unread_dialogs}
+        notified_unread = {chat_id: min(count, unread_counts[chat_id])
+                           for chat_id, count in state.notified_unread.items() if chat_id in unread_counts}
+        if notified_unread != state.notified_unread:
+            state.notified_unread = notified_unread
+            state_manager.save_notified_unread()
+
+        with self._lock:
+            if not new_dialogs(notified_unread, unread_dialogs):
+                self.pending.pop(key, None)
+                return False
+            due = self.pending[key][0] if key in self.pending else now + self.window
+            self.pending[key] = (due, state_manager, unread_dialogs)
+        return True
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return min((due for due, _, _ in self.pending.values()), default=None)
+
+    def flush_due(self, now: float = None) -> int:
+        """
+        Delivers the notifications whose window is over. Returns how many were delivered.
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            keys = [key for key, (due, _, _) in self.pending.items() if due <= now]
+            due = [(key,) + self.pending.pop(key)[1:] for key in keys]
+
+        delivered = 0
+        for idx in range(0, len(due), self.batch_size):
+            batch = due[idx:idx + self.batch_size]
+            notifications = [Notification(state_manager.key, new_dialogs(state_manager.state.notified_unread,
+                                                                         unread_dialogs))
+                             for _, state_manager, unread_dialogs in batch]
+            try:
+                results = self.sender.send(notifications)
+            except Exception:
+                logger.exception("Sending notifications failed")
+                results = [False] * len(batch)
+            for (key, state_manager, unread_dialogs), is_delivered in zip(batch, results):
+                if not is_delivered:
+                    continue
+                state_manager.state.notified_unread = {str(d["chat_id"]): d["unread_count"] for d in unread_dialogs}
+                state_manager.save_notified_unread()
+                delivered += 1
+        with self._lock:
+            self.delivered += delivered
+            self.failed += len(due) - delivered
+        if due:
+            logger.info("Notifications sent", extra={"delivered": delivered, "failed": len(due) - delivered})
+        return delivered
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + "{:03d}Z".format(moment.microsecond // 1000)
+
+
+def build_event(notification: Notification, now: datetime = None) -> dict:
+    """
+    An AMAZON.MessageAlert.Activated event for the user, e.g.: Alexa says "You have 3 new messages from Anna".
+    """
+    now = now or datetime.now(timezone.utc)
+    return {
+        "timestamp": _iso(now),
+        "referenceId": str(uuid.uuid4()),
+        "expiryTime": _iso(now + timedelta(seconds=NOTIFICATION_EXPIRY)),
+        "event": {
+            "name": "AMAZON.MessageAlert.Activated",
+            "payload": {
+                "state": {"status": "UNREAD", "freshness": "NEW"},
+                "messageGroup": {
+                    "creator": {"name": ", ".join(d["name"] for d in notification.dialogs[:3])},
+                    "count": notification.new_count
+                }
+            }
+        },
+        "relevantAudience": {"type": "Unicast", "payload": {"user": notification.key}}
+    }
+
+
+class ProactiveEventsSender:
+    """
+    Sends the notifications of a batch concurrently on the http worker pool. Authenticates with the client id and
+    secret of the skill, from the Alexa developer console.
+    """
+    ENDPOINT = "proactive_events"
+    TOKEN_ENDPOINT = "lwa_token"
+
+    def __init__(self, client_id: str, client_secret: str, api_endpoint: str = "https://api.amazonalexa.com",
+                 token_url: str = "https://api.amazon.com/auth/o2/token", development: bool = False):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.events_url = api_endpoint + ("/v1/proactiveEvents/stages/development" if development
+                                          else "/v1/proactiveEvents")
+        self._access_token = None  # type: Optional[str]
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['ProactiveEventsSender']:
+        """
+        From ALEXA_CLIENT_ID and ALEXA_CLIENT_SECRET. ALEXA_EVENTS_STAGE=development sends to the development stage.
+        """
+        client_id = os.environ.get("ALEXA_CLIENT_ID")
+        client_secret = os.environ.get("ALEXA_CLIENT_SECRET")
+        if not client_id or not client_secret:
+            return None
+        return cls(client_id, client_secret, development=os.environ.get("ALEXA_EVENTS_STAGE") == "development")
+
+    def access_token(self) -> str:
+        with self._lock:
+            if self._access_token is None or time.monotonic() >= self._expires_at:
+                r = http_client.post(self.token_url, headers={}, json=None, endpoint=self.TOKEN_ENDPOINT, data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "scope": "alexa::proactive_events"
+                })
+                r.raise_for_status()
+                token = r.json()
+                self._access_token = token["access_token"]
+                # Renewed a minute early, so no event is sent with an expired token
+                self._expires_at = time.monotonic() + token["expires_in"] - 60
+            return self._access_token
+
+    def send(self, notifications: List[Notification]) -> List[bool]:
+        headers = {"Authorization": "Bearer " + self.access_token()}
+        futures = [http_client.submit(self._send_event, headers, build_event(n)) for n in notifications]
+        return [f.result() for f in futures]
+
+    def _send_event(self, headers: dict, event: dict) -> bool:
+        try:
+            r = http_client.post(self.events_url, headers=headers, json=event, endpoint=self.ENDPOINT)
+        except requests.RequestException:
+            return False
+        if r.status_code != 202:
+            logger.warning("Event rejected", extra={"status": r.status_code, "body": r.text[:200]})
+        return r.status_code == 202
@@ -0,0 +1,231 @@
+"""
+A long-running worker, which keeps the authorized accounts connected to Telegram and an unread digest per user in
+storage. The LaunchRequestHandler answers from a fresh digest without connecting to Telegram. The digest of an account
+which was logged out is cleared. With the client id and secret of the skill in ALEXA_CLIENT_ID and ALEXA_CLIENT_SECRET,
+users are notified about new telegrams as well.
+
+Run from the lambda directory:
+    python -m skill.poller
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+from boto3.dynamodb.types import Binary
+from pyrogram import idle
+from pyrogram.errors import FloodWait, Unauthorized
+
+from skill import digest, log
+from skill.exceptions.all_exceptions import log_exception
+from skill.notifications import NotificationPipeline, ProactiveEventsSender
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.state import State
+from skill.state_manager import PROFILES, get_field_path, get_partition
+from skill.storage import DynamoDbStateStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two refreshes of a digest without new messages, well below digest.DIGEST_MAX_AGE
+REFRESH_INTERVAL = 60
+# Seconds between two scans of the storage for accounts which completed the setup in the meantime
+RESCAN_INTERVAL = 300
+# A burst of new messages of one account shares one refresh
+DEBOUNCE_SECONDS = 2.0
+
+# The key of the item and the person id of the first voice profile of a Telegram session, None for the top-level state
+Account = Tuple[str, Optional[str]]
+
+
+def get_sessions(attributes: dict) -> List[Tuple[List[Optional[str]], dict]]:
+    """
+    The partitions of an item with a linked Telegram account, see skill.state_manager, as person ids and the state of
+    the first of them. Partitions with the same Telegram session, e.g.: a voice profile which adopted the state of the
+    household, share one connection.
+    """
+    sessions = {}  # type: Dict[Optional[bytes], Tuple[List[Optional[str]], dict]]
+    for person_id in [None] + sorted(attributes.get(PROFILES, {})):
+        partition = get_partition(attributes, person_id)
+        if not partition.get("user_id"):
+            continue
+        auth_key = partition.get("auth_key")
+        if isinstance(auth_key, Binary):
+            auth_key = auth_key.value
+        sessions.setdefault(auth_key, ([], partition))[0].append(person_id)
+    return list(sessions.values())
+
+
+class PollerStateManager:
+    """
+    The StateManager of an account in the poller. Only the fields Pyrogram and the poller own are written, to every
+    partition of the item with the account: the top-level state and the voice profiles in person_ids.
+    """
+    TELEGRAM_FIELDS = ("dc_id", "auth_key", "test_mode", "user_id", "is_bot", "peers")
+
+    def __init__(self, store, key: str, attributes: dict, person_ids: List[Optional[str]] = None):
+        self.store = store
+        self.key = key
+        self.person_ids = person_ids or [None]
+        self.state = State(pytz.utc, attributes)
+
+    def _update(self, fields: dict):
+        self.store.update_attributes(self.key, {get_field_path(person_id, name): value
+                                                for person_id in self.person_ids for name, value in fields.items()})
+
+    def save_to_database(self, optional: bool = False):
+        data = self.state.to_dict()
+        self._update({name: data[name] for name in self.TELEGRAM_FIELDS})
+
+    def save_digest(self, unread_dialogs: List[dict]):
+        self.state.unread_digest = digest.build_digest(unread_dialogs)
+        self._update({"unread_digest": self.state.unread_digest})
+
+    def clear_digest(self):
+        self.state.unread_digest = None
+        self._update({"unread_digest": None})
+
+    def save_notified_unread(self):
+        self._update({"notified_unread": self.state.notified_unread})
+
+
+class DigestPoller:
+    """
+    Refreshes the digest of an account shortly after a new message and every REFRESH_INTERVAL, to notice read
+    dialogs as well. Accounts in a FloodWait aren't refreshed until it is over. The unread dialogs of every refresh
+    are offered to the notification pipeline, if there is one.
+    """
+
+    def __init__(self, store, notifications: Optional[NotificationPipeline] = None):
+        self.store = store
+        self.notifications = notifications
+        self.accounts = {}  # type: Dict[Account, Tuple[PyrogramManager, PollerStateManager]]
+        # account -> time.monotonic() of the next refresh
+        self.due = {}  # type: Dict[Account, float]
+        self.flood_wait_until = {}  # type: Dict[Account, float]
+        # account -> auth key of a logged out account, which isn't connected again until its setup is completed anew
+        self.logged_out = {}  # type: Dict[Account, Optional[bytes]]
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+
+    def connect_accounts(self) -> int:
+        """
+        Connects the authorized accounts of the storage, which aren't connected yet, of the households and of their voice
+        profiles. Returns how many.
+        """
+        connected = 0
+        for key, attributes in self.store.scan():
+            for person_ids, partition in get_sessions(attributes):
+                account = (key, person_ids[0])
+                if account in self.accounts:
+                    # Voice profiles which adopted the session since
+                    self.accounts[account][1].person_ids = person_ids
+                    continue
+                state_manager = PollerStateManager(self.store, key, partition, person_ids)
+                if account in self.logged_out and self.logged_out[account] == state_manager.state.auth_key:
+                    continue
+                try:
+                    pyrogram_manager = PyrogramManager(state_manager)
+                    if not pyrogram_manager.get_is_authorized():
+                        pyrogram_manager.disconnect()
+                        continue
+                    pyrogram_manager.add_new_message_handler(
+                        lambda message, account=account: self.schedule(account, DEBOUNCE_SECONDS))
+                except Exception as e:
+                    log_exception(e)
+                    continue
+                self.accounts[account] = (pyrogram_manager, state_manager)
+                self.schedule(account, 0)
+                connected += 1
+        logger.info("Connected accounts", extra={"new": connected, "total": len(self.accounts)})
+        return connected
+
+    def schedule(self, account: Account, delay: float):
+        """
+        Refreshes the digest in delay seconds at the latest.
+        """
+        with self.lock:
+            due = max(time.monotonic() + delay, self.flood_wait_until.get(account, 0.0))
+            self.due[account] = min(self.due.get(account, due), due)
+        self.wakeup.set()
+
+    def refresh_due(self, now: float = None) -> int:
+        now = now if now is not None else time.monotonic()
+        with self.lock:
+            accounts = [account for account, due in self.due.items() if due <= now]
+            for account in accounts:
+                self.due[account] = now + REFRESH_INTERVAL
+        for account in accounts:
+            self.refresh(account)
+        return len(accounts)
+
+    def refresh(self, account: Account):
+        pyrogram_manager, state_manager = self.accounts[account]
+        try:
+            unread_dialogs = pyrogram_manager.get_unread_dialogs()
+            state_manager.save_digest(unread_dialogs)
+            if self.notifications is not None:
+                self.notifications.offer(account, state_manager, unread_dialogs)
+        except FloodWait as e:
+            with self.lock:
+                self.flood_wait_until[account] = time.monotonic() + e.x
+                self.due[account] = self.flood_wait_until[account]
+        except Unauthorized:
+            # E.g.: the session was terminated in the Telegram settings. The skill must not answer from the digest.
+            logger.info("Account logged out")
+            self.disconnect_account(account)
+            state_manager.clear_digest()
+        except Exception as e:
+            log_exception(e)
+
+    def disconnect_account(self, account: Account):
+        pyrogram_manager, state_manager = self.accounts.pop(account)
+        with self.lock:
+            self.due.pop(account, None)
+            self.flood_wait_until.pop(account, None)
+        self.logged_out[account] = state_manager.state.auth_key
+        try:
+            pyrogram_manager.disconnect()
+        except Exception as e:
+            log_exception(e)
+
+    def run(self):
+        next_scan = 0.0
+        while not self.stopped.is_set():
+            if time.monotonic() >= next_scan:
+                self.connect_accounts()
+                next_scan = time.monotonic() + RESCAN_INTERVAL
+            self.refresh_due()
+            next_notification = None
+            if self.notifications is not None:
+                self.notifications.flush_due()
+                next_notification = self.notifications.next_due()
+            with self.lock:
+                next_due = min([next_scan] + list(self.due.values()) + [next_notification or next_scan])
+            self.wakeup.wait(timeout=max(0.0, next_due - time.monotonic()))
+            self.wakeup.clear()
+        for pyrogram_manager, _ in self.accounts.values():
+            pyrogram_manager.disconnect()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+
+def main():
+    log.configure()
+    sender = ProactiveEventsSender.from_env()
+    poller = DigestPoller(DynamoDbStateStore(), NotificationPipeline(sender) if sender is not None else None)
+    thread = threading.Thread(target=poller.run, name="digest-poller")
+    # Pyrogram handles the updates of all clients on the event loop of the main thread. The poller thread can only
+    # use the clients while that loop runs.
+    asyncio.get_event_loop().call_soon(thread.start)
+    idle()
+    poller.stop()
+    thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Hosts many authorized Telegram clients on one asyncio event loop, e.g.: for the poller or a server mode, where one
+client per Lambda invocation doesn't scale.
+"""
+import asyncio
+import logging
+import os
+import pickle
+import statistics
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from pyrogram import Client
+
+from secrets import API_ID, API_HASH
+from skill import metrics
+from skill.exceptions.all_exceptions import log_exception
+from skill.pyrogram import media
+from skill.pyrogram.pyrogram_manager import DynamoDBStorage
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+class HostedClient:
+    def __init__(self, key: str, client, state_manager):
+        self.key = key
+        self.client = client
+        self.state_manager = state_manager
+        self.connect_ms = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self._memory_bytes = 0
+        self._memory_fingerprint = None
+
+    def memory_bytes(self) -> int:
+        """
+        Estimate of what the client keeps besides its connection: the session state, which grows with the peer cache.
+        Pickling the state is costly, so it is only measured again when the state changed: a new state, more peers or
+        a new digest.
+        """
+        state = self.state_manager.state
+        fingerprint = (id(state), len(state.peers), id(state.unread_digest), len(state.notified_unread))
+        if fingerprint != self._memory_fingerprint:
+            self._memory_bytes = len(pickle.dumps(state.to_dict()))
+            self._memory_fingerprint = fingerprint
+        return self._memory_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "key": self.key,
+            "connect_ms": round(self.connect_ms, 3),
+            "memory_bytes": self.memory_bytes(),
+            "calls": self.calls,
+            "errors": self.errors,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1)
+        }
+
+
+class ClientHost:
+    """
+    Connections are limited by a semaphore shared by all clients and started in staggered batches, so a restart
+    doesn't connect hundreds of clients at once. When there are more than max_clients, the least recently used idle
+    clients are disconnected. So are clients which exceed their memory_budget, they get a fresh state on reconnect.
+    Create it on the event loop it is used on.
+    """
+    # Tests and benchmarks replace it with a local fake of the Telegram API
+    client_class = Client
+
+    def __init__(self, max_clients: int = 500, max_connecting: int = 20, batch_size: int = 20,
+                 batch_interval: float = 1.0, memory_budget: int = MIB, idle_seconds: float = 600):
+        self.max_clients = max_clients
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.memory_budget = memory_budget
+        self.idle_seconds = idle_seconds
+        self.clients = OrderedDict()  # type: OrderedDict[str, HostedClient]
+        self.connecting = asyncio.Semaphore(max_connecting)
+        self.evictions = 0
+        self.connect_errors = 0
+        self.rss_baseline = rss_bytes()
+
+    async def start(self, accounts: Iterable[Tuple[str, object]]):
+        """
+        Connects the accounts, (key, state manager) pairs, batch_size at a time with batch_interval in between.
+        """
+        accounts = list(accounts)
+        for idx in range(0, len(accounts), self.batch_size):
+            if idx:
+                await asyncio.sleep(self.batch_interval)
+            batch = accounts[idx:idx + self.batch_size]
+            await asyncio.gather(*[self._connect(key, state_manager) for key, state_manager in batch])
+            await self._evict()
+        logger.info("Clients started", extra=self.aggregate_stats())
+
+    @asynccontextmanager
+    async def use(self, key: str, state_manager=None) -> AsyncIterator:
+        """
+        The connected client of the account. Not hosted accounts are connected first, which needs their state manager.
+        """
+        hosted = self.clients.get(key)
+        is_new = hosted is None
+        if is_new:
+            if state_manager is None:
+                raise KeyError(key)
+            hosted = await self._connect(key, state_manager)
+            if hosted is None:
+                raise ConnectionError("Can't connect {}".format(key))
+        self.clients.move_to_end(key)
+        hosted.in_use += 1
+        hosted.calls += 1
+        try:
+            if is_new:
+                await self._evict()
+            yield hosted.client
+        except Exception:
+            hosted.errors += 1
+            raise
+        finally:
+            hosted.in_use -= 1
+            hosted.last_used = time.monotonic()
+        if not hosted.in_use and hosted.memory_bytes() > self.memory_budget:
+            await self._disconnect(hosted)
+            self.evictions += 1
+
+    async def evict_idle(self) -> int:
+        """
+        Disconnects the clients which weren't used for idle_seconds or exceed their memory budget.
+        """
+        now = time.monotonic()
+        idle = [h for h in self.clients.values() if not h.in_use and (now - h.last_used > self.idle_seconds
+                                                                       or h.memory_bytes() > self.memory_budget)]
+        for hosted in idle:
+            await self._disconnect(hosted)
+        self.evictions += len(idle)
+        return len(idle)
+
+    async def close(self):
+        for hosted in list(self.clients.values()):
+            await self._disconnect(hosted)
+
+    def client_stats(self) -> List[dict]:
+        return [h.to_dict() for h in self.clients.values()]
+
+    def aggregate_stats(self) -> dict:
+        connect_ms = [h.connect_ms for h in self.clients.values()]
+        rss = rss_bytes()
+        return {
+            "clients": len(self.clients),
+            "in_use": sum(1 for h in self.clients.values() if h.in_use),
+            "evictions": self.evictions,
+            "connect_errors": self.connect_errors,
+            "connect_p50_ms": round(statistics.median(connect_ms), 3) if connect_ms else 0.0,
+            "connect_max_ms": round(max(connect_ms, default=0.0), 3),
+            "rss_bytes": rss,
+            "memory_per_client_bytes": (rss - self.rss_baseline) // len(self.clients) if self.clients else 0
+        }
+
+    def publish_metrics(self):
+        """
+        Writes the aggregate stats as one EMF line, like the metrics of an invocation.
+        """
+        with metrics.collect():
+            metrics.set_dimension("Handler", "ClientHost")
+            for name, value in self.aggregate_stats().items():
+                metrics.increment("host." + name, value, metrics.BYTES if name.endswith("bytes") else metrics.COUNT)
+
+    async def _connect(self, key: str, state_manager) -> Optional[HostedClient]:
+        client = media.block_file_transfers(self.client_class(DynamoDBStorage(key, state_manager), API_ID, API_HASH))
+        async with self.connecting:
+            start = time.perf_counter()
+            try:
+                is_authorized = await client.connect()
+            except Exception as e:
+                log_exception(e)
+                self.connect_errors += 1
+                return None
+        if not is_authorized:
+            await client.disconnect()
+            return None
+        hosted = HostedClient(key, client, state_manager)
+        hosted.connect_ms = (time.perf_counter() - start) * 1000
+        self.clients[key] = hosted
+        return hosted
+
+    async def _evict(self):
+        """
+        Disconnects least recently used idle clients, while there are too many.
+        """
+        for hosted in list(self.clients.values()):
+            if len(self.clients) <= self.max_clients:
+                return
+            if not hosted.in_use:
+                await self._disconnect(hosted)
+                self.evictions += 1
+
+    async def _disconnect(self, hosted: HostedClient):
+        self.clients.pop(hosted.key, None)
+        try:
+            await hosted.client.disconnect()
+        except Exception as e:
+            log_exception(e)
@@ -0,0 +1,58 @@
+"""
+Describes media telegrams from the attributes of the message get_history already returned: the type, the duration,
+the file name, the title and performer of audio files, the emoji of stickers and the caption. Nothing is downloaded.
+Files can be large and slow, so the clients of the skill can't transfer files at all, see block_file_transfers.
+"""
+from typing import Optional
+
+from skill import metrics
+from skill.pyrogram import text_normalizer
+
+# The media types with a description, in the order pyrogram documents them. Other media, e.g.: locations or polls,
+# are a plain media file.
+MEDIA_TYPES = ("photo", "video", "voice", "audio", "document", "sticker", "animation", "video_note")
+# Client methods which download or upload files
+FILE_TRANSFER_METHODS = ("download_media", "handle_download", "get_file", "save_file")
+
+
+class FileTransferBlocked(Exception):
+    """
+    A file transfer was started by a client of the skill.
+    """
+
+
+def describe_media(message) -> Optional[dict]:
+    """
+    The description of a media telegram, e.g.: {"type": "voice", "duration": 12}, or None for other media. Only
+    the attributes a media type has are set.
+    """
+    media_type = next((t for t in MEDIA_TYPES if getattr(message, t, None) is not None), None)
+    if media_type is None:
+        return None
+    media = getattr(message, media_type)
+    description = {"type": media_type}
+    for name in ("duration", "file_name", "title", "performer", "emoji"):
+        value = getattr(media, name, None)
+        if value:
+            description[name] = value
+    caption = text_normalizer.normalize(message.caption) if message.caption else None
+    if caption and caption not in (text_normalizer.EMOJI_KEY, text_normalizer.CODE_KEY):
+        description["caption"] = caption
+    return description
+
+
+def _blocked(method: str):
+    def blocked(*args, **kwargs):
+        metrics.increment("telegram.file_transfer.blocked")
+        raise FileTransferBlocked("{} isn't allowed, media is described from its metadata".format(method))
+
+    return blocked
+
+
+def block_file_transfers(client):
+    """
+    Replaces the file transfer methods of a client, so no handler, e.g.: through Message.download, can start one.
+    """
+    for method in FILE_TRANSFER_METHODS:
+        setattr(client, method, _blocked(method))
+    return client
@@ -1,40 +1,58 @@
-from typing import List, Tuple, Union, Coroutine, Any
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Tuple, Union, Coroutine, Any, Callable, Optional, Hashable, TypeVar
 
 from pyrogram import Client
+from pyrogram.handlers import MessageHandler
 from pyrogram.storage import Storage
 from pyrogram.storage.sqlite_storage import get_input_peer
 from pyrogram.types import Message
 
 from secrets import API_ID, API_HASH
+from skill import metrics, tracing
+from skill.deadline import Deadline, get_deadline
+from skill.pyrogram import media, text_normalizer
+from skill.pyrogram.ranking import rank_dialogs
+from skill.pyrogram.rate_limiter import RateLimited, RateLimiter
 from skill.state_manager import StateManager
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 
 class DynamoDBStorage(Storage):
 
     def __init__(self, name: str, state_manager: StateManager):
         super().__init__(name)
         self.state_manager = state_manager
-        self.state = state_manager.state
+
+    @property
+    def state(self):
+        # Follows the state manager, so a cached client is handed to the next request with a single assignment
+        return self.state_manager.state
 
     async def open(self):
-        print('DynamoDBStorage OPEN')
+        logger.debug('DynamoDBStorage OPEN')
         pass
 
     async def save(self):
-        print('DynamoDBStorage SAVE')
+        logger.debug('DynamoDBStorage SAVE')
         self.state_manager.save_to_database()
 
     async def close(self):
-        print('DynamoDBStorage CLOSE')
+        logger.debug('DynamoDBStorage CLOSE')
 
     async def delete(self):
-        print('DynamoDBStorage DELETE')
+        logger.debug('DynamoDBStorage DELETE')
 
     async def update_peers(self, peers: List[Tuple[int, int, str, str, str]]):
         """
         peers: id, access_hash, type, username, phone_number
         """
-        print('DynamoDBStorage update_peers')
+        logger.debug('DynamoDBStorage update_peers')
         peer_id_to_index = {p[0]: idx for idx, p in enumerate(self.state.peers)}
 
         for p1 in peers:
@@ -46,7 +64,7 @@ class DynamoDBStorage(Storage):
         self.state_manager.save_to_database()
 
     async def get_peer_by_id(self, peer_id: int):
-        print('DynamoDBStorage get_peer_by_id')
+        logger.debug('DynamoDBStorage get_peer_by_id')
         r = list(filter(lambda p: p[0] == peer_id, self.state.peers))
         if not r:
             raise KeyError(f"ID not found: {peer_id}")
@@ -54,60 +72,144 @@ class DynamoDBStorage(Storage):
         return get_input_peer(*r[:3])
 
     async def get_peer_by_username(self, username: str):
-        print('DynamoDBStorage get_peer_by_username')
+        logger.debug('DynamoDBStorage get_peer_by_username')
 
     async def get_peer_by_phone_number(self, phone_number: str):
-        print('DynamoDBStorage get_peer_by_phone_number')
+        logger.debug('DynamoDBStorage get_peer_by_phone_number')
 
     async def dc_id(self, value: int = object):
-        print('DynamoDBStorage dc_id')
+        logger.debug('DynamoDBStorage dc_id')
         if isinstance(value, int):
             self.state.dc_id = value
             self.state_manager.save_to_database()
         return self.state.dc_id
 
     async def test_mode(self, value: bool = object):
-        print('DynamoDBStorage test_mode')
+        logger.debug('DynamoDBStorage test_mode')
         if isinstance(value, bool):
             self.state.test_mode = value
             self.state_manager.save_to_database()
         return self.state.test_mode
 
     async def auth_key(self, value: bytes = object):
-        print('DynamoDBStorage auth_key')
+        logger.debug('DynamoDBStorage auth_key')
         if isinstance(value, bytes):
             self.state.auth_key = value
             self.state_manager.save_to_database()
         return self.state.auth_key
 
     async def date(self, value: int = object):
-        print('DynamoDBStorage date')
+        logger.debug('DynamoDBStorage date')
         if isinstance(value, int):
             self.state.date = value
             self.state_manager.save_to_database()
         return self.state.date
 
     async def user_id(self, value: int = object):
-        print('DynamoDBStorage user_id')
+        logger.debug('DynamoDBStorage user_id')
         if isinstance(value, int):
             self.state.user_id = value
             self.state_manager.save_to_database()
         return self.state.user_id
 
     async def is_bot(self, value: bool = object):
-        print('DynamoDBStorage is_bot')
+        logger.debug('DynamoDBStorage is_bot')
         if isinstance(value, bool):
             self.state.is_bot = value
             self.state_manager.save_to_database()
         return self.state.is_bot
 
 
+class ClientCache:
+    """
+    Connected clients by Telegram user id, for processes which serve many requests, e.g.: skill.server.
+    The least recently used client is disconnected when there are more than max_size.
+    """
+
+    def __init__(self, max_size: int = 100):
+        self.max_size = max_size
+        self._clients = OrderedDict()  # type: OrderedDict[int, Client]
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Client]:
+        with self._lock:
+            client = self._clients.get(user_id)
+            if client is not None:
+                self._clients.move_to_end(user_id)
+            return client
+
+    def checkout(self, user_id: int, state_manager: StateManager) -> Optional[Client]:
+        """
+        The client of the user, with its storage handed to the state manager of the request which uses it now. The
+        server handles requests concurrently, so this happens under the lock of the cache.
+        """
+        with self._lock:
+            client = self._clients.get(user_id)
+            if client is not None:
+                self._clients.move_to_end(user_id)
+                # The storage still belongs to the request which connected the client
+                client.storage.state_manager = state_manager
+            return client
+
+    def put(self, user_id: int, client: Client):
+        with self._lock:
+            self._clients[user_id] = client
+            evicted = []
+            while len(self._clients) > self.max_size:
+                evicted.append(self._clients.popitem(last=False)[1])
+        for c in evicted:
+            c.disconnect()
+
+    def drop_disconnected(self) -> int:
+        """
+        Forgets the clients which lost their connection, e.g.: while the container was frozen. Returns how many.
+        """
+        with self._lock:
+            disconnected = [user_id for user_id, client in self._clients.items() if not client.is_connected]
+            for user_id in disconnected:
+                del self._clients[user_id]
+        return len(disconnected)
+
+    def __len__(self):
+        return len(self._clients)
+
+
 class PyrogramManager:
     MEDIA_FILE_KEY = 'media_file_key'
+    # Tests and benchmarks replace it with a local fake of the Telegram API
+    client_class = Client
+    # get_unread_dialogs ranks the most recent dialogs, one page of get_dialogs
+    DIALOG_LIMIT = 100
+    # and fetches the histories of the best ranked ones only, the others are announced by name and count
+    HISTORY_LIMIT = 3
+    # Moving average of the duration of a get_history call in this container, in seconds
+    history_seconds = 0.5
+    # Long-lived processes keep the clients of authorized users connected, in Lambda every invocation connects
+    client_cache = None  # type: Optional[ClientCache]
+    # Shared by all users of the process, like the API_ID. Benchmarks which hammer one account turn it off.
+    rate_limiter = RateLimiter()  # type: Optional[RateLimiter]
+
+    def __init__(self, state_manager: StateManager, deadline: Deadline = None):
+        self.deadline = deadline or get_deadline()
+        self.state_manager = state_manager
+        user_id = state_manager.state.user_id
+        cached_client = None
+        if self.client_cache is not None and user_id:
+            cached_client = self.client_cache.checkout(user_id, state_manager)
+        if cached_client is not None:
+            self.client = cached_client
+            self._is_authorized = True
+            metrics.increment("telegram.connect.cached")
+            return
 
-    def __init__(self, state_manager: StateManager):
-        self.client = Client(DynamoDBStorage('my_dynamo_db_storage', state_manager), API_ID, API_HASH)
-        self._is_authorized = self.client.connect()
+        self.client = self.client_class(DynamoDBStorage('my_dynamo_db_storage', state_manager), API_ID, API_HASH)
+        # Media is described from its metadata, a download would take longer than Alexa waits
+        media.block_file_transfers(self.client)
+        metrics.increment("telegram.connect.count")
+        with tracing.span("telegram.connect"):
+            self._is_authorized = self.client.connect()
+        if self._is_authorized and self.client_cache is not None and user_id:
+            self.client_cache.put(user_id, self.client)
 
     def get_is_authorized(self):
         return self._is_authorized
@@ -116,43 +218,115 @@ class PyrogramManager:
         self._is_authorized = value
 
     def send_code(self, phone_number):
-        print('PyrogramManager send_code')
-        result = self.client.send_code(phone_number)
+        logger.debug('PyrogramManager send_code')
+        metrics.increment("telegram.send_code.count")
+        result = self._call('send_code', lambda: self.client.send_code(phone_number), account=phone_number)
         return result.phone_code_hash
 
     def sign_in(self, phone_num, phone_code_hash, code):
-        print('PyrogramManager sign_in')
-        result = self.client.sign_in(phone_num, phone_code_hash, str(code))
+        logger.debug('PyrogramManager sign_in')
+        metrics.increment("telegram.sign_in.count")
+        result = self._call('sign_in', lambda: self.client.sign_in(phone_num, phone_code_hash, str(code)),
+                            account=phone_num)
         return result
 
     def get_unread_dialogs(self) -> List[dict]:
-        all_dialogs = self.client.get_dialogs(limit=3)
-        unread_dialogs = [dialog for dialog in all_dialogs if dialog.unread_messages_count > 0]
+        """
+        The unread dialogs, best ranked first. Histories are fetched for the first HISTORY_LIMIT dialogs only, as long
+        as the deadline and the rate limits allow, so the latency doesn't grow with the number of dialogs. Dialogs
+        without telegrams can be fetched in a later turn with get_unread_telegrams.
+        """
+        metrics.increment("telegram.get_dialogs.count")
+        with tracing.span("telegram.get_dialogs"):
+            all_dialogs = self._call('get_dialogs', lambda: self.client.get_dialogs(limit=self.DIALOG_LIMIT))
+        unread_dialogs = rank_dialogs([dialog for dialog in all_dialogs if dialog.unread_messages_count > 0])
+        metrics.increment("unread.dialogs", len(unread_dialogs))
+        metrics.increment("unread.messages", sum(dialog.unread_messages_count for dialog in unread_dialogs))
+        metrics.increment("unread.dialogs.summarized", max(0, len(unread_dialogs) - self.HISTORY_LIMIT))
         data = []
-        for dialog in unread_dialogs:
-            messages = self.client.get_history(dialog.chat.id, dialog.unread_messages_count)
+        for idx, dialog in enumerate(unread_dialogs):
+            telegrams = None
+            if idx < self.HISTORY_LIMIT and self.can_fetch_history():
+                try:
+                    telegrams = self.get_unread_telegrams(dialog.chat.id, dialog.unread_messages_count)
+                except RateLimited:
+                    metrics.increment("unread.dialogs.pending")
+            elif idx < self.HISTORY_LIMIT:
+                metrics.increment("unread.dialogs.pending")
             data.append(
                 {
                     "name": dialog.chat.first_name if dialog.chat.first_name else dialog.chat.title,
-                    "telegrams": self._get_unread_telegrams(messages),
+                    "telegrams": telegrams,
                     "is_group": True if dialog.chat.type in ['group', 'supergroup', 'channel'] else False,
-                    "chat_id": dialog.chat.id
+                    "chat_id": dialog.chat.id,
+                    "unread_count": dialog.unread_messages_count
                 }
             )
         return data
 
+    def expected_unread_seconds(self) -> float:
+        """
+        Estimate for get_unread_dialogs in the worst case: get_dialogs and a get_history per fetched dialog.
+        """
+        return (1 + self.HISTORY_LIMIT) * PyrogramManager.history_seconds
+
+    def can_fetch_history(self) -> bool:
+        return self.deadline.has_time_for(PyrogramManager.history_seconds)
+
+    def get_unread_telegrams(self, chat_id: Union[str, int], unread_count: int) -> List[Tuple[str, str]]:
+        metrics.increment("telegram.get_history.count")
+        start = time.perf_counter()
+        with tracing.span("telegram.get_history"):
+            messages = self._call('get_history', lambda: self.client.get_history(chat_id, unread_count))
+        PyrogramManager.history_seconds = 0.8 * PyrogramManager.history_seconds + 0.2 * (time.perf_counter() - start)
+        return self._extract_telegrams(messages)
+
     def read_history(self, chat_id: Union[str, int]) -> Coroutine[Any, Any, bool]:
-        return self.client.read_history(chat_id)
+        metrics.increment("telegram.read_history.count")
+        result = self._call('read_history', lambda: self.client.read_history(chat_id))
+        state = self.state_manager.state
+        if state.unread_digest:
+            # The digest still lists this dialog as unread
+            state.unread_digest = None
+            self.state_manager.save_to_database(optional=True)
+        return result
 
-    def _get_unread_telegrams(self, messages: List[Message]) -> List[Tuple[str, str]]:
+    def add_new_message_handler(self, callback: Callable[[Message], None]):
+        """
+        Starts receiving updates. The callback is called with every new message, on a worker thread of pyrogram.
+        """
+        self.client.add_handler(MessageHandler(lambda client, message: callback(message)))
+        self.client.initialize()
+
+    def disconnect(self):
+        if self.client.is_initialized:
+            self.client.terminate()
+        self.client.disconnect()
+
+    def _call(self, method: str, function: Callable[[], T], account: Hashable = None) -> T:
+        """
+        Calls Telegram within the rate limits of the account, by default the Telegram user. Queueing leaves time for
+        the call itself before the deadline.
+        """
+        if self.rate_limiter is None:
+            return function()
+        account = account if account is not None else self.state_manager.state.user_id
+        max_wait = max(0.0, self.deadline.remaining() - PyrogramManager.history_seconds)
+        return self.rate_limiter.call(method, account, function, max_wait)
+
+    def _extract_telegrams(self, messages: List[Message]) -> List[Tuple[Union[str, dict], str]]:
         messages.reverse()
-        telegrams = [self._extract_data(m) for m in messages]
+        normalized = text_normalizer.normalize_messages(messages, account=self.state_manager.state.user_id)
+        telegrams = [self._extract_data(m, text) for m, text in normalized]
         return telegrams
 
-    def _extract_data(self, m: Message) -> Tuple[str, str]:
+    def _extract_data(self, m: Message, text: Optional[str]) -> Tuple[Union[str, dict], str]:
+        """
+        Media telegrams are described by skill.pyrogram.media, media without a description is a MEDIA_FILE_KEY.
+        """
         from_user = m.from_user.first_name if m.from_user else ''
         if m.media:
-            return self.MEDIA_FILE_KEY, from_user
-        if m.text:
-            return m.text, from_user
+            return media.describe_media(m) or self.MEDIA_FILE_KEY, from_user
+        if text:
+            return text, from_user
         return 'Undetected file format.', from_user
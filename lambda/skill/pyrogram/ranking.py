@@ -0,0 +1,40 @@
+"""
+Orders the unread dialogs by what the user most likely wants to hear first. Only what get_dialogs already returns is
+used, so ranking hundreds of dialogs costs no call to Telegram: private chats before groups, pinned dialogs,
+mentions of the user, recent activity and the number of unread messages.
+"""
+import math
+import time
+from typing import List
+
+# Points of a dialog for each signal
+PRIVATE_WEIGHT = 4.0
+PINNED_WEIGHT = 3.0
+MENTION_WEIGHT = 3.0
+# Per doubling of the unread messages
+UNREAD_WEIGHT = 1.0
+# For a message right now, halved every RECENCY_HALF_LIFE seconds
+RECENCY_WEIGHT = 2.0
+RECENCY_HALF_LIFE = 3600
+
+
+def score(dialog, now: float) -> float:
+    points = UNREAD_WEIGHT * math.log2(1 + dialog.unread_messages_count)
+    if dialog.chat.type == 'private':
+        points += PRIVATE_WEIGHT
+    if dialog.is_pinned:
+        points += PINNED_WEIGHT
+    if dialog.unread_mentions_count:
+        points += MENTION_WEIGHT
+    if dialog.top_message is not None and dialog.top_message.date:
+        age = max(0.0, now - dialog.top_message.date)
+        points += RECENCY_WEIGHT * 0.5 ** (age / RECENCY_HALF_LIFE)
+    return points
+
+
+def rank_dialogs(dialogs: List, now: float = None) -> List:
+    """
+    The dialogs by descending score. Dialogs with the same score keep the order of Telegram.
+    """
+    now = now if now is not None else time.time()
+    return sorted(dialogs, key=lambda dialog: score(dialog, now), reverse=True)
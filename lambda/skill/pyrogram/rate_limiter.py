@@ -0,0 +1,152 @@
+"""
+Limits the calls to Telegram per method and account with token buckets. All users share the API_ID of the skill, so a
+burst of launches shouldn't end in FloodWaits. Telegram doesn't publish its limits, instead the rates adapt to the
+FloodWaits it sends: a FloodWait blocks the bucket for its duration and cuts its rate, successful calls restore it.
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from pyrogram.errors import FloodWait
+
+from skill import metrics
+
+T = TypeVar("T")
+
+# method -> calls per second and burst, per account
+METHOD_RATES = {
+    "get_dialogs": (1.0, 5),
+    "get_history": (5.0, 10),
+    "read_history": (2.0, 5),
+    "send_code": (0.05, 2),
+    "sign_in": (0.2, 3),
+}  # type: Dict[str, Tuple[float, int]]
+DEFAULT_RATE = (2.0, 5)
+# Shorter waits are queued, longer ones are answered without calling Telegram
+MAX_QUEUE_SECONDS = 1.0
+# A FloodWait cuts the rate to this share, down to MIN_RATE_SHARE of the configured rate.
+# Every successful call gives back RECOVERY_SHARE of the configured rate.
+BACKOFF_SHARE = 0.5
+MIN_RATE_SHARE = 0.05
+RECOVERY_SHARE = 0.05
+# Buckets which weren't used for this long and are full again are dropped, otherwise the limiter of a long-lived
+# process grows with every account it has seen. A new bucket is full as well, only a rate still reduced by FloodWaits
+# is forgotten. Idle buckets are looked for at most once per IDLE_BUCKET_SECONDS, on a call.
+IDLE_BUCKET_SECONDS = 300
+
+
+class RateLimited(FloodWait):
+    """
+    The call wasn't made, because it would have to wait x seconds. A FloodWait, so callers handle both alike.
+    """
+    MESSAGE = "A wait of {x} seconds is required by the rate limiter"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_seconds(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self):
+        # Goes below zero while calls are queued, later calls queue behind them
+        self.tokens -= 1
+
+    def flood_wait(self, now: float, seconds: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.rate = max(self.configured_rate * MIN_RATE_SHARE, self.rate * BACKOFF_SHARE)
+        # Once the wait is over, only the retry goes through before the reduced rate applies
+        self.tokens = min(self.tokens, 1.0)
+
+    def succeeded(self):
+        self.rate = min(self.configured_rate, self.rate + self.configured_rate * RECOVERY_SHARE)
+
+    def is_idle(self, now: float, idle_seconds: float) -> bool:
+        return (now - self.updated > idle_seconds and now >= self.blocked_until
+                and self.tokens + (now - self.updated) * self.rate >= self.burst)
+
+
+class RateLimiter:
+    """
+    Thread safe, one instance is shared by all users of a process.
+    """
+
+    def __init__(self, rates: Dict[str, Tuple[float, int]] = None, default_rate: Tuple[float, int] = DEFAULT_RATE,
+                 max_queue_seconds: float = MAX_QUEUE_SECONDS, idle_seconds: float = IDLE_BUCKET_SECONDS):
+        self.rates = METHOD_RATES if rates is None else rates
+        self.default_rate = default_rate
+        self.max_queue_seconds = max_queue_seconds
+        self.idle_seconds = idle_seconds
+        self.buckets = {}  # type: Dict[Tuple[str, Hashable], TokenBucket]
+        self._next_eviction = time.monotonic() + idle_seconds
+        self._lock = threading.Lock()
+
+    def _bucket(self, method: str, account: Hashable) -> TokenBucket:
+        bucket = self.buckets.get((method, account))
+        if bucket is None:
+            bucket = self.buckets[(method, account)] = TokenBucket(*self.rates.get(method, self.default_rate))
+        return bucket
+
+    def _evict_idle(self, now: float):
+        idle = [key for key, bucket in self.buckets.items() if bucket.is_idle(now, self.idle_seconds)]
+        for key in idle:
+            del self.buckets[key]
+        self._next_eviction = now + self.idle_seconds
+        metrics.increment("telegram.rate_limit.buckets_evicted", len(idle))
+
+    def acquire(self, method: str, account: Hashable, max_wait: Optional[float] = None) -> float:
+        """
+        Waits until the call can be made and returns the seconds waited. Raises RateLimited instead, if that takes
+        longer than max_wait or max_queue_seconds.
+        """
+        max_wait = self.max_queue_seconds if max_wait is None else min(max_wait, self.max_queue_seconds)
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_eviction:
+                self._evict_idle(now)
+            bucket = self._bucket(method, account)
+            wait = bucket.wait_seconds(now)
+            if wait > max_wait:
+                metrics.increment("telegram.rate_limited.count")
+                raise RateLimited(x=math.ceil(wait))
+            bucket.take()
+        if wait > 0:
+            metrics.increment("telegram.rate_limit.queued")
+            metrics.increment("telegram.rate_limit.wait_ms", wait * 1000, metrics.MILLISECONDS)
+            time.sleep(wait)
+        return wait
+
+    def flood_wait(self, method: str, account: Hashable, seconds: float):
+        metrics.increment("telegram.flood_wait.count")
+        with self._lock:
+            self._bucket(method, account).flood_wait(time.monotonic(), seconds)
+
+    def succeeded(self, method: str, account: Hashable):
+        with self._lock:
+            self._bucket(method, account).succeeded()
+
+    def call(self, method: str, account: Hashable, function: Callable[[], T], max_wait: Optional[float] = None) -> T:
+        """
+        Makes the call within the limits. After a FloodWait short enough to be queued, the call is retried once.
+        """
+        for attempt in range(2):
+            self.acquire(method, account, max_wait)
+            try:
+                result = function()
+            except FloodWait as e:
+                self.flood_wait(method, account, e.x)
+                if attempt:
+                    raise RateLimited(x=e.x) from e
+                continue
+            self.succeeded(method, account)
+            return result
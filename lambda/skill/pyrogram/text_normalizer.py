@@ -0,0 +1,94 @@
+"""
+Turns the text of telegrams into text Alexa can read out: links become their domain, markdown and code blocks are
+removed, emoji are dropped and long telegrams are cut. Escaping for SSML is left to Speech.add_text, because the
+normalized text is stored in the digest and the session as plain text and shown on the card as well.
+
+Telegrams without anything left to read out become EMOJI_KEY or CODE_KEY, like PyrogramManager.MEDIA_FILE_KEY.
+Cut telegrams end with TRUNCATION_MARK, the MessageIntent says that the telegram continues.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Iterator, Optional, Tuple
+
+EMOJI_KEY = 'emoji_key'
+CODE_KEY = 'code_key'
+TRUNCATION_MARK = '…'
+# Characters, about 20 seconds of speech
+MAX_LENGTH = 300
+CACHE_SIZE = 4096
+
+_CODE_BLOCK = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_INLINE_CODE = re.compile(r"`([^`\n]+)`")
+_MARKDOWN_LINK = re.compile(r"\[([^\]\n]+)\]\((?:[^)\s]+)\)")
+_MARKDOWN_EMPHASIS = re.compile(r"(?<!\w)(\*\*|__|~~|\*|_)(?=\S)(.+?)(?<=\S)\1(?!\w)")
+# Punctuation after a link belongs to the sentence
+_URL = re.compile(r"\b(?:https?://|www\.)(?:www\.)?([^\s/:?#]+?)(?:[/:?#]\S*?)?(?=[.,;:!?)]*(?:\s|$))",
+                  re.IGNORECASE)
+_EMOJI = re.compile("["
+                    "\U0001F000-\U0001FAFF"  # pictographs, emoticons, flags and skin tones
+                    "\u2600-\u27BF"  # symbols and dingbats
+                    "\u2B00-\u2BFF"  # arrows, stars and squares
+                    "\u200D\uFE0E\uFE0F\u20E3"  # joiners, variation selectors and keycaps
+                    "]+")
+_WHITESPACE = re.compile(r"\s+")
+
+_cache = OrderedDict()  # type: OrderedDict
+_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    # Code is dropped before the links, a link in a code block isn't read out either
+    had_code = '```' in text
+    if had_code:
+        text = _CODE_BLOCK.sub(' ', text)
+    if '`' in text:
+        text = _INLINE_CODE.sub(r'\1', text)
+    if '](' in text:
+        text = _MARKDOWN_LINK.sub(r'\1', text)
+    if '://' in text or 'www.' in text or 'WWW.' in text:
+        text = _URL.sub(r'\1', text)
+    if '*' in text or '_' in text or '~' in text:
+        text = _MARKDOWN_EMPHASIS.sub(r'\2', text)
+    emoji_runs = 0
+    if not text.isascii():
+        text, emoji_runs = _EMOJI.subn(' ', text)
+        # The truncation mark must stay unambiguous
+        text = text.replace(TRUNCATION_MARK, '...')
+    text = _WHITESPACE.sub(' ', text).strip()
+    if not text and (had_code or emoji_runs):
+        return CODE_KEY if had_code else EMOJI_KEY
+    if len(text) > MAX_LENGTH:
+        cut = text.rfind(' ', 0, MAX_LENGTH)
+        text = text[:cut if cut > 0 else MAX_LENGTH].rstrip('.,;:!? ') + TRUNCATION_MARK
+    return text
+
+
+def normalize_cached(key: Hashable, text: str) -> str:
+    """
+    The same telegram is read out from the digest, notified about and fetched again in the next turn. The text is
+    compared as well, edited telegrams are normalized again.
+    """
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == text:
+            _cache.move_to_end(key)
+            return entry[1]
+    normalized = normalize(text)
+    with _lock:
+        _cache[key] = (text, normalized)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return normalized
+
+
+def normalize_messages(messages: Iterable, account: Hashable = None) -> Iterator[Tuple[object, Optional[str]]]:
+    """
+    Yields every message with its normalized text, None for messages without text. Cached per account, chat and
+    message: ids of messages in private chats are only unique within the account.
+    """
+    for message in messages:
+        if not message.text:
+            yield message, None
+            continue
+        yield message, normalize_cached((account, message.chat.id, message.message_id), message.text)
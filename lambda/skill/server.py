@@ -0,0 +1,232 @@
+"""
+Serves the skill over HTTP from a long-lived process, as an alternative to Lambda. Requests run the same
+lambda_handler, so the skill builder, tracing and metrics are the same. Unlike in Lambda, the connected Telegram
+clients and the persistent attributes stay cached across requests.
+
+Run from the lambda directory:
+    python -m skill.server --port 8080
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from ask_sdk_core.attributes_manager import AbstractPersistenceAdapter
+
+from skill import log
+from skill.pyrogram.pyrogram_manager import ClientCache, PyrogramManager
+from skill.storage import set_attributes
+from skill.telegram_connect import lambda_handler, sb
+
+logger = logging.getLogger(__name__)
+
+# Alexa requests are a few KiB, anything much bigger is not from Alexa
+MAX_BODY_BYTES = 256 * 1024
+# Persistent attributes are cached this long. The digest poller writes to DynamoDB directly, so it must be short.
+# Saves write only the changed attributes, so a stale copy is never written back over the writes of the poller.
+STATE_CACHE_TTL = 30
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class VerificationError(Exception):
+    pass
+
+
+class AskSignatureVerifier:
+    """
+    Verifies the signature and the timestamp of requests, like Alexa requires from skills outside of Lambda.
+    Needs the ask-sdk-webservice-support package.
+    """
+
+    def __init__(self):
+        from ask_sdk_webservice_support.verifier import RequestVerifier, TimestampVerifier
+        self.verifiers = [RequestVerifier(), TimestampVerifier()]
+
+    def verify(self, headers: Dict[str, str], body: bytes, event: dict):
+        from ask_sdk_core.serialize import DefaultSerializer
+        from ask_sdk_model import RequestEnvelope
+        from ask_sdk_webservice_support.verifier import VerificationException
+
+        request_envelope = DefaultSerializer().deserialize(body.decode("utf-8"), RequestEnvelope)
+        try:
+            for verifier in self.verifiers:
+                verifier.verify(headers=headers, serialized_request_env=body.decode("utf-8"),
+                                deserialized_request_env=request_envelope)
+        except VerificationException as e:
+            raise VerificationError(str(e)) from e
+
+
+class NoVerification:
+    """
+    Accepts every request, only for local load tests.
+    """
+
+    def verify(self, headers: Dict[str, str], body: bytes, event: dict):
+        pass
+
+
+class CachedPersistenceAdapter(AbstractPersistenceAdapter):
+    """
+    Keeps the attributes of recent users for STATE_CACHE_TTL seconds. Writes go through to the wrapped adapter. Like
+    the adapter, which sets the given attributes only, they are merged into the cached copy.
+    """
+
+    def __init__(self, persistence_adapter: AbstractPersistenceAdapter, ttl: float = STATE_CACHE_TTL):
+        self.persistence_adapter = persistence_adapter
+        self.ttl = ttl
+        self._cache = {}  # type: Dict[str, Tuple[float, Dict]]
+        self._lock = threading.Lock()
+
+    def _key(self, request_envelope) -> str:
+        return request_envelope.context.system.user.user_id
+
+    def get_attributes(self, request_envelope) -> Dict:
+        key = self._key(request_envelope)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return copy.deepcopy(entry[1])
+        attributes = self.persistence_adapter.get_attributes(request_envelope)
+        with self._lock:
+            self._cache[key] = (time.monotonic(), copy.deepcopy(attributes))
+        return attributes
+
+    def save_attributes(self, request_envelope, attributes: Dict):
+        self.persistence_adapter.save_attributes(request_envelope, attributes)
+        key = self._key(request_envelope)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                # The cached copy keeps its age, other attributes can be as stale as it is
+                set_attributes(entry[1], copy.deepcopy(attributes))
+
+    def delete_attributes(self, request_envelope):
+        self.persistence_adapter.delete_attributes(request_envelope)
+        with self._lock:
+            self._cache.pop(self._key(request_envelope), None)
+
+
+class SkillServer:
+    """
+    A minimal HTTP/1.1 server on asyncio streams with keep-alive. The skill runs on a thread pool, because its
+    handlers block on Telegram and DynamoDB.
+    """
+
+    def __init__(self, verifier, workers: int = 8):
+        self.verifier = verifier
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="skill")
+        self.server = None  # type: Optional[asyncio.AbstractServer]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip()] = value.strip()
+                lower_headers = {name.lower(): value for name, value in headers.items()}
+
+                content_length = int(lower_headers.get("content-length", 0))
+                if content_length > MAX_BODY_BYTES:
+                    self._write(writer, 413, {}, keep_alive=False)
+                    break
+                body = await reader.readexactly(content_length)
+                status, payload = await self._dispatch(method, path, headers, body)
+
+                keep_alive = version == "HTTP/1.1" and lower_headers.get("connection", "").lower() != "close"
+                self._write(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Clients which hang up or send garbage
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, dict]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path != "/":
+            return 404, {}
+        if method != "POST":
+            return 405, {}
+        try:
+            event = json.loads(body)
+            self.verifier.verify(headers, body, event)
+        except (ValueError, VerificationError) as e:
+            logger.warning("Rejected request: %s", e)
+            return 400, {}
+        try:
+            response = await asyncio.get_event_loop().run_in_executor(self.executor, lambda_handler, event, None)
+        except Exception:
+            logger.exception("Skill failed")
+            return 500, {}
+        return 200, response
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8")
+        head = "HTTP/1.1 {} {}\r\nContent-Type: application/json;charset=UTF-8\r\nContent-Length: {}\r\n" \
+               "Connection: {}\r\n\r\n".format(status, REASONS.get(status, ""), len(body),
+                                               "keep-alive" if keep_alive else "close")
+        writer.write(head.encode("latin-1") + body)
+
+
+def enable_caches(max_clients: int = 100):
+    """
+    Keeps Telegram clients connected and persistent attributes cached across requests.
+    """
+    PyrogramManager.client_cache = ClientCache(max_clients)
+    sb.persistence_adapter = CachedPersistenceAdapter(sb.persistence_adapter)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="requests the skill handles at the same time")
+    parser.add_argument("--max-clients", type=int, default=100, help="Telegram clients kept connected")
+    parser.add_argument("--no-verify", action="store_true", help="accept unsigned requests, for local load tests")
+    args = parser.parse_args()
+
+    log.configure()
+    enable_caches(args.max_clients)
+    server = SkillServer(NoVerification() if args.no_verify else AskSignatureVerifier(), args.workers)
+    # Pyrogram runs the clients on the event loop of the main thread, the skill uses them from its worker threads
+    loop = asyncio.get_event_loop()
+    port = loop.run_until_complete(server.start(args.host, args.port))
+    logger.info("Serving the skill", extra={"port": port})
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,34 @@
 import requests
-from typing import Tuple
+from typing import Optional, Tuple
+
+from skill.services import http_client
+
+# Request attribute which holds the phone number result, when it was already fetched by the StateRequestInterceptor
+PREFETCHED_PHONE_NUMBER = "prefetched_phone_number"
+
+
+def get_fallback_tz_database_name(locale: str) -> str:
+    """
+    The timezone of a locale, when the settings API doesn't give us the one of the device.
+    """
+    tz_database_name = "America/Los_Angeles"
+    if locale == "de-DE":
+        tz_database_name = "Europe/Vienna"
+    elif locale == "it-IT":
+        tz_database_name = "Europe/Rome"
+    elif locale == "en-GB":
+        tz_database_name = "Europe/London"
+    elif locale == "en-IN":
+        tz_database_name = "Indian/Kerguelen"
+    elif locale == "en-AU":
+        tz_database_name = "Australia/Canberra"
+    return tz_database_name
 
 
 class AlexaSettingsService:
+    TIMEZONE = "timezone"
+    PHONE_NUMBER = "phone_number"
+
     def __init__(self, system, locale):
         self.api_endpoint = system.api_endpoint
         self.api_access_token = system.api_access_token
@@ -13,25 +39,31 @@ class AlexaSettingsService:
         self.phone_number_endpoint = self.api_endpoint + "/v2/accounts/~current/settings/Profile.mobileNumber"
 
     def get_tz_database_name(self):
+        tz_database_name = self.fetch_tz_database_name()
+        if tz_database_name is None:
+            tz_database_name = self.get_fallback_tz_database_name()
+        return tz_database_name
+
+    def fetch_tz_database_name(self) -> Optional[str]:
+        """
+        Returns None if the settings API doesn't give us a timezone. While the API is slow, we don't even ask.
+        """
+        if http_client.is_slow(self.TIMEZONE):
+            return None
+
         url = self.timezone_endpoint.format(self.device_id)
-        tz_database_name = self._execute_get_request(url)
+        tz_database_name = self._execute_get_request(url, self.TIMEZONE)
 
         # If we don't have a string here, we have some kind of error response from the server
         if type(tz_database_name) != str:
-            tz_database_name = "America/Los_Angeles"
-            if self.locale == "de-DE":
-                tz_database_name = "Europe/Vienna"
-            elif self.locale == "en-GB":
-                tz_database_name = "Europe/London"
-            elif self.locale == "en-IN":
-                tz_database_name = "Indian/Kerguelen"
-            elif self.locale == "en-AU":
-                tz_database_name = "Australia/Canberra"
-
+            return None
         return tz_database_name
 
+    def get_fallback_tz_database_name(self):
+        return get_fallback_tz_database_name(self.locale)
+
     def get_phone_number(self) -> Tuple[str, bool]:
-        response = self._execute_get_request(self.phone_number_endpoint)
+        response = self._execute_get_request(self.phone_number_endpoint, self.PHONE_NUMBER)
         is_success = False
         if 'countryCode' in response and 'phoneNumber' in response:
             is_success = True
@@ -40,9 +72,13 @@ class AlexaSettingsService:
             return response['code'], is_success
         return "", is_success
 
-    def _execute_get_request(self, url):
+    def _execute_get_request(self, url, endpoint):
         auth_string = "Bearer " + self.api_access_token
         headers = {'Authorization': auth_string}
 
-        r = requests.get(url, headers=headers)
-        return r.json()
+        try:
+            r = http_client.get(url, headers=headers, endpoint=endpoint)
+            return r.json()
+        except (requests.RequestException, ValueError):
+            # Timeouts, connection problems and non JSON bodies are treated like an error response
+            return {}
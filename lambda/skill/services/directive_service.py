@@ -0,0 +1,71 @@
+import logging
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from typing import Optional
+
+import requests
+from ask_sdk_core.handler_input import HandlerInput
+
+from skill import metrics
+from skill.deadline import get_deadline
+from skill.services import http_client
+
+logger = logging.getLogger(__name__)
+
+# A progressive response is only worth it when the user would otherwise wait this long in silence
+PROGRESSIVE_RESPONSE_THRESHOLD = 1.0
+# Alexa ignores progressive responses which arrive after the response, so we give up on it in time
+PROGRESSIVE_RESPONSE_TIMEOUT = (0.3, 1.0)
+
+
+class DirectiveService:
+    DIRECTIVES = "directives"
+
+    def __init__(self, system, request_id):
+        self.api_access_token = system.api_access_token
+        self.request_id = request_id
+        self.directives_endpoint = system.api_endpoint + "/v1/directives"
+
+    def send_speech(self, ssml: str) -> bool:
+        """
+        Sends a VoicePlayer.Speak directive, which Alexa speaks while we are still working on the response.
+        """
+        if http_client.is_slow(self.DIRECTIVES):
+            return False
+
+        headers = {'Authorization': "Bearer " + self.api_access_token}
+        body = {
+            "header": {"requestId": self.request_id},
+            "directive": {"type": "VoicePlayer.Speak", "speech": "<speak>" + ssml + "</speak>"}
+        }
+        try:
+            r = http_client.post(self.directives_endpoint, headers=headers, json=body, endpoint=self.DIRECTIVES,
+                                 timeout=PROGRESSIVE_RESPONSE_TIMEOUT, retries=0)
+        except requests.RequestException:
+            return False
+        return r.status_code == 204
+
+
+@contextmanager
+def progressive_response(handler_input: HandlerInput, ssml: str, expected_seconds: float):
+    """
+    Sends the speech as progressive response on the http worker pool, if the work in the with block is expected
+    to be slow. The work runs concurrently, the response waits for the directive at most until the deadline.
+    """
+    future = None  # type: Optional[Future]
+    system = handler_input.request_envelope.context.system
+    if expected_seconds >= PROGRESSIVE_RESPONSE_THRESHOLD and system.api_access_token:
+        directive_service = DirectiveService(system, handler_input.request_envelope.request.request_id)
+        future = http_client.submit(directive_service.send_speech, ssml)
+    try:
+        yield
+    finally:
+        if future is not None:
+            try:
+                timeout = min(sum(PROGRESSIVE_RESPONSE_TIMEOUT), get_deadline().remaining())
+                is_sent = future.result(timeout=max(0.0, timeout))
+            except TimeoutError:
+                is_sent = False
+            metrics.increment("progressive_response.count" if is_sent else "progressive_response.errors")
+            if not is_sent:
+                logger.info("Progressive response was not sent")
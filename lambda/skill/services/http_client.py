@@ -0,0 +1,199 @@
+import contextvars
+import random
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from skill.deadline import get_deadline
+
+# Alexa gives us ~8 seconds per turn. Outbound calls to the Alexa APIs must never eat up that budget.
+CONNECT_TIMEOUT = 0.5
+READ_TIMEOUT = 1.5
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.05
+BACKOFF_CAP = 0.4
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# All attempts and backoffs of one call together, never more than the deadline of the invocation leaves
+TOTAL_TIMEOUT = 2.5
+
+# After a timeout, an endpoint counts as slow for this long. Callers can skip it and use a local fallback instead.
+SLOW_ENDPOINT_COOLDOWN = 60.0
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+_session = None  # type: Optional[requests.Session]
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=POOL_MAXSIZE, thread_name_prefix='http-client')
+
+
+class LatencyHistogram:
+    """
+    Fixed bucket latency histogram. Bucket upper bounds are in milliseconds, the last bucket catches everything above.
+    """
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def record(self, latency_ms: float, is_error: bool = False):
+        idx = bisect_left(self.BUCKETS_MS, latency_ms)
+        with self._lock:
+            self.counts[idx] += 1
+            self.total_ms += latency_ms
+            self.max_ms = max(self.max_ms, latency_ms)
+            if is_error:
+                self.errors += 1
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the upper bound of the bucket which contains the p-th percentile (0 < p <= 100).
+        """
+        count = self.count
+        if not count:
+            return 0.0
+        rank = count * p / 100.0
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return float(self.BUCKETS_MS[idx]) if idx < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        labels = ['<={}ms'.format(b) for b in self.BUCKETS_MS] + ['>{}ms'.format(self.BUCKETS_MS[-1])]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+_histograms = {}  # type: Dict[str, LatencyHistogram]
+_histograms_lock = threading.Lock()
+_slow_until = {}  # type: Dict[str, float]
+
+
+def get_latency_histogram(endpoint: str) -> LatencyHistogram:
+    histogram = _histograms.get(endpoint)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(endpoint, LatencyHistogram())
+    return histogram
+
+
+def get_latency_histograms() -> Dict[str, LatencyHistogram]:
+    return dict(_histograms)
+
+
+def is_slow(endpoint: str) -> bool:
+    return _slow_until.get(endpoint, 0.0) > time.monotonic()
+
+
+def mark_slow(endpoint: str):
+    _slow_until[endpoint] = time.monotonic() + SLOW_ENDPOINT_COOLDOWN
+
+
+def get_session() -> requests.Session:
+    """
+    One pooled session per container. Connections are kept alive between invocations of a warm Lambda.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get(url: str, headers: dict, endpoint: str, timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+        retries: int = MAX_RETRIES) -> requests.Response:
+    """
+    GET with per call connect and read timeouts and bounded retries with full jitter backoff.
+    Connection errors, connect timeouts and retryable status codes are retried, the last error is raised.
+    A read timeout isn't retried, the endpoint is slow. It's marked as slow, like after a last connect timeout.
+    No attempt starts or waits beyond TOTAL_TIMEOUT or the deadline, whichever is closer.
+    The latency of every attempt is recorded in the histogram of the given endpoint.
+    """
+    return _request('GET', url, headers, endpoint, timeout, retries)
+
+
+def post(url: str, headers: dict, json: Optional[dict], endpoint: str,
+         timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+         retries: int = MAX_RETRIES, data: dict = None) -> requests.Response:
+    """
+    POST with a JSON body, or form data, with the same timeouts, retries and latency histogram as get.
+    """
+    return _request('POST', url, headers, endpoint, timeout, retries, json=json, data=data)
+
+
+def _request(method: str, url: str, headers: dict, endpoint: str, timeout: Tuple[float, float], retries: int,
+             **kwargs) -> requests.Response:
+    histogram = get_latency_histogram(endpoint)
+    expires_at = time.monotonic() + min(TOTAL_TIMEOUT, get_deadline().remaining())
+    connect_timeout, read_timeout = timeout
+    attempt = 0
+    while True:
+        left = expires_at - time.monotonic()
+        if left <= 0:
+            mark_slow(endpoint)
+            raise requests.Timeout("No time left for {}".format(endpoint))
+        start = time.perf_counter()
+        try:
+            response = get_session().request(method, url, headers=headers,
+                                             timeout=(min(connect_timeout, left), min(read_timeout, left)), **kwargs)
+        except requests.ReadTimeout:
+            histogram.record((time.perf_counter() - start) * 1000, is_error=True)
+            mark_slow(endpoint)
+            raise
+        except (requests.ConnectionError, requests.Timeout) as e:
+            histogram.record((time.perf_counter() - start) * 1000, is_error=True)
+            if attempt >= retries or not _has_time_for_retry(expires_at, connect_timeout):
+                if isinstance(e, requests.Timeout):
+                    mark_slow(endpoint)
+                raise
+        else:
+            is_retryable = response.status_code in RETRY_STATUS_CODES
+            histogram.record((time.perf_counter() - start) * 1000, is_error=is_retryable)
+            if not is_retryable or attempt >= retries or not _has_time_for_retry(expires_at, connect_timeout):
+                return response
+        backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        time.sleep(min(backoff, max(0.0, expires_at - time.monotonic() - connect_timeout)))
+        attempt += 1
+
+
+def _has_time_for_retry(expires_at: float, connect_timeout: float) -> bool:
+    """
+    A retry which can't even connect before the budget runs out only delays the fallback of the caller.
+    """
+    return expires_at - time.monotonic() > connect_timeout
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Runs a blocking call on the shared http worker pool, e.g. to issue independent requests concurrently.
+    The call runs in a copy of the current context, so it keeps the deadline, trace and metrics of the invocation.
+    """
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, fn, *args, **kwargs)
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+from skill.services import http_client
+from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.state import State
+
+# After the soft TTL we answer with the cached timezone and refresh it in the background.
+# After the hard TTL the cached timezone is not trusted anymore and we ask the settings API right away.
+SOFT_TTL_SECONDS = 24 * 60 * 60
+HARD_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Results of background refreshes of this container: device_id -> (tz_database_name, updated_at)
+_refreshed = {}  # type: Dict[str, Tuple[str, int]]
+_refreshing = set()
+_lock = threading.Lock()
+
+
+def get_tz_database_name(settings_service: AlexaSettingsService, state: State) -> str:
+    """
+    Resolves the timezone of the requesting device from the cache in the persistent state.
+    Only a timezone we actually got from the settings API is cached, never the locale based fallback.
+    The caller is responsible for saving the state.
+    """
+    device_id = settings_service.device_id
+    now = int(time.time())
+    _merge_background_refresh(device_id, state)
+    entry = state.device_timezones.get(device_id)
+
+    if entry and now - entry['updated_at'] < HARD_TTL_SECONDS:
+        if now - entry['updated_at'] >= SOFT_TTL_SECONDS:
+            _refresh_in_background(settings_service)
+        return entry['tz_database_name']
+
+    tz_database_name = settings_service.fetch_tz_database_name()
+    if tz_database_name is None:
+        return settings_service.get_fallback_tz_database_name()
+
+    state.device_timezones[device_id] = {"tz_database_name": tz_database_name, "updated_at": now}
+    return tz_database_name
+
+
+def _merge_background_refresh(device_id: str, state: State):
+    with _lock:
+        refreshed = _refreshed.pop(device_id, None)
+    if refreshed:
+        tz_database_name, updated_at = refreshed
+        state.device_timezones[device_id] = {"tz_database_name": tz_database_name, "updated_at": updated_at}
+
+
+def _refresh_in_background(settings_service: AlexaSettingsService):
+    device_id = settings_service.device_id
+    with _lock:
+        if device_id in _refreshing:
+            return
+        _refreshing.add(device_id)
+
+    def refresh():
+        try:
+            tz_database_name = settings_service.fetch_tz_database_name()
+            if tz_database_name is not None:
+                with _lock:
+                    _refreshed[device_id] = (tz_database_name, int(time.time()))
+        finally:
+            with _lock:
+                _refreshing.discard(device_id)
+
+    http_client.submit(refresh)
@@ -13,6 +13,12 @@ class State:
         self.user_id = Decimal(0)
         self.is_bot = False
         self.peers = []
+        # device_id -> {"tz_database_name": str, "updated_at": epoch seconds}
+        self.device_timezones = {}
+        # {"dialogs": unread dialogs like PyrogramManager.get_unread_dialogs, "updated_at": epoch seconds}
+        self.unread_digest = None
+        # str(chat_id) -> unread count of the dialog when the user was last notified about it, see skill.notifications
+        self.notified_unread = {}
 
         if data:
             self._fill_state(data)
@@ -25,7 +31,10 @@ class State:
             "test_mode": self.test_mode,
             "user_id": self.user_id,
             "is_bot": self.is_bot,
-            "peers": self.peers
+            "peers": self.peers,
+            "device_timezones": self.device_timezones,
+            "unread_digest": self.unread_digest,
+            "notified_unread": self.notified_unread
         }
 
     def _fill_state(self, data):
@@ -36,6 +45,9 @@ class State:
         self.user_id = data.get('user_id', Decimal(0))
         self.is_bot = data.get('is_bot', False)
         self.peers = data.get('peers', [])
+        self.device_timezones = data.get('device_timezones', {})
+        self.unread_digest = data.get('unread_digest')
+        self.notified_unread = data.get('notified_unread', {})
 
         self._cast_to_native_python_types()
 
@@ -54,3 +66,19 @@ class State:
             for idx, element in enumerate(p):
                 if isinstance(element, Decimal):
                     p[idx] = int(p[idx])
+
+        for entry in self.device_timezones.values():
+            if isinstance(entry.get('updated_at'), Decimal):
+                entry['updated_at'] = int(entry['updated_at'])
+
+        if self.unread_digest:
+            self.unread_digest['updated_at'] = int(self.unread_digest['updated_at'])
+            for dialog in self.unread_digest['dialogs']:
+                dialog['chat_id'] = int(dialog['chat_id'])
+                dialog['unread_count'] = int(dialog['unread_count'])
+                for telegram in dialog.get('telegrams') or []:
+                    # Descriptions of media telegrams, see skill.pyrogram.media
+                    if isinstance(telegram[0], dict) and 'duration' in telegram[0]:
+                        telegram[0]['duration'] = int(telegram[0]['duration'])
+
+        self.notified_unread = {chat_id: int(count) for chat_id, count in self.notified_unread.items()}
@@ -1,16 +1,85 @@
+import copy
+from typing import Hashable, Optional
+
 from ask_sdk_core.handler_input import HandlerInput
+from ask_sdk_model import RequestEnvelope
 
+from skill import metrics
+from skill.deadline import get_deadline
 from skill.state import State
+from skill.storage import set_attributes
 import pytz
 
+# Expected duration of a DynamoDB write, in seconds
+SAVE_ESTIMATE_SECONDS = 0.2
+# Attribute with the states of the voice profiles of a household: person id -> state without the shared fields
+PROFILES = "profiles"
+# Caches of the devices, which are the same for every voice profile of the household
+SHARED_FIELDS = ("device_timezones",)
+
+
+def get_person_id(request_envelope: RequestEnvelope) -> Optional[str]:
+    """
+    The voice profile which made the request, if Alexa recognized one.
+    """
+    person = request_envelope.context.system.person
+    return person.person_id if person is not None else None
+
+
+def get_partition(attributes: dict, person_id: Optional[str]) -> Optional[dict]:
+    """
+    The state of a voice profile with the shared fields of the household, the top-level attributes without a voice
+    profile. None if the voice profile has no state of its own yet.
+    """
+    if person_id is None:
+        return attributes
+    profile = attributes.get(PROFILES, {}).get(person_id)
+    if profile is None:
+        return None
+    data = dict(profile)
+    data.update({name: attributes[name] for name in SHARED_FIELDS if name in attributes})
+    return data
+
+
+def get_field_path(person_id: Optional[str], name: str) -> Hashable:
+    """
+    Where a field of the partition is in the item, for a partial update, see skill.storage.
+    """
+    if person_id is None or name in SHARED_FIELDS:
+        return name
+    return PROFILES, person_id, name
+
 
 class StateManager:
+    """
+    The item of an Alexa user holds the states of all voice profiles of the household, so a request reads the storage
+    once, whoever speaks. Requests without a recognized voice profile use the top-level attributes, like before there
+    were profiles.
+
+    The digest poller writes to the same item, so only the fields a request changed are saved, the fields of a voice
+    profile within its entry of PROFILES. The persistence adapter sets them with a partial update, see skill.storage.
+    """
+
     def __init__(self, handler_input: HandlerInput):
         attrs_manager = handler_input.attributes_manager
         sess_attrs = handler_input.attributes_manager.session_attributes
         self.handler_input = handler_input
-        self._timezone = pytz.timezone(sess_attrs.get("tz_database_name"))
-        self._state = State(self._timezone, attrs_manager.persistent_attributes)
+        self.person_id = get_person_id(handler_input.request_envelope)
+        self._timezone = pytz.timezone(sess_attrs.get("tz_database_name", "America/Los_Angeles"))
+        self._state = State(self._timezone, copy.deepcopy(self._partition(attrs_manager.persistent_attributes)))
+        # The state as stored, to find the fields a save must write. A copy, changes of the state in place must not
+        # change it.
+        self._stored = copy.deepcopy(self._state.to_dict())
+
+    def _partition(self, attributes: dict) -> dict:
+        data = get_partition(attributes, self.person_id)
+        self._is_new_profile = data is None
+        if data is None:
+            # The first request of the voice profile. The household may have used the skill before there were
+            # profiles, so the profile adopts its state and a linked account stays linked. It is saved with the
+            # first change.
+            data = {name: value for name, value in attributes.items() if name != PROFILES}
+        return data
 
     @property
     def state(self):
@@ -21,6 +90,29 @@ class StateManager:
     def state(self, value):
         self._state = value
 
-    def save_to_database(self):
-        self.handler_input.attributes_manager.persistent_attributes = self._state.to_dict()
-        self.handler_input.attributes_manager.save_persistent_attributes()
+    def save_to_database(self, optional: bool = False):
+        """
+        Optional saves, e.g.: of counters and caches, are skipped when the deadline of the request is too close.
+        """
+        if optional and not get_deadline().has_time_for(SAVE_ESTIMATE_SECONDS):
+            metrics.increment("storage.writes.skipped")
+            return
+        attrs_manager = self.handler_input.attributes_manager
+        data = copy.deepcopy(self._state.to_dict())
+        changed = {get_field_path(self.person_id, name): value for name, value in data.items()
+                   if self._stored.get(name) != value}
+        if not changed:
+            metrics.increment("storage.writes.unchanged")
+            return
+        if self._is_new_profile and any(isinstance(path, tuple) for path in changed):
+            # Nobody else writes to a profile which doesn't exist yet, so it is set as a whole
+            changed = {path: value for path, value in changed.items() if not isinstance(path, tuple)}
+            changed[(PROFILES, self.person_id)] = {name: value for name, value in data.items()
+                                                  if name not in SHARED_FIELDS}
+            self._is_new_profile = False
+        attributes = attrs_manager.persistent_attributes
+        # The persistence adapter writes exactly the attributes it is given
+        attrs_manager.persistent_attributes = changed
+        attrs_manager.save_persistent_attributes()
+        attrs_manager.persistent_attributes = set_attributes(attributes, changed)
+        self._stored = data
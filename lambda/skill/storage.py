@@ -0,0 +1,135 @@
+"""
+The DynamoDB items of the users, written with partial updates. The skill and the digest poller write to the same item
+at the same time, so neither of them puts the whole item: each sets only the attributes it changed.
+
+The attributes to set are given by name, or by a tuple of names for a nested attribute, e.g.: the field of a voice
+profile (PROFILES, person_id, "unread_digest"), see skill.state_manager.
+"""
+from typing import Hashable, Iterator, Tuple
+
+import boto3
+from ask_sdk_core.exceptions import PersistenceException
+from ask_sdk_dynamodb.adapter import DynamoDbAdapter
+from botocore.exceptions import ClientError
+
+
+class DynamoDbStateStore:
+    """
+    The items the DynamoDbAdapter of the skill writes, read and updated outside of an Alexa request.
+    """
+
+    def __init__(self, table_name: str = 'TelegramConnectSkill', partition_key_name: str = 'id',
+                 attribute_name: str = 'attributes', dynamodb_resource=None):
+        self.table = (dynamodb_resource or boto3.resource('dynamodb')).Table(table_name)
+        self.partition_key_name = partition_key_name
+        self.attribute_name = attribute_name
+
+    def scan(self) -> Iterator[Tuple[str, dict]]:
+        kwargs = {}
+        while True:
+            page = self.table.scan(**kwargs)
+            for item in page['Items']:
+                yield item[self.partition_key_name], item.get(self.attribute_name, {})
+            if 'LastEvaluatedKey' not in page:
+                return
+            kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    def update_attributes(self, key: str, fields: dict):
+        """
+        Sets single attributes, so concurrent writes to the other attributes aren't lost. The item is created if it
+        doesn't exist yet, e.g.: on the first request of a user, and so are the maps a nested attribute is in.
+        """
+        names = {"#a": self.attribute_name}
+        placeholders = {}
+        values = {}
+        assignments = []
+        for idx, (path, value) in enumerate(fields.items()):
+            for name in _as_path(path):
+                if name not in placeholders:
+                    placeholders[name] = "#f{}".format(len(placeholders))
+                    names[placeholders[name]] = name
+            values[":v{}".format(idx)] = value
+            assignments.append("#a.{} = :v{}".format(".".join(placeholders[name] for name in _as_path(path)), idx))
+        update = dict(Key={self.partition_key_name: key}, UpdateExpression="SET " + ", ".join(assignments),
+                      ExpressionAttributeNames=names, ExpressionAttributeValues=values)
+        try:
+            self.table.update_item(ConditionExpression="attribute_exists(#a)", **update)
+            return
+        except ClientError as e:
+            if _is_invalid_path(e):
+                self._create_parents(key, fields)
+                self.table.update_item(**update)
+                return
+            if not _is_condition_failure(e):
+                raise
+        try:
+            self.table.update_item(Key={self.partition_key_name: key}, UpdateExpression="SET #a = :a",
+                                   ConditionExpression="attribute_not_exists(#a)",
+                                   ExpressionAttributeNames={"#a": self.attribute_name},
+                                   ExpressionAttributeValues={":a": set_attributes({}, fields)})
+        except ClientError as e:
+            if not _is_condition_failure(e):
+                raise
+            # Created concurrently
+            self._create_parents(key, fields)
+            self.table.update_item(**update)
+
+    def _create_parents(self, key: str, fields: dict):
+        """
+        Creates the missing maps of nested attributes, outermost first. Maps which exist, e.g.: because another
+        writer created them in the meantime, are left as they are.
+        """
+        parents = {_as_path(path)[:depth] for path in fields for depth in range(1, len(_as_path(path)))}
+        for parent in sorted(parents, key=len):
+            names = {"#a": self.attribute_name}
+            names.update({"#f{}".format(idx): name for idx, name in enumerate(parent)})
+            path = ".".join(["#a"] + ["#f{}".format(idx) for idx in range(len(parent))])
+            self.table.update_item(Key={self.partition_key_name: key},
+                                   UpdateExpression="SET {0} = if_not_exists({0}, :empty)".format(path),
+                                   ExpressionAttributeNames=names, ExpressionAttributeValues={":empty": {}})
+
+
+def set_attributes(attributes: dict, fields: dict) -> dict:
+    """
+    Sets the fields in the attributes, in place, like update_attributes sets them in the item. Returns the attributes.
+    """
+    for path, value in fields.items():
+        path = _as_path(path)
+        parent = attributes
+        for name in path[:-1]:
+            parent = parent.setdefault(name, {})
+        parent[path[-1]] = value
+    return attributes
+
+
+def _as_path(path: Hashable) -> Tuple[str, ...]:
+    return path if isinstance(path, tuple) else (path,)
+
+
+def _is_condition_failure(e: ClientError) -> bool:
+    return e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+def _is_invalid_path(e: ClientError) -> bool:
+    # The map of a nested attribute doesn't exist yet
+    return e.response.get('Error', {}).get('Code') == 'ValidationException'
+
+
+class PartialUpdateDynamoDbAdapter(DynamoDbAdapter):
+    """
+    The DynamoDbAdapter of the skill. save_attributes sets the given attributes only, all other attributes of the item
+    are kept, see StateManager.save_to_database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = DynamoDbStateStore(self.table_name, self.partition_key_name, self.attribute_name, self.dynamodb)
+
+    def save_attributes(self, request_envelope, attributes):
+        if not attributes:
+            return
+        try:
+            self.store.update_attributes(self.partition_keygen(request_envelope), attributes)
+        except ClientError as e:
+            raise PersistenceException("Failed to save the attributes to DynamoDb table {}: {}".format(
+                self.table_name, e)) from e
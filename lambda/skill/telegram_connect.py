@@ -1,13 +1,23 @@
 # -*- coding: utf-8 -*-
+import json
+
 import ask_sdk_core.utils as ask_utils
 import ask_sdk_dynamodb
-from ask_sdk.standard import StandardSkillBuilder
+import boto3
+from ask_sdk_core.api_client import DefaultApiClient
 from ask_sdk_core.dispatch_components import AbstractRequestHandler
 from ask_sdk_core.handler_input import HandlerInput
-from ask_sdk_model import Response
+from ask_sdk_core.skill import CustomSkill
+from ask_sdk_core.skill_builder import CustomSkillBuilder
+from ask_sdk_model import Response, RequestEnvelope
+from botocore.config import Config
+
+from skill import deadline, digest, log, metrics, tracing, warmup
+from skill.deadline import Deadline
 
-from skill.exceptions.all_exceptions import CatchAllExceptionHandler
+from skill.exceptions.all_exceptions import CatchAllExceptionHandler, CatchFloodWaitExceptionHandler
 from skill.helper_functions import set_explore_sess_attr, ExploreIntents
+from skill.i18n.ssml import Speech
 from skill.i18n.util import get_i18n
 from skill.intents.general_intents import HelpIntentHandler, CancelOrStopIntentHandler, SessionEndedRequestHandler, \
     IntentReflectorHandler, FallbackIntentHandler
@@ -17,14 +27,14 @@ from skill.intents.no_intent import NoIntentHandler
 from skill.intents.setup_intent import SetupIntentHandler
 from skill.intents.yes_intent import YesIntentHandler
 from skill.interceptors import StateRequestInterceptor, LoggingRequestInterceptor, CardResponseInterceptor
-
-import logging
-
+from skill.metrics import MeteredPersistenceAdapter
 from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.services.directive_service import progressive_response
 from skill.state_manager import StateManager
+from skill.storage import PartialUpdateDynamoDbAdapter
+from skill.tracing import TracedRequestInterceptor, TracedResponseInterceptor, TracedPersistenceAdapter
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+log.configure()
 
 
 class LaunchRequestHandler(AbstractRequestHandler):
@@ -37,28 +47,47 @@ class LaunchRequestHandler(AbstractRequestHandler):
     def handle(self, handler_input: HandlerInput) -> Response:
         sess_attrs = handler_input.attributes_manager.session_attributes
         i18n = get_i18n(handler_input)
-        pyrogram_manager = PyrogramManager(StateManager(handler_input))
-
-        if not pyrogram_manager.get_is_authorized():
-            set_explore_sess_attr(sess_attrs, ExploreIntents.EXPLORE_SETUP_INTENT)
-            return handler_input.response_builder.speak(i18n.NEW_SETUP).ask(i18n.FALLBACK).response
+        state_manager = StateManager(handler_input)
+
+        # The digest poller keeps the unread dialogs of connected users up to date, and clears the digest of an account
+        # which was logged out. Without a fresh digest, e.g.: when the poller doesn't run, we ask Telegram.
+        unread_dialogs = digest.get_fresh_dialogs(state_manager.state)
+        if unread_dialogs is None:
+            pyrogram_manager = PyrogramManager(state_manager)
+            if not pyrogram_manager.get_is_authorized():
+                set_explore_sess_attr(sess_attrs, ExploreIntents.EXPLORE_SETUP_INTENT)
+                return Speech().add(i18n.NEW_SETUP).speak(handler_input).ask(i18n.FALLBACK).response
+            with progressive_response(handler_input, i18n.FETCHING_TELEGRAMS,
+                                      pyrogram_manager.expected_unread_seconds()):
+                unread_dialogs = pyrogram_manager.get_unread_dialogs()
+        else:
+            metrics.increment("digest.hits")
 
-        unread_dialogs = pyrogram_manager.get_unread_dialogs()
         if unread_dialogs:
-            speech = i18n.WELCOME_BACK + ' ' + i18n.NEW_TELEGRAMS
+            with tracing.span("speech.render"):
+                speech = Speech.join(' ', [i18n.WELCOME_BACK, i18n.NEW_TELEGRAMS])
             set_explore_sess_attr(sess_attrs, ExploreIntents.EXPLORE_MESSAGE_INTENT)
             sess_attrs['unread_dialogs'] = unread_dialogs
-            return handler_input.response_builder.speak(speech).ask(i18n.FALLBACK).response
+            return speech.speak(handler_input).ask(i18n.FALLBACK).response
 
-        speech = i18n.WELCOME_BACK + ' ' + i18n.NO_NEW_TELEGRAMS + ' ' + i18n.get_random_anyting_else()
-        return handler_input.response_builder.speak(speech).ask(i18n.FALLBACK).response
+        with tracing.span("speech.render"):
+            speech = Speech.join(' ', [i18n.WELCOME_BACK, i18n.NO_NEW_TELEGRAMS, i18n.get_random_anyting_else()])
+        return speech.speak(handler_input).ask(i18n.FALLBACK).response
 
 
 # The SkillBuilder object acts as the entry point for your skill, routing all request and response
 # payloads to the handlers above. Make sure any new handlers or interceptors you've
 # defined are included below. The order matters - they're processed top to bottom.
-sb = StandardSkillBuilder(table_name='TelegramConnectSkill', auto_create_table=False,
-                          partition_keygen=ask_sdk_dynamodb.partition_keygen.user_id_partition_keygen)
+# The persistence adapter is created once per container, tests swap it via sb.persistence_adapter.
+# DynamoDB calls get timeouts well below the response deadline of Alexa. Saves are partial updates, because the digest
+# poller writes to the same items.
+sb = CustomSkillBuilder(
+    persistence_adapter=PartialUpdateDynamoDbAdapter(
+        table_name='TelegramConnectSkill', create_table=False,
+        partition_keygen=ask_sdk_dynamodb.partition_keygen.user_id_partition_keygen,
+        dynamodb_resource=boto3.resource('dynamodb', config=Config(connect_timeout=1, read_timeout=2,
+                                                                   retries={'max_attempts': 2}))),
+    api_client=DefaultApiClient())
 
 sb.add_request_handler(LaunchRequestHandler())
 sb.add_request_handler(HelpIntentHandler())
@@ -73,11 +102,45 @@ sb.add_request_handler(FallbackIntentHandler())
 # make sure IntentReflectorHandler is last so it doesn't override your custom intent handlers
 sb.add_request_handler(IntentReflectorHandler())
 
-sb.add_global_request_interceptor(LoggingRequestInterceptor())
-sb.add_global_request_interceptor(StateRequestInterceptor())
+sb.add_global_request_interceptor(TracedRequestInterceptor(LoggingRequestInterceptor()))
+sb.add_global_request_interceptor(TracedRequestInterceptor(StateRequestInterceptor()))
 
-sb.add_global_response_interceptor(CardResponseInterceptor())
+sb.add_global_response_interceptor(TracedResponseInterceptor(CardResponseInterceptor()))
 
+sb.add_exception_handler(CatchFloodWaitExceptionHandler())
 sb.add_exception_handler(CatchAllExceptionHandler())
 
-handler = sb.lambda_handler()
+
+def lambda_handler(event, context):
+    """
+    Same as sb.lambda_handler(), but every stage of the invocation is traced and metered, and the handlers know the
+    deadline of the response. Warm-up events are answered without the skill.
+    """
+    if warmup.is_warmup_event(event):
+        with tracing.trace("warmup"), metrics.collect():
+            metrics.set_dimension("Handler", "Warmup")
+            return warmup.warm_up(event, sb.skill_configuration)
+
+    with deadline.within(Deadline.from_context(context)), tracing.trace("lambda_handler"), metrics.collect():
+        with tracing.span("skill.build"):
+            skill_configuration = sb.skill_configuration
+            skill_configuration.persistence_adapter = TracedPersistenceAdapter(
+                MeteredPersistenceAdapter(skill_configuration.persistence_adapter))
+            skill = CustomSkill(skill_configuration=skill_configuration)
+        with tracing.span("envelope.deserialize"):
+            request_envelope = skill.serializer.deserialize(payload=json.dumps(event), obj_type=RequestEnvelope)
+            request = request_envelope.request
+            tracing.set_attribute("request_type", request.object_type)
+            tracing.set_attribute("request_id", request.request_id)
+            metrics.set_dimension("Handler", request.intent.name if request.object_type == "IntentRequest"
+                                  else request.object_type)
+        with tracing.span("skill.invoke"), metrics.timer("handler.latency"):
+            response_envelope = skill.invoke(request_envelope=request_envelope, context=context)
+        with tracing.span("response.serialize"):
+            response = skill.serializer.serialize(response_envelope)
+        metrics.increment("session_attrs.bytes", len(json.dumps(response.get("sessionAttributes") or {})),
+                          metrics.BYTES)
+        return response
+
+
+handler = lambda_handler
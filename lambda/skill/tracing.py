@@ -0,0 +1,157 @@
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from ask_sdk_core.attributes_manager import AbstractPersistenceAdapter
+from ask_sdk_core.dispatch_components import AbstractRequestInterceptor, AbstractResponseInterceptor
+
+# Share of invocations which are traced. Not sampled invocations only pay for a context variable lookup per stage.
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.05"))
+
+logger = logging.getLogger(__name__)
+
+_current_trace = ContextVar("current_trace", default=None)  # type: ContextVar[Optional[Trace]]
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'start', 'end')
+
+    def __init__(self, trace: 'Trace', name: str):
+        self.trace = trace
+        self.name = name
+        self.start = 0.0
+        self.end = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end = time.perf_counter()
+        self.trace.spans.append(self)
+        return False
+
+
+class Trace:
+    """
+    Collects the spans of one invocation. They are emitted as one structured record when the trace is finished.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = 0.0
+        self.spans = []  # type: List[Span]
+        self.attributes = {}
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def to_record(self) -> dict:
+        return {
+            "trace": self.name,
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            **self.attributes,
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round((s.end - s.start) * 1000, 3)
+                } for s in sorted(self.spans, key=lambda s: s.start)
+            ]
+        }
+
+
+class trace:
+    """
+    Starts a trace for one invocation, if it is sampled. Spans opened inside belong to this trace.
+    """
+
+    def __init__(self, name: str, sample_rate: float = None):
+        self.name = name
+        self.sample_rate = SAMPLE_RATE if sample_rate is None else sample_rate
+        self.trace = None  # type: Optional[Trace]
+        self._token = None
+
+    def __enter__(self) -> Optional[Trace]:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            self.trace = Trace(self.name)
+            self._token = _current_trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.trace is not None:
+            self.trace.end = time.perf_counter()
+            _current_trace.reset(self._token)
+            emit(self.trace)
+        return False
+
+
+def span(name: str):
+    current_trace = _current_trace.get()
+    if current_trace is None:
+        return _NOOP_SPAN
+    return current_trace.span(name)
+
+
+def set_attribute(key: str, value):
+    current_trace = _current_trace.get()
+    if current_trace is not None:
+        current_trace.attributes[key] = value
+
+
+def emit(finished_trace: Trace):
+    logger.info("Trace finished", extra=finished_trace.to_record())
+
+
+class TracedRequestInterceptor(AbstractRequestInterceptor):
+    def __init__(self, interceptor: AbstractRequestInterceptor):
+        self.interceptor = interceptor
+        self.span_name = "interceptor." + type(interceptor).__name__
+
+    def process(self, handler_input):
+        with span(self.span_name):
+            self.interceptor.process(handler_input)
+
+
+class TracedResponseInterceptor(AbstractResponseInterceptor):
+    def __init__(self, interceptor: AbstractResponseInterceptor):
+        self.interceptor = interceptor
+        self.span_name = "interceptor." + type(interceptor).__name__
+
+    def process(self, handler_input, response):
+        with span(self.span_name):
+            self.interceptor.process(handler_input, response)
+
+
+class TracedPersistenceAdapter(AbstractPersistenceAdapter):
+    def __init__(self, persistence_adapter: AbstractPersistenceAdapter):
+        self.persistence_adapter = persistence_adapter
+
+    def get_attributes(self, request_envelope):
+        with span("persistence.load"):
+            return self.persistence_adapter.get_attributes(request_envelope)
+
+    def save_attributes(self, request_envelope, attributes):
+        with span("persistence.save"):
+            self.persistence_adapter.save_attributes(request_envelope, attributes)
+
+    def delete_attributes(self, request_envelope):
+        with span("persistence.delete"):
+            self.persistence_adapter.delete_attributes(request_envelope)
@@ -0,0 +1,91 @@
+"""
+Scheduled warm-up events, e.g.: from an EventBridge rule which invokes the Lambda every five minutes, keep containers
+warm. They aren't Alexa requests, so lambda_handler answers them without the skill. The time is used for what the first
+request of a cold container would otherwise do: importing lazily loaded modules and building the language models.
+
+A warm-up event is a scheduled event, {"source": "aws.events", ...}, or {"warmup": true}. With
+"refresh_connections": true, Telegram clients which lost their connection are dropped from the client cache as well.
+"""
+import json
+import logging
+import time
+
+from ask_sdk_core.skill import CustomSkill
+from ask_sdk_model import RequestEnvelope
+
+from skill import metrics, tracing
+from skill.i18n.util import get_language_model
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.services import http_client
+from skill.services.alexa_settings_service import get_fallback_tz_database_name
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SOURCES = ("aws.events", "serverless-plugin-warmup")
+# The locales of the interaction models in skill-package. Their language models are built with the fallback timezone
+# of the locale, which users get when the settings API doesn't know the timezone of their device.
+WARM_LOCALES = ("en-US", "de-DE", "it-IT")
+# The request types of the skill. The serializer imports the model class of a request type on its first use.
+WARM_REQUESTS = (
+    {"type": "LaunchRequest"},
+    {"type": "IntentRequest", "intent": {"name": "SetupIntent", "confirmationStatus": "NONE",
+                                         "slots": {"code": {"name": "code", "value": "0",
+                                                            "confirmationStatus": "NONE"}}}},
+    {"type": "SessionEndedRequest", "reason": "USER_INITIATED"},
+)
+
+_is_warm = False
+
+
+def is_warmup_event(event) -> bool:
+    if not isinstance(event, dict) or "request" in event:
+        return False
+    return event.get("source") in WARMUP_SOURCES or event.get("warmup") is True
+
+
+def _envelope(request: dict) -> dict:
+    request = dict(request, requestId="warmup", timestamp="2020-01-01T00:00:00Z", locale=WARM_LOCALES[0])
+    application = {"applicationId": "warmup"}
+    user = {"userId": "warmup"}
+    return {
+        "version": "1.0",
+        "session": {"new": True, "sessionId": "warmup", "application": application, "attributes": {}, "user": user},
+        "context": {"System": {"application": application, "user": user, "device": {"deviceId": "warmup"},
+                               "apiEndpoint": "https://api.amazonalexa.com", "apiAccessToken": "warmup"}},
+        "request": request
+    }
+
+
+def warm_up(event: dict, skill_configuration) -> dict:
+    """
+    Returns what was done, for the logs of the scheduler.
+    """
+    global _is_warm
+    was_cold = not _is_warm
+    start = time.perf_counter()
+
+    with tracing.span("warmup.skill"):
+        skill = CustomSkill(skill_configuration=skill_configuration)
+        for request in WARM_REQUESTS:
+            skill.serializer.deserialize(payload=json.dumps(_envelope(request)), obj_type=RequestEnvelope)
+    with tracing.span("warmup.i18n"):
+        for locale in WARM_LOCALES:
+            get_language_model(locale, get_fallback_tz_database_name(locale))
+    http_client.get_session()
+
+    dropped_clients = 0
+    if event.get("refresh_connections") and PyrogramManager.client_cache is not None:
+        with tracing.span("warmup.connections"):
+            dropped_clients = PyrogramManager.client_cache.drop_disconnected()
+
+    _is_warm = True
+    metrics.increment("warmup.count")
+    metrics.increment("warmup.cold" if was_cold else "warmup.warm")
+    result = {
+        "warmup": True,
+        "was_cold": was_cold,
+        "dropped_clients": dropped_clients,
+        "milliseconds": round((time.perf_counter() - start) * 1000, 3)
+    }
+    logger.info("Warmed up", extra=result)
+    return result
@@ -0,0 +1,110 @@
+"""
+How many accounts one core can hold: hosts a growing number of fake clients in one ClientHost, lets every client poll
+its dialogs, and measures the event loop lag, the CPU share and the memory per client.
+
+The fake clients have no real connections, so memory per client is a lower bound. The CPU share is what the host and
+the unread pipeline cost, without MTProto encryption.
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.bench_client_host --clients 100 250 500 1000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import zlib
+from typing import List
+
+from skill import log
+from skill.poller import PollerStateManager
+from skill.pyrogram.client_host import ClientHost, rss_bytes
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill_test.fakes.fake_telegram import AsyncFakeClient, FakeAccount
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+
+# The event loop should wake up a monitor task within this many milliseconds
+LAG_BUDGET_MS = 50
+MONITOR_INTERVAL = 0.01
+
+
+async def _monitor_lag(lags: List[float], stopped: asyncio.Event):
+    while not stopped.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(MONITOR_INTERVAL)
+        lags.append((time.perf_counter() - start - MONITOR_INTERVAL) * 1000)
+
+
+async def _poll(host: ClientHost, key: str, interval: float, stopped: asyncio.Event, calls: List[int]):
+    # Spread the clients over the interval, like updates of independent users
+    await asyncio.sleep(interval * (zlib.crc32(key.encode()) % 1000) / 1000)
+    while not stopped.is_set():
+        async with host.use(key) as client:
+            dialogs = await client.get_dialogs(limit=PyrogramManager.DIALOG_LIMIT)
+            for dialog in dialogs:
+                if dialog.unread_messages_count:
+                    await client.get_history(dialog.chat.id, dialog.unread_messages_count)
+        calls[0] += 1
+        await asyncio.sleep(interval)
+
+
+async def run(clients: int, interval: float, duration: float, latency: float) -> dict:
+    AsyncFakeClient.latency = latency
+    AsyncFakeClient.account = FakeAccount.generate(dialogs=5, unread_per_dialog=(0, 10), group_ratio=0.3, seed=1)
+    store = InMemoryPersistenceAdapter()
+    accounts = [(str(idx), PollerStateManager(store, str(idx), {"user_id": idx + 1})) for idx in range(clients)]
+
+    host = ClientHost(max_clients=clients, batch_size=50, batch_interval=0.1)
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    await host.start(accounts)
+    start_seconds = time.perf_counter() - start
+    memory_per_client = (rss_bytes() - rss_before) / clients
+
+    lags = []  # type: List[float]
+    calls = [0]
+    stopped = asyncio.Event()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    tasks = [asyncio.ensure_future(_monitor_lag(lags, stopped))]
+    tasks += [asyncio.ensure_future(_poll(host, key, interval, stopped, calls)) for key, _ in accounts]
+    await asyncio.sleep(duration)
+    stopped.set()
+    await asyncio.gather(*tasks)
+    cpu_share = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    await host.close()
+
+    quantiles = statistics.quantiles(lags, n=100) if len(lags) > 1 else [0.0] * 99
+    return {
+        "clients": clients,
+        "start_s": round(start_seconds, 2),
+        "kib_per_client": round(memory_per_client / 1024, 1),
+        "polls_per_s": round(calls[0] / duration, 1),
+        "lag_p50_ms": round(quantiles[49], 2),
+        "lag_p99_ms": round(quantiles[98], 2),
+        "cpu_share": round(cpu_share, 3),
+        # Clients one core holds at this poll interval, if CPU grows linearly with them
+        "clients_per_core": int(clients / cpu_share) if cpu_share else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between two polls of a client")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of polling per run")
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="seconds per Telegram call")
+    args = parser.parse_args()
+
+    log.configure(level="WARNING")
+    ClientHost.client_class = AsyncFakeClient
+    print("{:>8} {:>8} {:>14} {:>12} {:>11} {:>11} {:>10} {:>16}".format(
+        "clients", "start s", "KiB/client", "polls/s", "lag p50", "lag p99", "cpu", "clients/core"))
+    for clients in args.clients:
+        result = asyncio.run(run(clients, args.interval, args.duration, args.telegram_latency))
+        flag = "" if result["lag_p99_ms"] <= LAG_BUDGET_MS else "  <- loop lag over {}ms".format(LAG_BUDGET_MS)
+        print("{clients:>8} {start_s:>8} {kib_per_client:>14} {polls_per_s:>12} {lag_p50_ms:>11} {lag_p99_ms:>11} "
+              "{cpu_share:>10} {clients_per_core!s:>16}".format(**result) + flag)
+
+
+if __name__ == "__main__":
+    main()
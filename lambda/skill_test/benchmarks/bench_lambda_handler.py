@@ -0,0 +1,162 @@
+"""
+Replays the test envelopes through lambda_handler, against the fake Telegram client and the in-memory persistence
+adapter, and compares latency, allocations and storage calls per intent with a stored baseline.
+
+Run from the lambda directory: python -m skill_test.benchmarks.bench_lambda_handler [--save-baseline]
+Exits with 1 if a regression is flagged. Baselines are machine specific, save one on the machine you compare on.
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from unittest.mock import patch
+
+from skill import log
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.services.directive_service import DirectiveService
+from skill.telegram_connect import lambda_handler, sb
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.message_intent.message_request import message_request
+from skill_test.setup_intent.setup_intent_request import setup_request
+from skill_test.util import capture_metrics
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline_lambda_handler.json")
+# Latency and allocations may be this much worse than the baseline, storage calls not at all.
+# Latency is compared on p50 and p95, so regressions of the tail are flagged as well as typical ones.
+TOLERANCE = 0.25
+
+AUTHORIZED_USER_ID = "amzn1.ask.account.BENCHMARK_AUTHORIZED"
+NEW_USER_ID = "amzn1.ask.account.BENCHMARK_NEW"
+
+
+class Scenario:
+    def __init__(self, name: str, envelope: dict, user_id: str, prepare: Callable[[], None] = None):
+        self.name = name
+        self.event = copy.deepcopy(envelope)
+        self.event["session"]["user"]["userId"] = user_id
+        self.event["context"]["System"]["user"]["userId"] = user_id
+        self.prepare = prepare or (lambda: None)
+
+
+def _reset_account():
+    FakeClient.account = FakeAccount.generate(dialogs=3, unread_per_dialog=3)
+
+
+def _build_scenarios() -> List[Scenario]:
+    message_event = copy.deepcopy(message_request)
+    message_event["session"]["attributes"].pop("new_messages", None)
+
+    setup_event = copy.deepcopy(setup_request)
+    setup_event["session"]["attributes"] = {"tz_database_name": "Europe/Vienna"}
+    setup_event["request"]["intent"]["slots"]["code"]["value"] = None
+
+    return [
+        Scenario("LaunchRequest", launch_request, AUTHORIZED_USER_ID, _reset_account),
+        Scenario("MessageIntent", message_event, AUTHORIZED_USER_ID, _reset_account),
+        Scenario("SetupIntent", setup_event, NEW_USER_ID),
+    ]
+
+
+def _percentile(quantiles: List[float], p: int) -> float:
+    return round(quantiles[p - 1], 3)
+
+
+def run_scenario(scenario: Scenario, iterations: int) -> Dict:
+    latencies = []
+    peaks = []
+    with capture_metrics() as flushed:
+        for _ in range(iterations):
+            scenario.prepare()
+            start = time.perf_counter()
+            lambda_handler(scenario.event, None)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        for _ in range(min(iterations, 20)):
+            scenario.prepare()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            lambda_handler(scenario.event, None)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+
+    counters = flushed[-1].counters
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_ms": _percentile(quantiles, 50),
+        "p95_ms": _percentile(quantiles, 95),
+        "p99_ms": _percentile(quantiles, 99),
+        "peak_alloc_kib": round(statistics.median(peaks) / 1024, 1),
+        "storage_reads": counters.get("storage.reads", 0),
+        "storage_writes": counters.get("storage.writes", 0),
+    }
+
+
+def find_regressions(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ["p50_ms", "p95_ms", "peak_alloc_kib"]:
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append("{} {}: {} > baseline {}".format(name, key, result[key], base[key]))
+        for key in ["storage_reads", "storage_writes"]:
+            if result[key] > base[key]:
+                regressions.append("{} {}: {} > baseline {}".format(name, key, result[key], base[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    log.configure(level="WARNING")
+    sb.persistence_adapter = InMemoryPersistenceAdapter()
+    sb.persistence_adapter.items[AUTHORIZED_USER_ID] = {"user_id": 4242}
+
+    results = {}
+    with patch.object(PyrogramManager, "client_class", FakeClient), \
+            patch.object(PyrogramManager, "rate_limiter", None), \
+            patch.object(AlexaSettingsService, "fetch_tz_database_name", return_value="Europe/Vienna"), \
+            patch.object(AlexaSettingsService, "get_phone_number", return_value=("+43123456", True)), \
+            patch.object(DirectiveService, "send_speech", return_value=True):
+        for scenario in _build_scenarios():
+            results[scenario.name] = run_scenario(scenario, args.iterations)
+
+    print("{:<15} {:>9} {:>9} {:>9} {:>12} {:>7} {:>7}".format(
+        "intent", "p50 ms", "p95 ms", "p99 ms", "peak KiB", "reads", "writes"))
+    for name, r in results.items():
+        print("{:<15} {:>9} {:>9} {:>9} {:>12} {:>7} {:>7}".format(
+            name, r["p50_ms"], r["p95_ms"], r["p99_ms"], r["peak_alloc_kib"], r["storage_reads"],
+            r["storage_writes"]))
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline saved to {}".format(BASELINE_FILE))
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline found, run with --save-baseline first")
+        return 0
+    with open(BASELINE_FILE) as f:
+        regressions = find_regressions(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print("REGRESSION: " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
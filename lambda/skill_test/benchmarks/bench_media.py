@@ -0,0 +1,76 @@
+"""
+Media telegrams against the fake Telegram backend: get_unread_dialogs of accounts with only text, mixed and only
+media telegrams, and the speech of their descriptions. Media is described from the metadata of the fetched messages,
+so the latency doesn't depend on the media share and no file is ever downloaded.
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.bench_media --accounts 500
+"""
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytz
+
+from skill.i18n.language_model_en import LanguageModelEN
+from skill.intents.message_intent import MessageIntentHandler
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.state import State
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+
+
+def run(accounts: int, media_ratio: float, latency: float) -> dict:
+    FakeClient.latency = latency
+    state_manager = SimpleNamespace(state=State(pytz.utc, {"user_id": 4242}), save_to_database=Mock())
+    handler = MessageIntentHandler()
+    handler.i18n = LanguageModelEN(pytz.utc)
+
+    fetch_ms = []
+    render_seconds = 0.0
+    telegrams = 0
+    downloads = 0
+    for seed in range(accounts):
+        FakeClient.account = FakeAccount.generate(dialogs=5, unread_per_dialog=(5, 20), media_ratio=media_ratio,
+                                                  group_ratio=0.3, seed=seed)
+        start = time.perf_counter()
+        pyrogram_manager = PyrogramManager(state_manager)
+        unread_dialogs = pyrogram_manager.get_unread_dialogs()
+        fetch_ms.append((time.perf_counter() - start) * 1000)
+        downloads += pyrogram_manager.client.calls.count('download_media')
+
+        start = time.perf_counter()
+        for dialog in unread_dialogs:
+            if dialog["telegrams"] is not None:
+                handler.construct_output_speech_for_dialog(dialog)
+                telegrams += len(dialog["telegrams"])
+        render_seconds += time.perf_counter() - start
+
+    return {
+        "fetch_p50_ms": round(statistics.median(fetch_ms), 3),
+        "fetch_p99_ms": round(statistics.quantiles(fetch_ms, n=100)[98], 3),
+        "render_telegrams_per_s": round(telegrams / render_seconds),
+        "downloads": downloads
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.001, help="seconds per call to the fake Telegram API")
+    args = parser.parse_args()
+
+    PyrogramManager.client_class = FakeClient
+    # One user reads all the accounts, the rate limits of a single account aren't what is measured
+    PyrogramManager.rate_limiter = None
+
+    columns = ["fetch_p50_ms", "fetch_p99_ms", "render_telegrams_per_s", "downloads"]
+    print("{:<8}".format("media") + "".join(c.rjust(len(c) + 2) for c in columns))
+    for media_ratio in [0.0, 0.5, 1.0]:
+        result = run(args.accounts, media_ratio, args.latency)
+        print("{:<8}".format(media_ratio) + "".join(str(result[c]).rjust(len(c) + 2) for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput of the notification pipeline in users per second per worker. A worker is one poller thread: it refreshes
+the unread dialogs of every user who got new messages, offers them to the pipeline and delivers the due notifications.
+
+Runs once with a sender which only records the notifications, which is the cost of the pipeline itself, and once with
+the ProactiveEventsSender against a local stub of the Proactive Events API.
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.bench_notifications --users 2000
+"""
+import argparse
+import time
+from typing import Dict, List
+
+from skill import log
+from skill.notifications import NotificationPipeline, ProactiveEventsSender
+from skill.poller import PollerStateManager
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+from skill_test.fakes.proactive_events_stub import ProactiveEventsApiStub, RecordingSender
+
+
+class _UserClient(FakeClient):
+    # Telegram user id -> account
+    accounts = {}  # type: Dict[int, FakeAccount]
+
+    def __init__(self, storage, api_id=None, api_hash=None):
+        super().__init__(storage, api_id, api_hash)
+        self.account = self.accounts[storage.state.user_id]
+
+
+def run(sender, users: int, messages_per_user: int) -> dict:
+    store = InMemoryPersistenceAdapter()
+    managers = []
+    for idx in range(users):
+        user_id = idx + 1
+        _UserClient.accounts[user_id] = FakeAccount.generate(dialogs=5, unread_per_dialog=0, seed=user_id)
+        key = "amzn1.ask.account.{}".format(user_id)
+        store.items[key] = {"user_id": user_id}
+        state_manager = PollerStateManager(store, key, store.items[key])
+        managers.append((key, state_manager, PyrogramManager(state_manager)))
+    pipeline = NotificationPipeline(sender)
+
+    for key, state_manager, _ in managers:
+        account = _UserClient.accounts[state_manager.state.user_id]
+        for m in range(messages_per_user):
+            account.receive(account.dialogs[-1].chat.id, "Message {}".format(m))
+
+    start = time.perf_counter()
+    for key, state_manager, pyrogram_manager in managers:
+        pipeline.offer(key, state_manager, pyrogram_manager.get_unread_dialogs(), now=0)
+    offered = time.perf_counter()
+    delivered = pipeline.flush_due(now=pipeline.window)
+    end = time.perf_counter()
+
+    return {
+        "delivered": delivered,
+        "refresh_ms_per_user": round((offered - start) * 1000 / users, 3),
+        "deliver_ms_per_user": round((end - offered) * 1000 / users, 3),
+        "users_per_s": round(users / (end - start), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=3, help="new messages per user, coalesced into one")
+    args = parser.parse_args()
+
+    log.configure(level="WARNING")
+    PyrogramManager.client_class = _UserClient
+
+    results = {"recording": run(RecordingSender(), args.users, args.messages)}
+    with ProactiveEventsApiStub() as stub:
+        sender = ProactiveEventsSender("id", "secret", api_endpoint=stub.endpoint, token_url=stub.token_url)
+        results["proactive_events"] = run(sender, args.users, args.messages)
+
+    columns = ["delivered", "refresh_ms_per_user", "deliver_ms_per_user", "users_per_s"]  # type: List[str]
+    print("{:<18}".format("sender") + "".join(c.rjust(len(c) + 2) for c in columns))
+    for name, result in results.items():
+        print("{:<18}".format(name) + "".join(str(result[c]).rjust(len(c) + 2) for c in columns))
+
+
+if __name__ == "__main__":
+    main()
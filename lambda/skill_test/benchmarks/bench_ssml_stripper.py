@@ -0,0 +1,70 @@
+"""
+Compares remove_ssml_tags with the HTMLParser based stripper it replaced.
+
+Run from the lambda directory: python -m skill_test.benchmarks.bench_ssml_stripper
+"""
+import timeit
+from html.parser import HTMLParser
+
+from skill.helper_functions import remove_ssml_tags, _remove_ssml_tags
+from skill.i18n.ssml import Speech
+from skill_test.util import get_i18n_for_tests
+
+
+class LegacySSMLStripper(HTMLParser):
+    def __init__(self):
+        self.reset()
+        self.full_str_list = []
+        self.strict = False
+        self.convert_charrefs = True
+
+    def handle_data(self, d):
+        self.full_str_list.append(d)
+
+    def get_data(self):
+        return ''.join(self.full_str_list)
+
+
+def legacy_remove_ssml_tags(ssml_speech):
+    s = LegacySSMLStripper()
+    s.feed(ssml_speech)
+    return s.get_data()
+
+
+def build_multi_dialog_output(i18n, dialogs: int, telegrams_per_dialog: int) -> str:
+    speech = Speech()
+    for d in range(dialogs):
+        speech.add(i18n.GROUP_DIALOG_INTRO + ': ', 'Group {}'.format(d))
+        telegrams = [Speech().add(i18n.PERSONAL_DIALOG_INTRO + i18n.BREAK_200, 'User {}'.format(t))
+                     .add_text('Message number {} says hello & asks if 1 < 2?'.format(t))
+                     for t in range(telegrams_per_dialog)]
+        speech.add_speech(Speech.join(' ' + i18n.BREAK_350, telegrams)).add(i18n.BREAK_2000 + ' ')
+    return '<speak>{}</speak>'.format(speech.add(i18n.NO_MORE_TELEGRAMS).ssml)
+
+
+def bench(name, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    print('{:<45} {:>10.2f} us/call'.format(name, seconds / number * 1e6))
+    return seconds
+
+
+def main():
+    i18n = get_i18n_for_tests('en-US')
+    for dialogs, telegrams in [(1, 3), (5, 10), (20, 25)]:
+        output = build_multi_dialog_output(i18n, dialogs, telegrams)
+        print('{} dialogs x {} telegrams ({} chars)'.format(dialogs, telegrams, len(output)))
+        number = max(10, 20000 // (dialogs * telegrams))
+        legacy = bench('  legacy HTMLParser stripper', lambda: legacy_remove_ssml_tags(output), number)
+        uncached = bench('  remove_ssml_tags (not memoized)', lambda: _remove_ssml_tags(output), number)
+        current = bench('  remove_ssml_tags', lambda: remove_ssml_tags(output), number)
+        print('  speedup: {:.1f}x (not memoized: {:.1f}x)'.format(legacy / current, legacy / uncached))
+
+    static_phrase = '<speak>' + i18n.NEW_SETUP + '</speak>'
+    print('static phrase ({} chars)'.format(len(static_phrase)))
+    legacy = bench('  legacy HTMLParser stripper', lambda: legacy_remove_ssml_tags(static_phrase), 20000)
+    current = bench('  remove_ssml_tags (memoized)', lambda: remove_ssml_tags(static_phrase), 20000)
+    print('  speedup: {:.1f}x'.format(legacy / current))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput of the text normalization of telegrams on synthetic messages: plain chat, links, emoji, markdown, code
+blocks and long texts. The first pass normalizes every message, the second one is served from the cache, like a
+telegram which is fetched again in the next turn.
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.bench_text_normalizer --messages 100000
+"""
+import argparse
+import random
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import List
+from unittest.mock import patch
+
+from skill.pyrogram import text_normalizer
+from skill_test.fakes.fake_telegram import make_message
+
+WORDS = ["hello", "see", "you", "tomorrow", "at", "the", "station", "thanks", "great", "idea", "meeting", "lunch"]
+TEMPLATES = [
+    "{} {} {}",
+    "Look at https://www.example.com/path/{}?ref={} it is {}",
+    "{} 😀😀 {} 👍🏽 {}",
+    "**{}** and _{}_ and `{}`",
+    "Try this:\n```\nfor i in range(10):\n    print('{}', '{}', '{}')\n```",
+    "{} {} {} " * 40,
+]
+
+
+def generate(count: int, seed: int = 0) -> List[SimpleNamespace]:
+    rnd = random.Random(seed)
+    messages = []
+    for idx in range(count):
+        chat = SimpleNamespace(id=1000 + idx % 500)
+        template = rnd.choice(TEMPLATES)
+        text = template.format(*(rnd.choice(WORDS) for _ in range(template.count("{}"))))
+        messages.append(make_message(idx + 1, chat, None, text=text))
+    return messages
+
+
+def run(messages: List[SimpleNamespace]) -> float:
+    start = time.perf_counter()
+    for _ in text_normalizer.normalize_messages(messages, account=4242):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    messages = generate(args.messages)
+    characters = sum(len(m.text) for m in messages)
+    # Large enough for all messages, so the second pass only hits the cache
+    with patch.object(text_normalizer, "_cache", OrderedDict()), \
+            patch.object(text_normalizer, "CACHE_SIZE", args.messages):
+        cold = run(messages)
+        cached = run(messages)
+
+    print("{:<8} {:>12} {:>14} {:>12}".format("pass", "messages/s", "MB of text/s", "us/message"))
+    for name, seconds in [("cold", cold), ("cached", cached)]:
+        print("{:<8} {:>12.0f} {:>14.1f} {:>12.2f}".format(name, len(messages) / seconds,
+                                                           characters / seconds / 1e6,
+                                                           seconds * 1e6 / len(messages)))
+
+
+if __name__ == "__main__":
+    main()
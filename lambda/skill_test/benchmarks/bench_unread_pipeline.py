@@ -0,0 +1,58 @@
+"""
+Scale test of the unread pipeline (PyrogramManager.get_unread_dialogs) against the fake Telegram backend.
+The last runs grow the number of unread dialogs: only the histories of the best ranked dialogs are fetched, so the
+latency stays flat.
+
+Run from the lambda directory: python -m skill_test.benchmarks.bench_unread_pipeline
+"""
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytz
+
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.state import State
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+
+ACCOUNTS = 500
+
+
+def run(unread_per_dialog, media_ratio: float, latency: float = 0.0, dialogs: int = 10, accounts: int = ACCOUNTS):
+    PyrogramManager.client_class = FakeClient
+    # One user reads all the accounts, the rate limits of a single account aren't what is measured
+    PyrogramManager.rate_limiter = None
+    FakeClient.latency = latency
+    fake_accounts = [FakeAccount.generate(dialogs=dialogs, unread_per_dialog=unread_per_dialog, media_ratio=media_ratio,
+                                          group_ratio=0.3, seed=seed) for seed in range(accounts)]
+    state_manager = SimpleNamespace(state=State(pytz.utc, {"user_id": 4242}), save_to_database=Mock())
+
+    latencies = []
+    messages = 0
+    start = time.perf_counter()
+    for account in fake_accounts:
+        FakeClient.account = account
+        account_start = time.perf_counter()
+        unread_dialogs = PyrogramManager(state_manager).get_unread_dialogs()
+        latencies.append((time.perf_counter() - account_start) * 1000)
+        messages += sum(len(d["telegrams"]) for d in unread_dialogs if d["telegrams"] is not None)
+    seconds = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print('dialogs {:>3} unread {:>9} media {:.1f} latency {:>5}ms: {:>8.0f} accounts/s {:>9.0f} messages/s '
+          'p50 {:.3f}ms p99 {:.3f}ms'.format(dialogs, str(unread_per_dialog), media_ratio, latency * 1000,
+                                             accounts / seconds, messages / seconds, quantiles[49], quantiles[98]))
+
+
+def main():
+    for unread_per_dialog in [(0, 5), (10, 50), (100, 100)]:
+        for media_ratio in [0.0, 0.5]:
+            run(unread_per_dialog, media_ratio)
+    run((10, 50), 0.2, latency=0.001)
+    for dialogs in [10, 100, 300]:
+        run((1, 20), 0.2, latency=0.001, dialogs=dialogs, accounts=50)
+
+
+if __name__ == "__main__":
+    main()
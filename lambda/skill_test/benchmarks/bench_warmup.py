@@ -0,0 +1,71 @@
+"""
+Latency of the first LaunchRequest of a fresh container, with and without a warm-up event before it. Every run is a
+new interpreter, which imports skill.telegram_connect like Lambda does on a cold start.
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.bench_warmup --runs 10
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def _child(warm: bool):
+    from unittest.mock import patch
+
+    from skill.pyrogram.pyrogram_manager import PyrogramManager
+    from skill.services.alexa_settings_service import AlexaSettingsService
+    from skill.telegram_connect import lambda_handler, sb
+    from skill_test.fakes.fake_telegram import FakeClient
+    from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+    from skill_test.launch_intent.launch_request import launch_request
+
+    event = copy.deepcopy(launch_request)
+    event["request"]["locale"] = "de-DE"
+    sb.persistence_adapter = InMemoryPersistenceAdapter()
+    sb.persistence_adapter.items[event["context"]["System"]["user"]["userId"]] = {"user_id": 4242}
+    with patch.object(PyrogramManager, "client_class", FakeClient), \
+            patch.object(AlexaSettingsService, "fetch_tz_database_name", return_value="Europe/Berlin"):
+        warmup_ms = 0.0
+        if warm:
+            start = time.perf_counter()
+            lambda_handler({"source": "aws.events", "detail-type": "Scheduled Event"}, None)
+            warmup_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        lambda_handler(event, None)
+        print(json.dumps({"warmup_ms": warmup_ms, "first_request_ms": (time.perf_counter() - start) * 1000}))
+
+
+def _run(warm: bool) -> dict:
+    env = dict(os.environ, LOG_LEVEL="ERROR")
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    output = subprocess.check_output([sys.executable, "-m", "skill_test.benchmarks.bench_warmup", "--child"] +
+                                     (["--warm"] if warm else []), env=env, stderr=subprocess.DEVNULL)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.warm)
+        return
+
+    print("{:<10} {:>16} {:>22}".format("container", "warm-up ms p50", "first request ms p50"))
+    for warm in [False, True]:
+        results = [_run(warm) for _ in range(args.runs)]
+        print("{:<10} {:>16.1f} {:>22.1f}".format("warmed" if warm else "cold",
+                                                   statistics.median(r["warmup_ms"] for r in results),
+                                                   statistics.median(r["first_request_ms"] for r in results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Replays recorded request envelopes through the handler at a target rate and concurrency, against the fake Telegram
+client and the in-memory persistence adapter, to size Lambda memory and provisioned concurrency.
+
+Every line of the input file is a request envelope, or an object with the envelope in "event". Turns of the same
+session are replayed in order, with the session attributes of our previous response, like Alexa does.
+Latencies are measured from when a request is due, so they include the time it waits for a free worker or for the
+previous turn of its session.
+Memory growth includes the data the fake backends keep per user, which in production lives in Telegram and DynamoDB.
+
+With --http the requests go through skill.server on a local port instead, with its client and state caches.
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.replay_traffic --generate 200 traffic.jsonl
+    python -m skill_test.benchmarks.replay_traffic traffic.jsonl --rate 50 --concurrency 4
+    python -m skill_test.benchmarks.replay_traffic traffic.jsonl --rate 50 --concurrency 4 --http
+"""
+import argparse
+import asyncio
+import copy
+import http.client
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from skill import log
+from skill.pyrogram.pyrogram_manager import ClientCache, PyrogramManager
+from skill.server import CachedPersistenceAdapter, NoVerification, SkillServer
+from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.services.directive_service import DirectiveService
+from skill.telegram_connect import handler, sb
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.message_intent.message_request import message_request
+
+
+class ReplayClient(FakeClient):
+    """
+    Every Telegram user gets an own synthetic account, generated from the user id.
+    """
+    accounts = {}  # type: Dict[int, FakeAccount]
+    lock = threading.Lock()
+
+    def __init__(self, storage, api_id=None, api_hash=None):
+        super().__init__(storage, api_id, api_hash)
+        user_id = int(storage.state.user_id)
+        with self.lock:
+            if user_id not in self.accounts:
+                self.accounts[user_id] = FakeAccount.generate(dialogs=5, unread_per_dialog=(0, 10), media_ratio=0.2,
+                                                              group_ratio=0.3, seed=user_id)
+            self.account = self.accounts[user_id]
+
+
+class ReplayPersistenceAdapter(InMemoryPersistenceAdapter):
+    """
+    Users we don't know yet already completed the setup, like most of the recorded traffic.
+    """
+
+    def get_attributes(self, request_envelope) -> Dict:
+        key = self.partition_keygen(request_envelope)
+        if key not in self.items:
+            self.items[key] = {"user_id": zlib.crc32(key.encode()) or 1}
+        return super().get_attributes(request_envelope)
+
+
+def current_rss_kib() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # Without procfs only the peak is known
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def load_envelopes(path: str) -> List[dict]:
+    envelopes = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                envelopes.append(record.get("event", record))
+    return envelopes
+
+
+def generate_traffic(users: int, path: str):
+    """
+    Writes a launch and two message turns per user, from the envelopes of the tests.
+    """
+    with open(path, "w") as f:
+        for user in range(users):
+            session_id = "amzn1.echo-api.session.replay-{}".format(user)
+            for turn, template in enumerate([launch_request, message_request, message_request]):
+                envelope = copy.deepcopy(template)
+                envelope["session"]["new"] = turn == 0
+                envelope["session"]["sessionId"] = session_id
+                envelope["session"]["attributes"] = {}
+                for user_holder in [envelope["session"]["user"], envelope["context"]["System"]["user"]]:
+                    user_holder["userId"] = "amzn1.ask.account.replay-{}".format(user)
+                envelope["request"]["requestId"] = "amzn1.echo-api.request.replay-{}-{}".format(user, turn)
+                f.write(json.dumps(envelope) + "\n")
+
+
+class HttpInvoker:
+    """
+    Posts the events to a skill server, every thread keeps its connection alive like Alexa does.
+    """
+
+    def __init__(self, port: int):
+        self.port = port
+        self.local = threading.local()
+
+    def __call__(self, event: dict, context) -> dict:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        connection.request("POST", "/", body=json.dumps(event), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError("HTTP {}".format(response.status))
+        return json.loads(body)
+
+
+def start_server(concurrency: int) -> int:
+    """
+    Serves the skill from a background thread, like python -m skill.server --no-verify does.
+    """
+    PyrogramManager.client_cache = ClientCache(max_size=10000)
+    sb.persistence_adapter = CachedPersistenceAdapter(sb.persistence_adapter)
+    loop = asyncio.new_event_loop()
+    port = loop.run_until_complete(SkillServer(NoVerification(), workers=concurrency).start(port=0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return port
+
+
+class Replay:
+    def __init__(self, envelopes: List[dict], rate: float, concurrency: int,
+                 invoke: Callable[[dict, object], dict] = handler):
+        self.envelopes = envelopes
+        self.rate = rate
+        self.concurrency = concurrency
+        self.invoke = invoke
+        self.session_attributes = {}  # type: Dict[str, dict]
+        # Turns which are due while an earlier turn of their session still runs. A session is in here as long as a
+        # worker runs its turns.
+        self.pending_turns = {}  # type: Dict[str, Deque[Tuple[dict, float]]]
+        self.lock = threading.Lock()
+        self.latencies = []  # type: List[float]
+        self.errors = 0
+
+    def _schedule(self, executor: ThreadPoolExecutor, envelope: dict, due: float):
+        session_id = envelope["session"]["sessionId"]
+        with self.lock:
+            pending_turns = self.pending_turns.get(session_id)
+            if pending_turns is not None:
+                pending_turns.append((envelope, due))
+                return
+            self.pending_turns[session_id] = deque()
+        executor.submit(self._run_session, session_id, envelope, due)
+
+    def _run_session(self, session_id: str, envelope: dict, due: float):
+        """
+        Runs the turns of one session in order on one worker, until no further turn is due.
+        """
+        while True:
+            self._invoke(envelope, due)
+            with self.lock:
+                pending_turns = self.pending_turns[session_id]
+                if not pending_turns:
+                    del self.pending_turns[session_id]
+                    return
+                envelope, due = pending_turns.popleft()
+
+    def _invoke(self, envelope: dict, due: float):
+        session_id = envelope["session"]["sessionId"]
+        event = copy.deepcopy(envelope)
+        if not event["session"].get("new") and session_id in self.session_attributes:
+            event["session"]["attributes"] = self.session_attributes[session_id]
+
+        try:
+            response = self.invoke(event, None)
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            return
+        # From when the request was due, so the time it waited for a worker or for its previous turn counts too
+        latency = (time.perf_counter() - due) * 1000
+
+        if response.get("response", {}).get("shouldEndSession"):
+            self.session_attributes.pop(session_id, None)
+        else:
+            self.session_attributes[session_id] = response.get("sessionAttributes") or {}
+        with self.lock:
+            self.latencies.append(latency)
+
+    def run(self) -> Dict:
+        rss_start = current_rss_kib()
+        rss_warm = rss_start
+        # The first requests import modules and fill the caches, growth is measured after them
+        warmup = len(self.envelopes) // 10
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for idx, envelope in enumerate(self.envelopes):
+                # Open loop: request idx is due at idx / rate, independent of how fast we answer. Requests wait in
+                # the queue of the executor while all workers are busy.
+                due = start + idx / self.rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self._schedule(executor, envelope, due)
+                if idx == warmup:
+                    rss_warm = current_rss_kib()
+        seconds = time.perf_counter() - start
+        rss_end = current_rss_kib()
+
+        quantiles = statistics.quantiles(self.latencies, n=100) if len(self.latencies) > 1 else [0.0] * 99
+        return {
+            "requests": len(self.envelopes),
+            "errors": self.errors,
+            "seconds": round(seconds, 2),
+            "throughput_rps": round(len(self.latencies) / seconds, 1),
+            "p50_ms": round(quantiles[49], 3),
+            "p95_ms": round(quantiles[94], 3),
+            "p99_ms": round(quantiles[98], 3),
+            "max_ms": round(max(self.latencies, default=0.0), 3),
+            "rss_start_kib": rss_start,
+            "rss_end_kib": rss_end,
+            "rss_growth_kib_per_1k_requests": round((rss_end - rss_warm) / (len(self.envelopes) - warmup) * 1000, 1),
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file", help="JSONL file with one request envelope per line")
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent invocations, like Lambda containers")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="seconds per Telegram call")
+    parser.add_argument("--generate", type=int, metavar="USERS", help="write synthetic traffic to file and exit")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--http", action="store_true", help="replay over HTTP against skill.server")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_traffic(args.generate, args.file)
+        print("Wrote {} sessions to {}".format(args.generate, args.file))
+        return 0
+
+    log.configure(level="WARNING")
+    sb.persistence_adapter = ReplayPersistenceAdapter()
+    invoke = HttpInvoker(start_server(args.concurrency)) if args.http else handler
+    replay = Replay(load_envelopes(args.file), args.rate, args.concurrency, invoke)
+    with patch.object(PyrogramManager, "client_class", ReplayClient), \
+            patch.object(ReplayClient, "latency", args.telegram_latency), \
+            patch.object(AlexaSettingsService, "fetch_tz_database_name", return_value="Europe/Vienna"), \
+            patch.object(AlexaSettingsService, "get_phone_number", return_value=("+43123456", True)), \
+            patch.object(DirectiveService, "send_speech", return_value=True), \
+            patch("skill.metrics.emit"):
+        report = replay.run()
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print("{:<32} {}".format(key, value))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Simulates a burst of launches against the fake Telegram backend, with Telegram's flood limits enforced per account,
+once without and once with the rate limiter of PyrogramManager.
+
+Every launch ends up as one of:
+    full          all unread dialogs with their telegrams
+    partial       some dialogs pending, their telegrams follow in the next turn
+    rate_limited  answered with a flood wait message, without calling Telegram
+    flood_wait    Telegram sent a FloodWait, which reached the user
+
+Run from the lambda directory:
+    python -m skill_test.benchmarks.simulate_flood_wait --accounts 20 --launches 10
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+from unittest.mock import Mock
+
+import pytz
+from pyrogram.errors import FloodWait
+
+from skill import deadline, log
+from skill.deadline import ALEXA_RESPONSE_BUDGET, Deadline
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.pyrogram.rate_limiter import RateLimited, RateLimiter
+from skill.state import State
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+
+OUTCOMES = ["full", "partial", "rate_limited", "flood_wait"]
+
+
+def _launch(user_id: int) -> Tuple[str, float]:
+    state_manager = SimpleNamespace(state=State(pytz.utc, {"user_id": user_id}), save_to_database=Mock())
+    start = time.perf_counter()
+    with deadline.within(Deadline(ALEXA_RESPONSE_BUDGET)):
+        try:
+            unread_dialogs = PyrogramManager(state_manager).get_unread_dialogs()
+            outcome = "partial" if any(d["telegrams"] is None for d in unread_dialogs) else "full"
+        except RateLimited:
+            outcome = "rate_limited"
+        except FloodWait:
+            outcome = "flood_wait"
+    return outcome, (time.perf_counter() - start) * 1000
+
+
+def run(rate_limiter: Optional[RateLimiter], user_ids: List[int], concurrency: int) -> dict:
+    PyrogramManager.rate_limiter = rate_limiter
+    FakeClient._flood_buckets = {}
+    FakeClient.flood_waits_sent = 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(_launch, user_ids))
+    seconds = time.perf_counter() - start
+
+    outcomes = Counter(outcome for outcome, _ in results)
+    quantiles = statistics.quantiles([ms for _, ms in results], n=100)
+    result = {outcome: outcomes[outcome] for outcome in OUTCOMES}
+    result.update({
+        "telegram_flood_waits": FakeClient.flood_waits_sent,
+        "p50_ms": round(quantiles[49], 1),
+        "p99_ms": round(quantiles[98], 1),
+        "seconds": round(seconds, 2)
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--launches", type=int, default=10, help="launches per account, all at once")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--telegram-rate", type=float, default=0.5, help="get_dialogs per second Telegram allows")
+    parser.add_argument("--telegram-burst", type=int, default=3)
+    parser.add_argument("--penalty", type=int, default=10, help="seconds of a FloodWait")
+    parser.add_argument("--telegram-latency", type=float, default=0.02, help="seconds per Telegram call")
+    args = parser.parse_args()
+
+    log.configure(level="ERROR")
+    PyrogramManager.client_class = FakeClient
+    FakeClient.account = FakeAccount.generate(dialogs=5, unread_per_dialog=(0, 5), group_ratio=0.3, seed=1)
+    FakeClient.latency = args.telegram_latency
+    FakeClient.flood_penalty = args.penalty
+    FakeClient.flood_limits = {"get_dialogs": (args.telegram_rate, args.telegram_burst),
+                               "get_history": (args.telegram_rate * 5, args.telegram_burst * 3)}
+    user_ids = [user_id for user_id in range(1, args.accounts + 1) for _ in range(args.launches)]
+    random.Random(0).shuffle(user_ids)
+
+    columns = OUTCOMES + ["telegram_flood_waits", "p50_ms", "p99_ms", "seconds"]
+    widths = [max(len(c), 8) + 2 for c in columns]
+    print("{:<8}".format("limiter") + "".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for name, rate_limiter in [("off", None), ("on", RateLimiter())]:
+        result = run(rate_limiter, user_ids, args.concurrency)
+        print("{:<8}".format(name) + "".join(str(result[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class _DirectiveHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(stub.delay)
+        with stub.lock:
+            stub.directives.append(body)
+            stub.authorizations.append(self.headers.get('Authorization'))
+        self.send_response(stub.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients which gave up because of a timeout close the connection before we answer
+        pass
+
+
+class DirectiveApiStub:
+    """
+    A local stand-in for the directive endpoint of the Alexa API, which records the directives it receives.
+
+    Use its endpoint as apiEndpoint of the request envelope:
+        with DirectiveApiStub() as stub:
+            req["context"]["System"]["apiEndpoint"] = stub.endpoint
+    """
+
+    def __init__(self, delay: float = 0.0, status: int = 204):
+        self.delay = delay
+        self.status = status
+        self.directives = []  # type: List[dict]
+        self.authorizations = []  # type: List[str]
+        self.lock = threading.Lock()
+        self._server = _QuietHTTPServer(('127.0.0.1', 0), _DirectiveHandler)
+        self._server.stub = self
+
+    @property
+    def endpoint(self) -> str:
+        return 'http://127.0.0.1:{}'.format(self._server.server_port)
+
+    def __enter__(self) -> 'DirectiveApiStub':
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
@@ -0,0 +1,253 @@
+"""
+A deterministic local stand-in for the pyrogram Client, implementing only the methods the skill uses.
+Synthetic accounts are generated from a seed, so every run of a load or scale test sees the same data.
+
+Swap it in with: PyrogramManager.client_class = FakeClient
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from pyrogram.errors import FloodWait, PhoneCodeInvalid
+
+from skill.pyrogram.rate_limiter import TokenBucket
+
+# Media types with the attributes Telegram sends along, so voice output can describe them without a download
+MEDIA_TYPES = ["photo", "voice", "video", "audio", "document", "sticker"]
+STICKER_EMOJIS = ["😀", "👍", "❤", "😂"]
+
+
+def _media(rnd: random.Random, media_type: str) -> SimpleNamespace:
+    if media_type == "photo":
+        return SimpleNamespace(file_id="photo_{}".format(rnd.getrandbits(32)), width=1280, height=720)
+    if media_type in ("voice", "video"):
+        return SimpleNamespace(file_id="{}_{}".format(media_type, rnd.getrandbits(32)), duration=rnd.randint(1, 300))
+    if media_type == "audio":
+        return SimpleNamespace(file_id="audio_{}".format(rnd.getrandbits(32)), duration=rnd.randint(30, 600),
+                               file_name="track_{}.mp3".format(rnd.randint(1, 99)), title=None, performer=None)
+    if media_type == "document":
+        return SimpleNamespace(file_id="document_{}".format(rnd.getrandbits(32)),
+                               file_name="document_{}.pdf".format(rnd.randint(1, 99)))
+    return SimpleNamespace(file_id="sticker_{}".format(rnd.getrandbits(32)), emoji=rnd.choice(STICKER_EMOJIS))
+
+
+def make_message(message_id: int, chat: SimpleNamespace, from_user: Optional[SimpleNamespace], text: str = None,
+                 media_type: str = None, media: SimpleNamespace = None, caption: str = None,
+                 date: int = None) -> SimpleNamespace:
+    message = SimpleNamespace(message_id=message_id, chat=chat, from_user=from_user, text=text, caption=caption,
+                              media=media_type, date=date if date is not None else int(time.time()))
+    for t in MEDIA_TYPES:
+        setattr(message, t, media if t == media_type else None)
+    return message
+
+
+class FakeAccount:
+    """
+    The Telegram data of one user: dialogs, newest first, and their messages, oldest first.
+    """
+
+    def __init__(self, dialogs: List[SimpleNamespace], messages: Dict[int, List[SimpleNamespace]]):
+        self.dialogs = dialogs
+        self.messages = messages
+        # Initialized clients, which receive the updates of this account
+        self.clients = []  # type: List[FakeClient]
+
+    def receive(self, chat_id: int, text: str) -> SimpleNamespace:
+        """
+        A new message from the other side of a dialog, which moves the dialog to the top.
+        """
+        dialog = next(d for d in self.dialogs if d.chat.id == chat_id)
+        chat_messages = self.messages.setdefault(chat_id, [])
+        from_user = SimpleNamespace(id=chat_id, first_name=dialog.chat.first_name or 'Member 0')
+        message = make_message(len(chat_messages) + 1, dialog.chat, from_user, text=text)
+        chat_messages.append(message)
+        dialog.unread_messages_count += 1
+        dialog.top_message = message
+        self.dialogs.remove(dialog)
+        self.dialogs.insert(0, dialog)
+        for client in list(self.clients):
+            for handler in client.handlers:
+                handler.callback(client, message)
+        return message
+
+    @classmethod
+    def generate(cls, dialogs: int = 3, unread_per_dialog: Tuple[int, int] = (2, 2), media_ratio: float = 0.0,
+                 group_ratio: float = 0.0, seed: int = 0) -> 'FakeAccount':
+        """
+        unread_per_dialog is the range the number of unread messages of each dialog is drawn from.
+        Of the unread messages, a media_ratio share are media. A group_ratio share of the dialogs are groups.
+        The newest dialog got its last message just now, every further dialog a minute earlier.
+        """
+        if isinstance(unread_per_dialog, int):
+            unread_per_dialog = (unread_per_dialog, unread_per_dialog)
+        rnd = random.Random(seed)
+        now = int(time.time())
+        fake_dialogs = []
+        messages = {}
+        for idx in range(dialogs):
+            chat_id = 1000 + idx
+            is_group = rnd.random() < group_ratio
+            if is_group:
+                chat = SimpleNamespace(id=chat_id, type='group', first_name=None, title='Group {}'.format(idx))
+                members = [SimpleNamespace(id=100 * chat_id + m, first_name='Member {}'.format(m)) for m in range(3)]
+            else:
+                chat = SimpleNamespace(id=chat_id, type='private', first_name='Contact {}'.format(idx), title=None)
+                members = [SimpleNamespace(id=chat_id, first_name=chat.first_name)]
+
+            unread = rnd.randint(*unread_per_dialog)
+            chat_messages = []
+            for m in range(unread):
+                from_user = rnd.choice(members)
+                date = now - 60 * idx - (unread - 1 - m)
+                if rnd.random() < media_ratio:
+                    media_type = rnd.choice(MEDIA_TYPES)
+                    caption = 'Caption {}'.format(m) if media_type in ("photo", "video") and rnd.random() < 0.5 \
+                        else None
+                    chat_messages.append(make_message(m + 1, chat, from_user, media_type=media_type,
+                                                      media=_media(rnd, media_type), caption=caption, date=date))
+                else:
+                    chat_messages.append(make_message(m + 1, chat, from_user, text='Message {} in {}'.format(m, idx),
+                                                      date=date))
+            messages[chat_id] = chat_messages
+            top_message = chat_messages[-1] if chat_messages else None
+            fake_dialogs.append(SimpleNamespace(chat=chat, unread_messages_count=unread, unread_mentions_count=0,
+                                                is_pinned=False, top_message=top_message))
+        return cls(fake_dialogs, messages)
+
+
+class FakeClient:
+    # The account every new client is logged in to
+    account = FakeAccount.generate()
+    # Seconds every call to the API takes
+    latency = 0.0
+    # method name -> seconds of the FloodWait the next call of that method raises
+    flood_waits = {}  # type: Dict[str, int]
+    # method -> calls per second and burst Telegram allows per account. A call over the limit raises a FloodWait of
+    # flood_penalty seconds, calls during the penalty raise one for the rest of it.
+    flood_limits = {}  # type: Dict[str, Tuple[float, int]]
+    flood_penalty = 5
+    # The FloodWaits raised because of flood_limits
+    flood_waits_sent = 0
+    _flood_buckets = {}  # type: Dict[Tuple[str, int], TokenBucket]
+    _flood_lock = threading.Lock()
+    # The only phone code sign_in accepts
+    phone_code = '12345'
+
+    def __init__(self, storage, api_id=None, api_hash=None):
+        self.storage = storage
+        self.account = type(self).account
+        self.calls = []  # type: List[str]
+        self.handlers = []
+        self.is_initialized = False
+        self.is_connected = False
+
+    def _call(self, method: str):
+        self.calls.append(method)
+        if self.latency:
+            time.sleep(self.latency)
+        wait = type(self).flood_waits.pop(method, None)
+        if wait is not None:
+            raise FloodWait(x=wait)
+        self._check_flood_limit(method)
+
+    def _check_flood_limit(self, method: str):
+        limit = type(self).flood_limits.get(method)
+        if limit is None:
+            return
+        with FakeClient._flood_lock:
+            bucket = FakeClient._flood_buckets.setdefault((method, self.storage.state.user_id), TokenBucket(*limit))
+            now = time.monotonic()
+            if bucket.wait_seconds(now) > 0:
+                bucket.blocked_until = max(bucket.blocked_until, now + self.flood_penalty)
+                FakeClient.flood_waits_sent += 1
+                raise FloodWait(x=math.ceil(bucket.blocked_until - now))
+            bucket.take()
+
+    def connect(self) -> bool:
+        self._call('connect')
+        self.is_connected = True
+        return bool(self.storage.state.user_id)
+
+    def disconnect(self):
+        self._call('disconnect')
+        self.is_connected = False
+
+    def add_handler(self, handler):
+        self.handlers.append(handler)
+
+    def initialize(self):
+        self.is_initialized = True
+        self.account.clients.append(self)
+
+    def terminate(self):
+        self.is_initialized = False
+        self.account.clients.remove(self)
+
+    def send_code(self, phone_number: str):
+        self._call('send_code')
+        return SimpleNamespace(phone_code_hash='phone_code_hash_{}'.format(phone_number))
+
+    def sign_in(self, phone_number: str, phone_code_hash: str, phone_code: str):
+        self._call('sign_in')
+        if phone_code != self.phone_code:
+            raise PhoneCodeInvalid()
+        self.storage.state.user_id = 4242
+        self.storage.state_manager.save_to_database()
+        return SimpleNamespace(id=4242, phone_number=phone_number)
+
+    def get_dialogs(self, limit: int = 0) -> List[SimpleNamespace]:
+        self._call('get_dialogs')
+        return self.account.dialogs[:limit] if limit else list(self.account.dialogs)
+
+    def get_history(self, chat_id: int, limit: int = 100) -> List[SimpleNamespace]:
+        self._call('get_history')
+        # Like Telegram, the newest message comes first
+        return list(reversed(self.account.messages.get(chat_id, [])[-limit:]))
+
+    def read_history(self, chat_id: int) -> bool:
+        self._call('read_history')
+        for dialog in self.account.dialogs:
+            if dialog.chat.id == chat_id:
+                dialog.unread_messages_count = 0
+        return True
+
+    def download_media(self, message: SimpleNamespace, *args, **kwargs) -> str:
+        # The skill must never get here, see skill.pyrogram.media.block_file_transfers
+        self._call('download_media')
+        return '/tmp/{}'.format(getattr(message, message.media).file_id)
+
+
+class AsyncFakeClient(FakeClient):
+    """
+    The fake client with coroutines, like pyrogram clients on a running event loop. Latency doesn't block the loop.
+    """
+
+    async def _acall(self, method: str):
+        self.calls.append(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        wait = type(self).flood_waits.pop(method, None)
+        if wait is not None:
+            raise FloodWait(x=wait)
+        self._check_flood_limit(method)
+
+    async def connect(self) -> bool:
+        await self._acall('connect')
+        self.is_connected = True
+        return bool(self.storage.state.user_id)
+
+    async def disconnect(self):
+        await self._acall('disconnect')
+        self.is_connected = False
+
+    async def get_dialogs(self, limit: int = 0) -> List[SimpleNamespace]:
+        await self._acall('get_dialogs')
+        return self.account.dialogs[:limit] if limit else list(self.account.dialogs)
+
+    async def get_history(self, chat_id: int, limit: int = 100) -> List[SimpleNamespace]:
+        await self._acall('get_history')
+        return list(reversed(self.account.messages.get(chat_id, [])[-limit:]))
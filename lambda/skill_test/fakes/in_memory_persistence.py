@@ -0,0 +1,39 @@
+import copy
+from typing import Callable, Dict, Iterator, Tuple
+
+from ask_sdk_core.attributes_manager import AbstractPersistenceAdapter
+from ask_sdk_dynamodb.partition_keygen import user_id_partition_keygen
+from ask_sdk_model import RequestEnvelope
+
+from skill.storage import set_attributes
+
+
+class InMemoryPersistenceAdapter(AbstractPersistenceAdapter):
+    """
+    Keeps the persistent attributes in a dict instead of DynamoDB. Attributes are copied on load and save,
+    so like with DynamoDB a handler never changes the stored item in place.
+
+    Swap it in with: sb.persistence_adapter = InMemoryPersistenceAdapter()
+    It is a state store of the poller as well, like the DynamoDbStateStore.
+    """
+
+    def __init__(self, partition_keygen: Callable[[RequestEnvelope], str] = user_id_partition_keygen):
+        self.partition_keygen = partition_keygen
+        self.items = {}  # type: Dict[str, Dict]
+
+    def get_attributes(self, request_envelope: RequestEnvelope) -> Dict:
+        return copy.deepcopy(self.items.get(self.partition_keygen(request_envelope), {}))
+
+    def save_attributes(self, request_envelope: RequestEnvelope, attributes: Dict):
+        # Like the PartialUpdateDynamoDbAdapter, the other attributes of the item are kept
+        self.update_attributes(self.partition_keygen(request_envelope), attributes)
+
+    def delete_attributes(self, request_envelope: RequestEnvelope):
+        self.items.pop(self.partition_keygen(request_envelope), None)
+
+    def scan(self) -> Iterator[Tuple[str, Dict]]:
+        for key, attributes in list(self.items.items()):
+            yield key, copy.deepcopy(attributes)
+
+    def update_attributes(self, key: str, fields: Dict):
+        set_attributes(self.items.setdefault(key, {}), copy.deepcopy(fields))
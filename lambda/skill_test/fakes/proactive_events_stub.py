@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs
+
+from skill.notifications import Notification
+
+
+class _ProactiveEventsHandler(BaseHTTPRequestHandler):
+    # Keeps connections alive like the Alexa API, so benchmarks don't measure connection setup
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.path == '/auth/o2/token':
+            form = parse_qs(body.decode())
+            with stub.lock:
+                stub.token_requests.append({name: values[0] for name, values in form.items()})
+            payload = json.dumps({"access_token": "token", "expires_in": 3600, "token_type": "bearer"}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        time.sleep(stub.delay)
+        with stub.lock:
+            stub.events.append(json.loads(body))
+            stub.authorizations.append(self.headers.get('Authorization'))
+            status = stub.statuses.pop(0) if stub.statuses else 202
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class ProactiveEventsApiStub:
+    """
+    A local stand-in for the Proactive Events API of Alexa and the token endpoint of Login with Amazon.
+    Events are accepted with 202, unless statuses lists other status codes for the next events.
+
+        with ProactiveEventsApiStub() as stub:
+            sender = ProactiveEventsSender("id", "secret", api_endpoint=stub.endpoint, token_url=stub.token_url)
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.statuses = []  # type: List[int]
+        self.events = []  # type: List[dict]
+        self.authorizations = []  # type: List[str]
+        self.token_requests = []  # type: List[dict]
+        self.lock = threading.Lock()
+        self._server = _QuietHTTPServer(('127.0.0.1', 0), _ProactiveEventsHandler)
+        self._server.stub = self
+
+    @property
+    def endpoint(self) -> str:
+        return 'http://127.0.0.1:{}'.format(self._server.server_port)
+
+    @property
+    def token_url(self) -> str:
+        return self.endpoint + '/auth/o2/token'
+
+    def __enter__(self) -> 'ProactiveEventsApiStub':
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+class RecordingSender:
+    """
+    A sender which delivers every notification in the process, for tests and benchmarks of the pipeline itself.
+    """
+
+    def __init__(self):
+        self.batches = []  # type: List[List[Notification]]
+
+    def send(self, notifications: List[Notification]) -> List[bool]:
+        self.batches.append(notifications)
+        return [True] * len(notifications)
+
+    @property
+    def notifications(self) -> List[Notification]:
+        return [n for batch in self.batches for n in batch]
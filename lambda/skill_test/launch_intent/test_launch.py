@@ -1,22 +1,31 @@
-import unittest
+import copy
+import time
 from unittest.mock import Mock, patch
 
 from skill.helper_functions import remove_ssml_tags, ExploreIntents
 from skill.interceptors import StateRequestInterceptor
 from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.pyrogram.rate_limiter import RateLimited
+from skill.services import directive_service
 from skill.telegram_connect import sb
+from skill_test.fakes.directive_api_stub import DirectiveApiStub
 from skill_test.launch_intent.launch_request import launch_request
-from skill_test.util import update_request, get_i18n_for_tests
+from skill_test.util import update_request, get_i18n_for_tests, SkillTestCase
 
 
-class LaunchIntentTest(unittest.TestCase):
+class LaunchIntentTest(SkillTestCase):
     def setUp(self) -> None:
+        super().setUp()
         self.handler = sb.lambda_handler()
-        StateRequestInterceptor.process = Mock(return_value=[])
+        patcher = patch.object(StateRequestInterceptor, "process", Mock(return_value=[]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     @patch("skill.telegram_connect.StateManager")
     @patch("skill.telegram_connect.PyrogramManager", spec=PyrogramManager)
     def test_launch_intent(self, mock_pyrogram_manager, mock_state_manager):
+        mock_state_manager.return_value.state.unread_digest = None
+        mock_pyrogram_manager.expected_unread_seconds = Mock(return_value=0.1)
         for locale in ["en-US", "de-DE"]:
             self._test_new_user_who_has_not_completed_setup(locale, mock_pyrogram_manager)
             self._test_user_who_has_no_new_telegrams(locale, mock_pyrogram_manager)
@@ -57,3 +66,41 @@ class LaunchIntentTest(unittest.TestCase):
 
         self.assertEqual(event.get("sessionAttributes").get("explore_intent"), ExploreIntents.EXPLORE_MESSAGE_INTENT)
         self.assertEqual(event.get('sessionAttributes').get('unread_dialogs'), unread_telegrams)
+
+    @patch("skill.telegram_connect.StateManager")
+    @patch("skill.telegram_connect.PyrogramManager", spec=PyrogramManager)
+    def test_progressive_response(self, mock_pyrogram_manager, mock_state_manager):
+        mock_state_manager.return_value.state.unread_digest = None
+        i18n = get_i18n_for_tests("en-US")
+        req = update_request(copy.deepcopy(launch_request), "en-US")
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.expected_unread_seconds = Mock(return_value=2.0)
+        mock_pyrogram_manager.get_unread_dialogs = Mock(side_effect=lambda: time.sleep(0.2) or [])
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        with patch.object(directive_service, "PROGRESSIVE_RESPONSE_THRESHOLD", 1.0), DirectiveApiStub() as stub:
+            req["context"]["System"]["apiEndpoint"] = stub.endpoint
+            self.handler(req, None)
+
+        self.assertEqual(len(stub.directives), 1)
+        self.assertEqual(stub.directives[0]["header"]["requestId"], req["request"]["requestId"])
+        self.assertEqual(stub.directives[0]["directive"]["speech"], "<speak>" + i18n.FETCHING_TELEGRAMS + "</speak>")
+
+    @patch("skill.telegram_connect.StateManager")
+    @patch("skill.telegram_connect.PyrogramManager", spec=PyrogramManager)
+    def test_flood_wait(self, mock_pyrogram_manager, mock_state_manager):
+        mock_state_manager.return_value.state.unread_digest = None
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.expected_unread_seconds = Mock(return_value=0.1)
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+        for locale in ["en-US", "de-DE"]:
+            i18n = get_i18n_for_tests(locale)
+            req = update_request(copy.deepcopy(launch_request), locale)
+            for seconds, speech in [(30, i18n.FLOOD_WAIT_SECONDS.format(30)),
+                                    (3600, i18n.FLOOD_WAIT_MINUTES.format(60))]:
+                mock_pyrogram_manager.get_unread_dialogs = Mock(side_effect=RateLimited(x=seconds))
+
+                event = self.handler(req, None)
+
+                self.assertEqual(remove_ssml_tags(event["response"]["outputSpeech"]["ssml"]), remove_ssml_tags(speech))
+                self.assertTrue(event["response"]["shouldEndSession"])
@@ -1,11 +1,12 @@
-import unittest
+import copy
 from unittest.mock import Mock, PropertyMock, patch
 
 from skill.helper_functions import remove_ssml_tags
 from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.pyrogram.text_normalizer import CODE_KEY, EMOJI_KEY, TRUNCATION_MARK
 from skill.telegram_connect import sb
 from skill_test.message_intent.message_request import message_request
-from skill_test.util import update_request, get_i18n_for_tests
+from skill_test.util import update_request, get_i18n_for_tests, SkillTestCase
 
 mock_data = [
     {
@@ -35,13 +36,15 @@ expected_results = {
 
 
 
-class MessageIntentTest(unittest.TestCase):
+class MessageIntentTest(SkillTestCase):
     def setUp(self) -> None:
+        super().setUp()
         self.handler = sb.lambda_handler()
 
     @patch("skill.intents.message_intent.StateManager")
     @patch("skill.intents.message_intent.PyrogramManager", spec=PyrogramManager)
     def test_message_intent(self, mock_pyrogram_manager, mock_state_manager):
+        mock_pyrogram_manager.expected_unread_seconds = Mock(return_value=0.1)
         for locale in ["en-US", "de-DE"]:
             mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
             mock_pyrogram_manager.return_value = mock_pyrogram_manager
@@ -73,3 +76,91 @@ class MessageIntentTest(unittest.TestCase):
             output_text = event.get('response').get('outputSpeech').get('ssml')
 
             self.assertEqual(output_text, expected_results[locale][new_telegrams_index])
+
+    @patch("skill.intents.message_intent.StateManager")
+    @patch("skill.intents.message_intent.PyrogramManager", spec=PyrogramManager)
+    def test_pending_dialog(self, mock_pyrogram_manager, mock_state_manager):
+        i18n = get_i18n_for_tests("en-US")
+        req = update_request(copy.deepcopy(message_request), "en-US")
+        pending = dict(mock_data[1], telegrams=None, unread_count=2)
+        req["session"]["attributes"]["unread_dialogs"] = [mock_data[0], pending]
+        req["session"]["attributes"]["unread_dialog_index"] = 1
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.get_unread_telegrams = Mock(return_value=mock_data[1]["telegrams"])
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        # Out of time: Alexa asks again instead of waiting for Telegram
+        mock_pyrogram_manager.can_fetch_history = Mock(return_value=False)
+        event = self.handler(req, None)
+        output_text = remove_ssml_tags(event.get('response').get('outputSpeech').get('ssml'))
+        self.assertEqual(output_text, i18n.TELEGRAMS_STILL_LOADING.format("My Group"))
+        mock_pyrogram_manager.get_unread_telegrams.assert_not_called()
+
+        mock_pyrogram_manager.can_fetch_history = Mock(return_value=True)
+        event = self.handler(req, None)
+        output_text = event.get('response').get('outputSpeech').get('ssml')
+        self.assertEqual(output_text, expected_results["en-US"][1])
+        mock_pyrogram_manager.get_unread_telegrams.assert_called_once_with("12341234", 2)
+
+    @patch("skill.intents.message_intent.StateManager")
+    @patch("skill.intents.message_intent.PyrogramManager", spec=PyrogramManager)
+    def test_other_dialogs_are_announced(self, mock_pyrogram_manager, mock_state_manager):
+        req = update_request(copy.deepcopy(message_request), "en-US")
+        others = [{"name": "Group {}".format(idx), "telegrams": None, "is_group": True, "chat_id": idx,
+                   "unread_count": idx} for idx in range(1, 9)]
+        req["session"]["attributes"]["unread_dialogs"] = [mock_data[0], mock_data[0], mock_data[1]] + others
+        req["session"]["attributes"]["unread_dialog_index"] = 2
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        event = self.handler(req, None)
+
+        output_text = remove_ssml_tags(event.get('response').get('outputSpeech').get('ssml'))
+        self.assertIn("You also have unread telegrams in: Group 1 with 1, Group 2 with 2, Group 3 with 3, "
+                      "Group 4 with 4, Group 5 with 5 and 3 other chats.", output_text)
+        self.assertTrue(event.get('response').get('shouldEndSession'))
+        # Announced dialogs are neither fetched nor marked as read
+        mock_pyrogram_manager.get_unread_telegrams.assert_not_called()
+        mock_pyrogram_manager.read_history.assert_called_once_with("12341234")
+
+    @patch("skill.intents.message_intent.StateManager")
+    @patch("skill.intents.message_intent.PyrogramManager", spec=PyrogramManager)
+    def test_normalized_telegrams(self, mock_pyrogram_manager, mock_state_manager):
+        i18n = get_i18n_for_tests("en-US")
+        req = update_request(copy.deepcopy(message_request), "en-US")
+        telegrams = [("A long story" + TRUNCATION_MARK, "Bello"), (EMOJI_KEY, "Bello"), (CODE_KEY, "Bello")]
+        req["session"]["attributes"]["unread_dialogs"] = [dict(mock_data[0], telegrams=telegrams)]
+        req["session"]["attributes"]["unread_dialog_index"] = 0
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        event = self.handler(req, None)
+
+        output_text = remove_ssml_tags(event.get('response').get('outputSpeech').get('ssml'))
+        self.assertIn("A long story{} {}".format(TRUNCATION_MARK, i18n.MESSAGE_CONTINUES), output_text)
+        self.assertIn(i18n.EMOJI_RECEIVED.format("Bello"), output_text)
+        self.assertIn(i18n.CODE_RECEIVED.format("Bello"), output_text)
+
+    @patch("skill.intents.message_intent.StateManager")
+    @patch("skill.intents.message_intent.PyrogramManager", spec=PyrogramManager)
+    def test_media_descriptions(self, mock_pyrogram_manager, mock_state_manager):
+        req = update_request(copy.deepcopy(message_request), "en-US")
+        telegrams = [({"type": "voice", "duration": 12}, "Bello"),
+                     ({"type": "document", "file_name": "invoice.pdf"}, "Bello"),
+                     ({"type": "video", "duration": 185, "caption": "Our trip"}, "Bello"),
+                     ({"type": "sticker", "emoji": "👍"}, "Bello"),
+                     ({"type": "audio", "duration": 200, "title": "Song", "performer": "Band"}, "Bello")]
+        req["session"]["attributes"]["unread_dialogs"] = [dict(mock_data[0], telegrams=telegrams)]
+        req["session"]["attributes"]["unread_dialog_index"] = 0
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        event = self.handler(req, None)
+
+        output_text = remove_ssml_tags(event.get('response').get('outputSpeech').get('ssml'))
+        self.assertIn("Bello sent a voice message. Length: 12 seconds.", output_text)
+        self.assertIn("Bello sent a document. File name: invoice.pdf.", output_text)
+        self.assertIn("Bello sent a video. Length: 3 minutes. Caption: Our trip", output_text)
+        self.assertIn("Bello sent a sticker: thumbs up.", output_text)
+        self.assertIn("Bello sent an audio file. Title: Song by Band. Length: 3 minutes.", output_text)
+        self.assertNotIn("Bello wrote", output_text)
@@ -0,0 +1,140 @@
+import asyncio
+import pickle
+import time
+import unittest
+from unittest.mock import patch
+
+from skill.poller import PollerStateManager
+from skill.pyrogram.client_host import ClientHost
+from skill_test.fakes.fake_telegram import AsyncFakeClient
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+from skill_test.util import capture_metrics
+
+
+class _CountingClient(AsyncFakeClient):
+    connecting = 0
+    max_connecting = 0
+
+    async def connect(self) -> bool:
+        _CountingClient.connecting += 1
+        _CountingClient.max_connecting = max(_CountingClient.max_connecting, _CountingClient.connecting)
+        try:
+            return await super().connect()
+        finally:
+            _CountingClient.connecting -= 1
+
+
+class ClientHostTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = patch.object(ClientHost, "client_class", _CountingClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _CountingClient.latency = 0.01
+        _CountingClient.max_connecting = 0
+        self.store = InMemoryPersistenceAdapter()
+
+    def _account(self, key, user_id=4242):
+        return key, PollerStateManager(self.store, key, {"user_id": user_id})
+
+    def test_clients_start_in_batches(self):
+        async def scenario():
+            host = ClientHost(max_connecting=2, batch_size=4, batch_interval=0.05)
+            start = time.perf_counter()
+            await host.start([self._account(str(idx)) for idx in range(10)])
+            return host, time.perf_counter() - start
+
+        host, seconds = asyncio.run(scenario())
+
+        self.assertEqual(len(host.clients), 10)
+        self.assertEqual(_CountingClient.max_connecting, 2)
+        # Three batches, two intervals
+        self.assertGreaterEqual(seconds, 2 * 0.05)
+
+    def test_not_authorized_accounts_are_not_hosted(self):
+        async def scenario():
+            host = ClientHost()
+            await host.start([self._account("a"), self._account("b", user_id=0)])
+            return host
+
+        self.assertEqual(list(asyncio.run(scenario()).clients), ["a"])
+
+    def test_least_recently_used_idle_client_is_evicted(self):
+        async def scenario():
+            host = ClientHost(max_clients=3)
+            await host.start([self._account(key) for key in "abc"])
+            async with host.use("a"):
+                pass
+            async with host.use("b"):
+                # b is in use, so c is evicted, even though b was used before
+                async with host.use(*self._account("d")):
+                    pass
+            return host
+
+        host = asyncio.run(scenario())
+
+        self.assertEqual(list(host.clients), ["a", "b", "d"])
+        self.assertEqual(host.evictions, 1)
+
+    def test_memory_budget_evicts_clients(self):
+        async def scenario():
+            host = ClientHost(memory_budget=2048)
+            await host.start([self._account(key) for key in "ab"])
+            async with host.use("a"):
+                # The peer cache of a grows while it is used
+                host.clients["a"].state_manager.state.peers.extend([[idx, idx, "user", None, None]
+                                                                   for idx in range(200)])
+            async with host.use("b"):
+                pass
+            return host
+
+        host = asyncio.run(scenario())
+
+        self.assertEqual(list(host.clients), ["b"])
+        self.assertEqual(host.evictions, 1)
+
+    def test_memory_is_measured_when_the_state_changes(self):
+        async def scenario():
+            host = ClientHost()
+            await host.start([self._account("a")])
+            return host
+
+        hosted = asyncio.run(scenario()).clients["a"]
+        with patch("skill.pyrogram.client_host.pickle.dumps", wraps=pickle.dumps) as mock_dumps:
+            memory_bytes = hosted.memory_bytes()
+            self.assertEqual(hosted.memory_bytes(), memory_bytes)
+            self.assertEqual(mock_dumps.call_count, 1)
+
+            hosted.state_manager.state.peers.append([1, 1, "user", None, None])
+            self.assertGreater(hosted.memory_bytes(), memory_bytes)
+            self.assertEqual(mock_dumps.call_count, 2)
+
+    def test_idle_clients_are_evicted(self):
+        async def scenario():
+            host = ClientHost(idle_seconds=0.05)
+            await host.start([self._account(key) for key in "ab"])
+            await asyncio.sleep(0.06)
+            async with host.use("b"):
+                pass
+            return host, await host.evict_idle()
+
+        host, evicted = asyncio.run(scenario())
+
+        self.assertEqual(evicted, 1)
+        self.assertEqual(list(host.clients), ["b"])
+
+    def test_stats(self):
+        async def scenario():
+            host = ClientHost()
+            await host.start([self._account(key) for key in "ab"])
+            async with host.use("a") as client:
+                await client.get_dialogs()
+            return host
+
+        host = asyncio.run(scenario())
+        with capture_metrics() as flushed:
+            host.publish_metrics()
+
+        self.assertEqual([c["calls"] for c in host.client_stats()], [0, 1])
+        self.assertEqual(host.aggregate_stats()["clients"], 2)
+        self.assertEqual(flushed[0].counters["host.clients"], 2)
+        self.assertGreaterEqual(host.aggregate_stats()["connect_p50_ms"], 10)
@@ -0,0 +1,64 @@
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytz
+
+from skill.pyrogram.media import FileTransferBlocked, describe_media
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.pyrogram.rate_limiter import RateLimiter
+from skill.state import State
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient, make_message
+
+CHAT = SimpleNamespace(id=1000, type='private', first_name='Bello', title=None)
+
+
+def _media_message(media_type, caption=None, **attributes):
+    return make_message(1, CHAT, None, media_type=media_type, media=SimpleNamespace(file_id="file", **attributes),
+                        caption=caption)
+
+
+class MediaTest(unittest.TestCase):
+    def setUp(self) -> None:
+        for patcher in [patch.object(PyrogramManager, "client_class", FakeClient),
+                        patch.object(PyrogramManager, "rate_limiter", RateLimiter()),
+                        patch.object(FakeClient, "latency", 0.0),
+                        patch.object(FakeClient, "account", FakeAccount.generate(dialogs=3, unread_per_dialog=4,
+                                                                                 media_ratio=1.0, seed=5))]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_descriptions(self):
+        self.assertEqual(describe_media(_media_message("voice", duration=12)), {"type": "voice", "duration": 12})
+        self.assertEqual(describe_media(_media_message("audio", duration=200, file_name="song.mp3", title="Song",
+                                                       performer=None)),
+                         {"type": "audio", "duration": 200, "file_name": "song.mp3", "title": "Song"})
+        self.assertEqual(describe_media(_media_message("sticker", emoji="👍")), {"type": "sticker", "emoji": "👍"})
+        self.assertEqual(describe_media(_media_message("photo", caption="Look https://example.com/x", width=1)),
+                         {"type": "photo", "caption": "Look example.com"})
+        # E.g.: a location
+        self.assertIsNone(describe_media(make_message(1, CHAT, None, media_type="location")))
+
+    def test_media_is_never_downloaded(self):
+        pyrogram_manager = PyrogramManager(SimpleNamespace(state=State(pytz.utc, {"user_id": 4242}),
+                                                           save_to_database=Mock()))
+
+        unread_dialogs = pyrogram_manager.get_unread_dialogs()
+
+        telegrams = [telegram for dialog in unread_dialogs for telegram, _ in dialog["telegrams"]]
+        self.assertEqual(len(telegrams), 12)
+        self.assertTrue(all(isinstance(telegram, dict) for telegram in telegrams))
+        self.assertNotIn('download_media', pyrogram_manager.client.calls)
+        message = FakeClient.account.messages[1000][0]
+        with self.assertRaises(FileTransferBlocked):
+            pyrogram_manager.client.download_media(message)
+        self.assertNotIn('download_media', pyrogram_manager.client.calls)
+
+    def test_durations_from_dynamodb_are_cast(self):
+        dialog = {"chat_id": Decimal(1000), "unread_count": Decimal(1),
+                  "telegrams": [[{"type": "voice", "duration": Decimal(12)}, "Bello"]]}
+
+        state = State(pytz.utc, {"unread_digest": {"dialogs": [dialog], "updated_at": Decimal(0)}})
+
+        self.assertIs(type(state.unread_digest["dialogs"][0]["telegrams"][0][0]["duration"]), int)
@@ -0,0 +1,192 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytz
+from pyrogram.errors import FloodWait
+
+from skill.deadline import Deadline
+from skill.digest import build_digest
+from skill.pyrogram.pyrogram_manager import ClientCache, PyrogramManager
+from skill.pyrogram.rate_limiter import RateLimited, RateLimiter
+from skill.state import State
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+
+
+def _state_manager(user_id=4242):
+    return SimpleNamespace(state=State(pytz.utc, {"user_id": user_id}), save_to_database=Mock())
+
+
+class PyrogramManagerTest(unittest.TestCase):
+    """
+    Runs PyrogramManager against the fake Telegram backend, see PyrogramTest for the real API.
+    """
+
+    def setUp(self) -> None:
+        for patcher in [patch.object(PyrogramManager, "client_class", FakeClient),
+                        patch.object(PyrogramManager, "rate_limiter", RateLimiter()),
+                        patch.object(FakeClient, "flood_limits", {}),
+                        patch.object(FakeClient, "_flood_buckets", {}),
+                        patch.object(FakeClient, "flood_waits_sent", 0)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        FakeClient.account = FakeAccount.generate(dialogs=3, unread_per_dialog=(1, 5), media_ratio=0.3,
+                                                  group_ratio=0.3, seed=7)
+        FakeClient.latency = 0.0
+        FakeClient.flood_waits = {}
+
+    def test_accounts_are_deterministic(self):
+        first = FakeAccount.generate(dialogs=10, unread_per_dialog=(0, 20), media_ratio=0.5, seed=1)
+        second = FakeAccount.generate(dialogs=10, unread_per_dialog=(0, 20), media_ratio=0.5, seed=1)
+
+        self.assertEqual([d.unread_messages_count for d in first.dialogs],
+                         [d.unread_messages_count for d in second.dialogs])
+        self.assertEqual([m.media for msgs in first.messages.values() for m in msgs],
+                         [m.media for msgs in second.messages.values() for m in msgs])
+
+        messages = [m for msgs in first.messages.values() for m in msgs]
+        media_share = sum(1 for m in messages if m.media) / len(messages)
+        self.assertAlmostEqual(media_share, 0.5, delta=0.15)
+
+    def test_unread_dialogs(self):
+        pyrogram_manager = PyrogramManager(_state_manager())
+
+        unread_dialogs = pyrogram_manager.get_unread_dialogs()
+
+        self.assertTrue(pyrogram_manager.get_is_authorized())
+        self.assertEqual(len(unread_dialogs), 3)
+        # Ranked, so not in the order of Telegram
+        fake_dialogs = {d.chat.id: d for d in FakeClient.account.dialogs}
+        self.assertEqual({dialog["chat_id"] for dialog in unread_dialogs}, set(fake_dialogs))
+        for dialog in unread_dialogs:
+            fake_dialog = fake_dialogs[dialog["chat_id"]]
+            fake_messages = FakeClient.account.messages[fake_dialog.chat.id]
+            self.assertEqual(dialog["is_group"], fake_dialog.chat.type == 'group')
+            self.assertEqual(len(dialog["telegrams"]), len(fake_messages))
+            for telegram, message in zip(dialog["telegrams"], fake_messages):
+                if message.media:
+                    self.assertEqual(telegram[0]["type"], message.media)
+                else:
+                    self.assertEqual(telegram[0], message.text)
+
+        pyrogram_manager.read_history(unread_dialogs[0]["chat_id"])
+        self.assertEqual(len(pyrogram_manager.get_unread_dialogs()), 2)
+
+    def test_dialogs_without_time_left_are_pending(self):
+        FakeClient.latency = 0.1
+        with patch.object(PyrogramManager, "history_seconds", 0.1):
+            pyrogram_manager = PyrogramManager(_state_manager(), Deadline(0.35))
+
+            unread_dialogs = pyrogram_manager.get_unread_dialogs()
+
+        # connect and get_dialogs leave time for one history
+        self.assertIsNotNone(unread_dialogs[0]["telegrams"])
+        self.assertEqual([d["telegrams"] for d in unread_dialogs[1:]], [None, None])
+        self.assertFalse(pyrogram_manager.can_fetch_history())
+
+        pending = unread_dialogs[1]
+        telegrams = PyrogramManager(_state_manager()).get_unread_telegrams(pending["chat_id"], pending["unread_count"])
+        self.assertEqual(len(telegrams), pending["unread_count"])
+
+    def test_not_authorized_user(self):
+        self.assertFalse(PyrogramManager(_state_manager(user_id=0)).get_is_authorized())
+
+    def test_flood_wait_is_injected(self):
+        FakeClient.flood_waits = {"get_dialogs": 30}
+        pyrogram_manager = PyrogramManager(_state_manager())
+
+        with self.assertRaises(FloodWait) as cm:
+            pyrogram_manager.get_unread_dialogs()
+        self.assertEqual(cm.exception.x, 30)
+        # The FloodWait is only raised once
+        self.assertEqual(len(pyrogram_manager.client.get_dialogs(limit=3)), 3)
+        # but the rate limiter waits it out, without calling Telegram
+        calls = len(pyrogram_manager.client.calls)
+        with self.assertRaises(RateLimited):
+            pyrogram_manager.get_unread_dialogs()
+        self.assertEqual(len(pyrogram_manager.client.calls), calls)
+
+    def test_short_flood_wait_is_queued(self):
+        FakeClient.flood_waits = {"get_dialogs": 0}
+
+        self.assertEqual(len(PyrogramManager(_state_manager()).get_unread_dialogs()), 3)
+
+    def test_rate_limited_histories_are_pending(self):
+        with patch.object(PyrogramManager, "rate_limiter", RateLimiter(rates={"get_history": (0.1, 2)})):
+            unread_dialogs = PyrogramManager(_state_manager()).get_unread_dialogs()
+
+        self.assertEqual([d["telegrams"] is None for d in unread_dialogs], [False, False, True])
+
+    def test_burst_of_launches_stays_within_telegram_limits(self):
+        FakeClient.flood_limits = {"get_dialogs": (1.0, 5)}
+        launches = [PyrogramManager(_state_manager()) for _ in range(8)]
+
+        def launch(pyrogram_manager):
+            try:
+                return pyrogram_manager.get_unread_dialogs()
+            except RateLimited:
+                return None
+
+        with ThreadPoolExecutor(max_workers=len(launches)) as executor:
+            results = list(executor.map(launch, launches))
+
+        # The sixth launch is queued for a second, later ones are answered without calling Telegram
+        self.assertEqual(sum(1 for r in results if r is None), 2)
+        self.assertEqual(FakeClient.flood_waits_sent, 0)
+
+    def test_latency_is_injected(self):
+        FakeClient.latency = 0.01
+        pyrogram_manager = PyrogramManager(_state_manager())
+        start = time.perf_counter()
+
+        pyrogram_manager.get_unread_dialogs()
+
+        # get_dialogs plus one get_history per unread dialog
+        self.assertGreaterEqual(time.perf_counter() - start, 4 * FakeClient.latency)
+
+    def test_many_accounts(self):
+        for seed in range(200):
+            FakeClient.account = FakeAccount.generate(dialogs=5, unread_per_dialog=(0, 30), media_ratio=0.2,
+                                                      seed=seed)
+            dialogs = FakeClient.account.dialogs[:PyrogramManager.DIALOG_LIMIT]
+            expected = sum(1 for d in dialogs if d.unread_messages_count)
+
+            # Every account has its own rate limits
+            self.assertEqual(len(PyrogramManager(_state_manager(user_id=seed + 1)).get_unread_dialogs()), expected)
+
+    def test_histories_of_top_dialogs_only(self):
+        FakeClient.account = FakeAccount.generate(dialogs=300, unread_per_dialog=(1, 20), group_ratio=0.9, seed=3)
+        pyrogram_manager = PyrogramManager(_state_manager())
+
+        unread_dialogs = pyrogram_manager.get_unread_dialogs()
+
+        self.assertEqual(len(unread_dialogs), PyrogramManager.DIALOG_LIMIT)
+        self.assertEqual(pyrogram_manager.client.calls.count('get_history'), PyrogramManager.HISTORY_LIMIT)
+        fetched = [dialog for dialog in unread_dialogs if dialog["telegrams"] is not None]
+        self.assertEqual(fetched, unread_dialogs[:PyrogramManager.HISTORY_LIMIT])
+        # Private chats are ranked before the groups
+        self.assertFalse(any(dialog["is_group"] for dialog in fetched))
+
+    def test_cached_client_is_handed_to_each_request(self):
+        client_cache = ClientCache()
+        first, second = _state_manager(), _state_manager()
+
+        with patch.object(PyrogramManager, "client_cache", client_cache):
+            client = PyrogramManager(first).client
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                managers = list(executor.map(lambda _: PyrogramManager(second), range(32)))
+
+        self.assertTrue(all(manager.client is client for manager in managers))
+        self.assertIs(client.storage.state_manager, second)
+        self.assertIs(client.storage.state, second.state)
+
+    def test_read_history_clears_digest(self):
+        state_manager = _state_manager()
+        state_manager.state.unread_digest = build_digest([])
+
+        PyrogramManager(state_manager).read_history(1000)
+
+        self.assertIsNone(state_manager.state.unread_digest)
+        state_manager.save_to_database.assert_called_once_with(optional=True)
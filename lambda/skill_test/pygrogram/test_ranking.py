@@ -0,0 +1,38 @@
+import unittest
+from types import SimpleNamespace
+
+from skill.pyrogram.ranking import RECENCY_HALF_LIFE, rank_dialogs
+
+NOW = 1600000000
+
+
+def _dialog(chat_id, chat_type='private', unread=1, mentions=0, pinned=False, age=0):
+    chat = SimpleNamespace(id=chat_id, type=chat_type)
+    return SimpleNamespace(chat=chat, unread_messages_count=unread, unread_mentions_count=mentions, is_pinned=pinned,
+                           top_message=SimpleNamespace(date=NOW - age))
+
+
+def _ids(dialogs):
+    return [dialog.chat.id for dialog in dialogs]
+
+
+class RankingTest(unittest.TestCase):
+    def test_private_before_group(self):
+        dialogs = [_dialog(1, 'supergroup'), _dialog(2, 'private')]
+
+        self.assertEqual(_ids(rank_dialogs(dialogs, NOW)), [2, 1])
+
+    def test_pinned_and_mentions_lift_groups(self):
+        dialogs = [_dialog(1, 'private', age=RECENCY_HALF_LIFE), _dialog(2, 'group', mentions=1, pinned=True)]
+
+        self.assertEqual(_ids(rank_dialogs(dialogs, NOW)), [2, 1])
+
+    def test_recency_and_unread_count(self):
+        self.assertEqual(_ids(rank_dialogs([_dialog(1, age=24 * 3600), _dialog(2)], NOW)), [2, 1])
+        self.assertEqual(_ids(rank_dialogs([_dialog(1), _dialog(2, unread=30)], NOW)), [2, 1])
+
+    def test_ties_keep_the_order_of_telegram(self):
+        dialogs = [_dialog(chat_id, 'group') for chat_id in range(5)]
+        dialogs[3].top_message = None
+
+        self.assertEqual(_ids(rank_dialogs(dialogs, NOW)), [0, 1, 2, 4, 3])
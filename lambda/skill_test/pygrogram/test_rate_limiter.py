@@ -0,0 +1,82 @@
+import time
+import unittest
+from unittest.mock import Mock
+
+from pyrogram.errors import FloodWait
+
+from skill import metrics
+from skill.pyrogram.rate_limiter import RateLimited, RateLimiter
+from skill_test.util import capture_metrics
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rate_limiter = RateLimiter(rates={"get_dialogs": (20.0, 2)}, max_queue_seconds=0.1)
+
+    def test_calls_after_the_burst_are_queued(self):
+        waits = [self.rate_limiter.acquire("get_dialogs", 1) for _ in range(3)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 1 / 20, delta=0.01)
+
+    def test_long_waits_are_rate_limited(self):
+        for _ in range(2):
+            self.rate_limiter.acquire("get_dialogs", 1)
+
+        with self.assertRaises(RateLimited) as cm:
+            self.rate_limiter.acquire("get_dialogs", 1, max_wait=0.01)
+        self.assertEqual(cm.exception.x, 1)
+        # Rejected calls don't use up tokens
+        self.assertLessEqual(self.rate_limiter.acquire("get_dialogs", 1), 1 / 20)
+
+    def test_accounts_and_methods_are_limited_separately(self):
+        for _ in range(2):
+            self.rate_limiter.acquire("get_dialogs", 1)
+
+        self.assertEqual(self.rate_limiter.acquire("get_dialogs", 2), 0.0)
+        self.assertEqual(self.rate_limiter.acquire("get_history", 1), 0.0)
+
+    def test_flood_wait_adapts_the_rate(self):
+        self.rate_limiter.flood_wait("get_dialogs", 1, 30)
+        bucket = self.rate_limiter.buckets[("get_dialogs", 1)]
+
+        self.assertEqual(bucket.rate, 10.0)
+        with self.assertRaises(RateLimited) as cm:
+            self.rate_limiter.acquire("get_dialogs", 1)
+        self.assertEqual(cm.exception.x, 30)
+
+        for _ in range(40):
+            self.rate_limiter.succeeded("get_dialogs", 1)
+        self.assertEqual(bucket.rate, 20.0)
+
+    def test_idle_full_buckets_are_evicted(self):
+        rate_limiter = RateLimiter(rates={"get_dialogs": (20.0, 2)}, idle_seconds=0.05)
+        for account in range(3):
+            rate_limiter.acquire("get_dialogs", account)
+        rate_limiter.flood_wait("get_dialogs", 2, 30)
+        time.sleep(0.06)
+
+        rate_limiter.acquire("get_dialogs", 3)
+
+        # The blocked bucket is kept
+        self.assertEqual(sorted(rate_limiter.buckets), [("get_dialogs", 2), ("get_dialogs", 3)])
+
+    def test_short_flood_wait_is_retried(self):
+        function = Mock(side_effect=[FloodWait(x=0), "dialogs"])
+
+        with capture_metrics() as flushed, metrics.collect():
+            self.assertEqual(self.rate_limiter.call("get_dialogs", 1, function), "dialogs")
+
+        self.assertEqual(function.call_count, 2)
+        self.assertEqual(flushed[0].counters["telegram.flood_wait.count"], 1)
+
+    def test_long_flood_wait_is_not_retried(self):
+        function = Mock(side_effect=FloodWait(x=60))
+        start = time.perf_counter()
+
+        with self.assertRaises(RateLimited) as cm:
+            self.rate_limiter.call("get_dialogs", 1, function)
+
+        self.assertEqual(cm.exception.x, 60)
+        self.assertEqual(function.call_count, 1)
+        self.assertLess(time.perf_counter() - start, 0.1)
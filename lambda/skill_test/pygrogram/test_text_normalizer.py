@@ -0,0 +1,55 @@
+import unittest
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from skill.pyrogram import text_normalizer
+from skill.pyrogram.text_normalizer import CODE_KEY, EMOJI_KEY, MAX_LENGTH, TRUNCATION_MARK, normalize
+from skill_test.fakes.fake_telegram import make_message
+
+
+class TextNormalizerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = patch.object(text_normalizer, "_cache", OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_links_become_domains(self):
+        self.assertEqual(normalize("Look at https://www.example.com/a/b?c=1."), "Look at example.com.")
+        self.assertEqual(normalize("see www.github.com/x, ok"), "see github.com, ok")
+        self.assertEqual(normalize("[the docs](https://docs.pyrogram.org/api) are here"), "the docs are here")
+
+    def test_markdown_and_code(self):
+        self.assertEqual(normalize("**Bold**, _italic_ and `code` in file_name_x"),
+                         "Bold, italic and code in file_name_x")
+        self.assertEqual(normalize("Try this:\n```\nprint('<b>')\n```\nworks"), "Try this: works")
+        self.assertEqual(normalize("```\nSELECT 1;\n```"), CODE_KEY)
+
+    def test_emoji(self):
+        self.assertEqual(normalize("See you 👋😀 tomorrow ❤️"), "See you tomorrow")
+        self.assertEqual(normalize("👍🏽"), EMOJI_KEY)
+        # Escaping is left to Speech.add_text
+        self.assertEqual(normalize("1 < 2 & 3 > 2"), "1 < 2 & 3 > 2")
+
+    def test_long_telegrams_are_cut(self):
+        text = normalize("word, " * 100)
+
+        self.assertLessEqual(len(text), MAX_LENGTH + 1)
+        self.assertEqual(text[-5:], "word" + TRUNCATION_MARK)
+        self.assertEqual(normalize("Wait…"), "Wait...")
+
+    def test_cached_per_account_and_message(self):
+        chat = SimpleNamespace(id=1000)
+        messages = [make_message(1, chat, None, text="Hi https://example.com"), make_message(2, chat, None)]
+
+        with patch.object(text_normalizer, "normalize", wraps=normalize) as normalize_spy:
+            first = list(text_normalizer.normalize_messages(messages, account=1))
+            second = list(text_normalizer.normalize_messages(messages, account=1))
+            list(text_normalizer.normalize_messages(messages, account=2))
+            messages[0].text = "Edited"
+            edited = list(text_normalizer.normalize_messages(messages, account=1))
+
+        self.assertEqual([text for _, text in first], ["Hi example.com", None])
+        self.assertEqual(first, second)
+        self.assertEqual(edited[0][1], "Edited")
+        self.assertEqual(normalize_spy.call_count, 3)
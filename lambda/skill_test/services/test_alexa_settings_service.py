@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+
+from skill.deadline import Deadline, within
+from skill.services import http_client
+from skill.services.alexa_settings_service import AlexaSettingsService
+
+
+class _SettingsApiStub(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_first = 0
+    calls = []
+
+    def do_GET(self):
+        _SettingsApiStub.calls.append(self.path)
+        time.sleep(_SettingsApiStub.delay)
+        if _SettingsApiStub.fail_first > 0:
+            _SettingsApiStub.fail_first -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = '"Europe/Rome"'
+        if self.path.endswith('Profile.mobileNumber'):
+            body = json.dumps({"countryCode": "+39", "phoneNumber": "123456"})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class AlexaSettingsServiceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        _SettingsApiStub.delay = 0.0
+        _SettingsApiStub.fail_first = 0
+        _SettingsApiStub.calls = []
+        http_client._slow_until.clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _SettingsApiStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        system = Mock()
+        system.api_endpoint = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        system.api_access_token = 'token'
+        system.device.device_id = 'device'
+        self.settings_service = AlexaSettingsService(system, 'de-DE')
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_settings_are_fetched(self):
+        self.assertEqual(self.settings_service.get_tz_database_name(), 'Europe/Rome')
+        self.assertEqual(self.settings_service.get_phone_number(), ('+39123456', True))
+        self.assertTrue(http_client.get_latency_histogram(AlexaSettingsService.TIMEZONE).count > 0)
+
+    def test_retryable_errors_are_retried(self):
+        _SettingsApiStub.fail_first = 1
+
+        self.assertEqual(self.settings_service.get_tz_database_name(), 'Europe/Rome')
+        self.assertEqual(len(_SettingsApiStub.calls), 2)
+
+    def test_slow_api_falls_back_to_locale(self):
+        _SettingsApiStub.delay = http_client.READ_TIMEOUT + 0.2
+        start = time.perf_counter()
+
+        tz_database_name = self.settings_service.get_tz_database_name()
+
+        self.assertEqual(tz_database_name, 'Europe/Vienna')
+        self.assertLess(time.perf_counter() - start, http_client.TOTAL_TIMEOUT)
+        # A read timeout isn't retried
+        self.assertEqual(len(_SettingsApiStub.calls), 1)
+
+        # While the API is slow, we use the fallback without asking
+        calls = len(_SettingsApiStub.calls)
+        self.assertEqual(self.settings_service.get_tz_database_name(), 'Europe/Vienna')
+        self.assertEqual(len(_SettingsApiStub.calls), calls)
+
+    def test_calls_end_at_the_deadline(self):
+        # Within READ_TIMEOUT, but beyond the deadline
+        _SettingsApiStub.delay = 1.0
+        start = time.perf_counter()
+
+        with within(Deadline(0.5)):
+            tz_database_name = self.settings_service.get_tz_database_name()
+
+        self.assertEqual(tz_database_name, 'Europe/Vienna')
+        self.assertLess(time.perf_counter() - start, 0.5 + 0.1)
+
+    def test_submitted_calls_keep_the_deadline(self):
+        _SettingsApiStub.delay = 1.0
+        start = time.perf_counter()
+
+        with within(Deadline(0.5)):
+            future = http_client.submit(self.settings_service.get_tz_database_name)
+
+        self.assertEqual(future.result(), 'Europe/Vienna')
+        self.assertLess(time.perf_counter() - start, 0.5 + 0.1)
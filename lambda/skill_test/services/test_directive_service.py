@@ -0,0 +1,64 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from skill.services import http_client
+from skill.services.directive_service import DirectiveService, progressive_response, PROGRESSIVE_RESPONSE_TIMEOUT
+from skill_test.fakes.directive_api_stub import DirectiveApiStub
+
+
+class DirectiveServiceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        http_client._slow_until.clear()
+        self.stub = DirectiveApiStub()
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+
+        self.handler_input = Mock()
+        self.handler_input.request_envelope.context.system = SimpleNamespace(api_endpoint=self.stub.endpoint,
+                                                                             api_access_token='token')
+        self.handler_input.request_envelope.request.request_id = 'request'
+
+    def test_speech_is_sent(self):
+        directive_service = DirectiveService(self.handler_input.request_envelope.context.system, 'request')
+
+        self.assertTrue(directive_service.send_speech('Hello'))
+
+        self.assertEqual(self.stub.directives, [{
+            "header": {"requestId": "request"},
+            "directive": {"type": "VoicePlayer.Speak", "speech": "<speak>Hello</speak>"}
+        }])
+        self.assertEqual(self.stub.authorizations, ['Bearer token'])
+
+    def test_error_response(self):
+        self.stub.status = 400
+        directive_service = DirectiveService(self.handler_input.request_envelope.context.system, 'request')
+
+        self.assertFalse(directive_service.send_speech('Hello'))
+
+    def test_progressive_response_runs_concurrently(self):
+        self.stub.delay = 0.3
+        start = time.perf_counter()
+
+        with progressive_response(self.handler_input, 'Hello', expected_seconds=5):
+            time.sleep(0.3)
+
+        self.assertLess(time.perf_counter() - start, 0.55)
+        self.assertEqual(len(self.stub.directives), 1)
+
+    def test_fast_work_has_no_progressive_response(self):
+        with progressive_response(self.handler_input, 'Hello', expected_seconds=0.1):
+            pass
+
+        self.assertEqual(self.stub.directives, [])
+
+    def test_slow_directive_service_does_not_delay_the_response(self):
+        self.stub.delay = sum(PROGRESSIVE_RESPONSE_TIMEOUT) + 0.5
+        start = time.perf_counter()
+
+        with progressive_response(self.handler_input, 'Hello', expected_seconds=5):
+            pass
+
+        self.assertLess(time.perf_counter() - start, sum(PROGRESSIVE_RESPONSE_TIMEOUT) + 0.2)
+        self.assertTrue(http_client.is_slow(DirectiveService.DIRECTIVES))
@@ -0,0 +1,48 @@
+import time
+import unittest
+from unittest.mock import Mock
+
+from skill.services import timezone_cache
+from skill.state import State
+
+
+class TimezoneCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        timezone_cache._refreshed.clear()
+        self.settings_service = Mock()
+        self.settings_service.device_id = 'device'
+        self.settings_service.fetch_tz_database_name = Mock(return_value='Europe/Rome')
+        self.settings_service.get_fallback_tz_database_name = Mock(return_value='Europe/Vienna')
+        self.state = State(None)
+
+    def test_timezone_is_cached_per_device(self):
+        self.assertEqual(timezone_cache.get_tz_database_name(self.settings_service, self.state), 'Europe/Rome')
+        self.assertEqual(timezone_cache.get_tz_database_name(self.settings_service, self.state), 'Europe/Rome')
+
+        self.assertEqual(self.settings_service.fetch_tz_database_name.call_count, 1)
+        self.assertEqual(self.state.to_dict()['device_timezones']['device']['tz_database_name'], 'Europe/Rome')
+
+    def test_fallback_is_not_cached(self):
+        self.settings_service.fetch_tz_database_name = Mock(return_value=None)
+
+        self.assertEqual(timezone_cache.get_tz_database_name(self.settings_service, self.state), 'Europe/Vienna')
+        self.assertEqual(self.state.device_timezones, {})
+
+    def test_stale_timezone_is_refreshed_in_background(self):
+        updated_at = int(time.time()) - timezone_cache.SOFT_TTL_SECONDS - 1
+        self.state.device_timezones['device'] = {"tz_database_name": 'Europe/Vienna', "updated_at": updated_at}
+
+        self.assertEqual(timezone_cache.get_tz_database_name(self.settings_service, self.state), 'Europe/Vienna')
+        for _ in range(100):
+            if 'device' in timezone_cache._refreshed:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(timezone_cache.get_tz_database_name(self.settings_service, self.state), 'Europe/Rome')
+        self.assertTrue(self.state.device_timezones['device']['updated_at'] > updated_at)
+
+    def test_expired_timezone_is_fetched(self):
+        updated_at = int(time.time()) - timezone_cache.HARD_TTL_SECONDS
+        self.state.device_timezones['device'] = {"tz_database_name": 'Europe/Vienna', "updated_at": updated_at}
+
+        self.assertEqual(timezone_cache.get_tz_database_name(self.settings_service, self.state), 'Europe/Rome')
@@ -1,4 +1,3 @@
-import unittest
 from unittest.mock import Mock, patch
 
 from pyrogram.errors import PhoneCodeInvalid, PhoneCodeExpired, SessionPasswordNeeded
@@ -7,11 +6,12 @@ from skill.helper_functions import remove_ssml_tags
 from skill.pyrogram.pyrogram_manager import PyrogramManager
 from skill.telegram_connect import sb
 from skill_test.setup_intent.setup_intent_request import setup_request
-from skill_test.util import update_request, get_i18n_for_tests
+from skill_test.util import update_request, get_i18n_for_tests, SkillTestCase
 
 
-class SetupIntentTest(unittest.TestCase):
+class SetupIntentTest(SkillTestCase):
     def setUp(self) -> None:
+        super().setUp()
         self.handler = sb.lambda_handler()
 
     @patch("skill.intents.setup_intent.AlexaSettingsService")
@@ -0,0 +1,28 @@
+import math
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from skill import deadline
+from skill.deadline import Deadline, get_deadline, ALEXA_RESPONSE_BUDGET, SAFETY_MARGIN
+
+
+class DeadlineTest(unittest.TestCase):
+    def test_deadline_from_context(self):
+        lambda_context = SimpleNamespace(get_remaining_time_in_millis=Mock(return_value=3000))
+        self.assertAlmostEqual(Deadline.from_context(lambda_context).budget, 3 - SAFETY_MARGIN)
+
+        lambda_context.get_remaining_time_in_millis = Mock(return_value=60000)
+        self.assertEqual(Deadline.from_context(lambda_context).budget, ALEXA_RESPONSE_BUDGET)
+
+        self.assertEqual(Deadline.from_context(None).budget, ALEXA_RESPONSE_BUDGET)
+
+    def test_deadline_of_invocation(self):
+        self.assertEqual(get_deadline().remaining(), math.inf)
+
+        with deadline.within(Deadline(0.5)) as current_deadline:
+            self.assertIs(get_deadline(), current_deadline)
+            self.assertTrue(current_deadline.has_time_for(0.1))
+            self.assertFalse(current_deadline.has_time_for(1))
+
+        self.assertTrue(get_deadline().has_time_for(3600))
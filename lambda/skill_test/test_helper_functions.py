@@ -0,0 +1,24 @@
+import unittest
+
+from skill.helper_functions import remove_ssml_tags
+
+
+class HelperFunctionsTest(unittest.TestCase):
+    def test_remove_ssml_tags(self):
+        self.assertEqual(remove_ssml_tags("<speak>Hi<break time='200ms'/>there</speak>"), "Hi there")
+        self.assertEqual(remove_ssml_tags("Bello<break time='200ms'/> and Chico<break time='200ms'/>."),
+                         "Bello and Chico.")
+        self.assertEqual(remove_ssml_tags("<break time='2000ms'/> Bye"), " Bye")
+        self.assertEqual(remove_ssml_tags("<lang xml:lang='en-US'>GitHub</lang> &amp; 1 &lt; 2"), "GitHub & 1 < 2")
+
+    def test_breaks_next_to_tags(self):
+        self.assertEqual(remove_ssml_tags("Tom<break time='200ms'/><lang xml:lang='en-US'>GitHub</lang>"), "Tom GitHub")
+        self.assertEqual(remove_ssml_tags("<lang xml:lang='en-US'>GitHub</lang><break time='200ms'/>Tom"), "GitHub Tom")
+        self.assertEqual(remove_ssml_tags("Tom<break time='200ms'/><break time='1s'/>Paul"), "Tom Paul")
+        self.assertEqual(remove_ssml_tags("<speak><break time='200ms'/>Tom<break time='200ms'/></speak>"), "Tom")
+
+    def test_long_speech_is_not_memoized(self):
+        long_speech = "<speak>" + "Message<break time='350ms'/>" * 100 + "</speak>"
+
+        self.assertEqual(remove_ssml_tags(long_speech), ("Message " * 100).strip())
+        self.assertEqual(remove_ssml_tags(long_speech), ("Message " * 100).strip())
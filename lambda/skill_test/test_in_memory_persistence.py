@@ -0,0 +1,129 @@
+import copy
+import json
+from unittest.mock import patch
+
+from ask_sdk_core.attributes_manager import AttributesManager
+from ask_sdk_core.handler_input import HandlerInput
+from ask_sdk_core.serialize import DefaultSerializer
+from ask_sdk_model import RequestEnvelope
+
+from skill.pyrogram.pyrogram_manager import ClientCache, PyrogramManager
+from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.state_manager import PROFILES, StateManager
+from skill.telegram_connect import lambda_handler, sb
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.util import SkillTestCase, capture_metrics, update_request
+
+
+class InMemoryPersistenceTest(SkillTestCase):
+    """
+    Runs the whole skill, including the StateRequestInterceptor, without DynamoDB, Telegram or the settings API.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        for patcher in [patch.object(PyrogramManager, "client_class", FakeClient),
+                        patch.object(FakeClient, "account", FakeAccount.generate(dialogs=2)),
+                        patch.object(AlexaSettingsService, "fetch_tz_database_name", return_value="Europe/Rome")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.handler = sb.lambda_handler()
+        self.req = update_request(launch_request, "en-US")
+
+    def test_state_is_persisted(self):
+        self.handler(self.req, None)
+        self.handler(self.req, None)
+
+        item = self.persistence_adapter.items[self.req["context"]["System"]["user"]["userId"]]
+        self.assertEqual(item["new_session_count"], 2)
+        self.assertEqual(next(iter(item["device_timezones"].values()))["tz_database_name"], "Europe/Rome")
+
+    def test_tests_are_isolated(self):
+        self.assertEqual(self.persistence_adapter.items, {})
+
+        self.handler(self.req, None)
+
+        self.assertEqual(len(self.persistence_adapter.items), 1)
+
+    def test_stored_attributes_are_copies(self):
+        self.handler(self.req, None)
+        request_envelope = DefaultSerializer().deserialize(json.dumps(self.req), RequestEnvelope)
+
+        attributes = self.persistence_adapter.get_attributes(request_envelope)
+        attributes["device_timezones"].clear()
+
+        self.assertEqual(len(self.persistence_adapter.get_attributes(request_envelope)["device_timezones"]), 1)
+
+    def _profile_request(self, person_id):
+        request = copy.deepcopy(self.req)
+        if person_id:
+            request["context"]["System"]["person"] = {"personId": person_id}
+        return request
+
+    def test_voice_profiles_have_own_state(self):
+        key = self.req["context"]["System"]["user"]["userId"]
+        self.persistence_adapter.items[key] = {"user_id": 1, PROFILES: {"amzn1.ask.person.A": {"user_id": 2}}}
+
+        for person_id in ["amzn1.ask.person.A", "amzn1.ask.person.A", "amzn1.ask.person.B", None]:
+            self.handler(self._profile_request(person_id), None)
+
+        item = self.persistence_adapter.items[key]
+        self.assertEqual((item["user_id"], item["new_session_count"]), (1, 1))
+        self.assertEqual(item[PROFILES]["amzn1.ask.person.A"]["user_id"], 2)
+        self.assertEqual(item[PROFILES]["amzn1.ask.person.A"]["new_session_count"], 2)
+        self.assertEqual(item[PROFILES]["amzn1.ask.person.B"]["new_session_count"], 1)
+        # The timezone of the device is resolved once for the whole household
+        self.assertEqual(len(item["device_timezones"]), 1)
+        self.assertNotIn("device_timezones", item[PROFILES]["amzn1.ask.person.A"])
+
+    def test_existing_user_keeps_state_on_first_request_with_profile(self):
+        key = self.req["context"]["System"]["user"]["userId"]
+        self.persistence_adapter.items[key] = {"user_id": 4242, "new_session_count": 5}
+
+        event = self.handler(self._profile_request("amzn1.ask.person.A"), None)
+
+        self.assertIn("new telegrams", event["response"]["outputSpeech"]["ssml"])
+        item = self.persistence_adapter.items[key]
+        self.assertEqual(item[PROFILES]["amzn1.ask.person.A"]["user_id"], 4242)
+        self.assertEqual(item[PROFILES]["amzn1.ask.person.A"]["new_session_count"], 6)
+        # The household state is left as it was
+        self.assertEqual((item["user_id"], item["new_session_count"]), (4242, 5))
+
+    def test_profiles_share_one_read(self):
+        key = self.req["context"]["System"]["user"]["userId"]
+        self.persistence_adapter.items[key] = {"user_id": 1, PROFILES: {"amzn1.ask.person.A": {"user_id": 2},
+                                                                       "amzn1.ask.person.B": {"user_id": 3}}}
+        client_cache = ClientCache()
+
+        with patch.object(PyrogramManager, "client_cache", client_cache), capture_metrics() as flushed:
+            for person_id in [None, "amzn1.ask.person.A", "amzn1.ask.person.B"]:
+                lambda_handler(self._profile_request(person_id), None)
+
+        self.assertEqual([m.counters["storage.reads"] for m in flushed], [1, 1, 1])
+        # Every profile is its own Telegram account with its own pooled client
+        self.assertEqual([client_cache.get(user_id) is not None for user_id in [1, 2, 3]], [True, True, True])
+        self.assertEqual(len({id(client_cache.get(user_id)) for user_id in [1, 2, 3]}), 3)
+
+    def _state_manager(self, person_id):
+        request_envelope = DefaultSerializer().deserialize(json.dumps(self._profile_request(person_id)),
+                                                           RequestEnvelope)
+        return StateManager(HandlerInput(request_envelope, AttributesManager(request_envelope,
+                                                                             self.persistence_adapter)))
+
+    def test_profiles_keep_concurrent_writes(self):
+        key = self.req["context"]["System"]["user"]["userId"]
+        self.persistence_adapter.items[key] = {"user_id": 1, PROFILES: {"amzn1.ask.person.A": {"user_id": 2},
+                                                                       "amzn1.ask.person.B": {"user_id": 3}}}
+        state_managers = [self._state_manager(person_id) for person_id in ["amzn1.ask.person.A", "amzn1.ask.person.B"]]
+        # The poller writes the digest of profile A meanwhile
+        self.persistence_adapter.update_attributes(key, {(PROFILES, "amzn1.ask.person.A", "unread_digest"): "digest"})
+
+        for state_manager in state_managers:
+            state_manager.state.new_session_count += 1
+            state_manager.save_to_database()
+
+        profiles = self.persistence_adapter.items[key][PROFILES]
+        self.assertEqual(profiles["amzn1.ask.person.A"]["new_session_count"], 1)
+        self.assertEqual(profiles["amzn1.ask.person.B"]["new_session_count"], 1)
+        self.assertEqual(profiles["amzn1.ask.person.A"]["unread_digest"], "digest")
@@ -1,6 +1,15 @@
+import gc
+import os
+import subprocess
+import sys
 import unittest
+from types import SimpleNamespace
 
 from skill.i18n.language_model_abc import LanguageModelABC
+from skill.i18n.language_model_de import LanguageModelDE
+from skill.i18n.language_model_en import LanguageModelEN
+from skill.i18n.language_model_it import LanguageModelIT
+from skill.i18n.util import get_i18n, get_language_model
 from skill_test.util import get_i18n_for_tests
 
 
@@ -20,3 +29,43 @@ class LanguageModelTest(unittest.TestCase):
         same_attrs = all([True if attr_en == german_attrs[i] else False for i, attr_en in enumerate(us_attrs)])
         self.assertTrue(same_attrs is True)
         print('HELLO WORLD')
+
+    def test_locale_registry(self):
+        self.assertIsInstance(get_language_model('de-AT', 'Europe/Vienna'), LanguageModelDE)
+        self.assertIsInstance(get_language_model('it-IT', 'Europe/Rome'), LanguageModelIT)
+        self.assertIsInstance(get_language_model('fr-FR', 'Europe/Paris'), LanguageModelEN)
+
+        italian_attrs = dir(get_language_model('it-IT', 'Europe/Rome'))
+        for attr in LanguageModelABC.__annotations__.keys():
+            self.assertTrue(attr in italian_attrs, '{} not in italian_attrs'.format(attr))
+
+        # Using one language must not import the language models of the others
+        code = "import sys; from skill.i18n.util import get_language_model; get_language_model('en-US', 'UTC'); " \
+               "print(sorted(m for m in sys.modules if m.startswith('skill.i18n.language_model_')))"
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.getcwd()).decode().strip()
+        self.assertEqual(output, "['skill.i18n.language_model_abc', 'skill.i18n.language_model_en']")
+
+    def test_language_model_memory_stays_flat(self):
+        handler_input = SimpleNamespace(
+            attributes_manager=SimpleNamespace(session_attributes={"tz_database_name": "Europe/Vienna"}),
+            request_envelope=SimpleNamespace(request=SimpleNamespace(locale="de-DE"))
+        )
+        i18n = get_i18n(handler_input)
+        goodbyes = len(i18n.GOODBYES)
+        i18n.get_random_goodbye()
+
+        gc.collect()
+        objects_before = len(gc.get_objects())
+        # Any object kept per call shows up as thousands of objects
+        for _ in range(10000):
+            get_i18n(handler_input).get_random_goodbye()
+        gc.collect()
+        objects_after = len(gc.get_objects())
+
+        self.assertIs(get_i18n(handler_input), i18n)
+        self.assertEqual(len(i18n.GOODBYES), goodbyes)
+        self.assertLess(objects_after - objects_before, 100)
+        with self.assertRaises(AttributeError):
+            i18n.WELCOME_BACK = 'Hi'
+        with self.assertRaises(TypeError):
+            i18n.MEDIA_NAMES['photo'] = 'Bild'
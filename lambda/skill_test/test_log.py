@@ -0,0 +1,112 @@
+import json
+import logging
+import unittest
+from unittest.mock import patch
+
+from skill import log
+from skill.exceptions.all_exceptions import log_exception
+
+
+class _CountingPayload:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "payload"
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(log.JsonFormatter())
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+class LogTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Not registered with logging, so no other handler, e.g.: the capture handlers of pytest, formats its records
+        self.logger = logging.Logger("skill_test.log")
+        self.logger.propagate = False
+        self.handler = _ListHandler()
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+
+        root = logging.getLogger()
+        self.root_handlers = [(handler, handler.formatter) for handler in root.handlers]
+        self.root_level = root.level
+        self.module_levels = {module: logging.getLogger(module).level
+                              for module in list(log.DEFAULT_MODULE_LEVELS) + ["skill_test.log.module"]}
+
+    def tearDown(self) -> None:
+        self.logger.removeHandler(self.handler)
+
+        # log.configure changes the root logger of the whole test run
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler, formatter in self.root_handlers:
+            handler.setFormatter(formatter)
+            root.addHandler(handler)
+        root.setLevel(self.root_level)
+        for module, level in self.module_levels.items():
+            logging.getLogger(module).setLevel(level)
+
+    def test_records_are_json_lines(self):
+        self.logger.info("Request received %s", "now", extra={"request_type": "LaunchRequest"})
+
+        record = json.loads(self.handler.lines[0])
+        self.assertEqual(record["message"], "Request received now")
+        self.assertEqual(record["level"], "INFO")
+        self.assertEqual(record["logger"], "skill_test.log")
+        self.assertEqual(record["request_type"], "LaunchRequest")
+
+    def test_exception_is_one_record(self):
+        with patch("skill.exceptions.all_exceptions.logger", self.logger):
+            try:
+                raise ValueError("first", "second")
+            except ValueError as e:
+                log_exception(e)
+
+        self.assertEqual(len(self.handler.lines), 1)
+        self.assertNotIn("\n", self.handler.lines[0])
+        record = json.loads(self.handler.lines[0])
+        self.assertIn("Traceback", record["exception"])
+        self.assertEqual(record["exception_args"], ["first", "second"])
+
+    def test_disabled_level_is_not_formatted(self):
+        payload = _CountingPayload()
+
+        self.logger.debug("Payload: %s", payload)
+        with patch("skill.log.PAYLOAD_SAMPLE_RATE", 1):
+            log.debug_payload(self.logger, "Payload: %s", payload)
+
+        self.assertEqual(payload.formatted, 0)
+        self.assertEqual(self.handler.lines, [])
+
+    def test_payloads_are_sampled(self):
+        self.logger.setLevel(logging.DEBUG)
+        payload = _CountingPayload()
+
+        with patch("skill.log.PAYLOAD_SAMPLE_RATE", 0):
+            log.debug_payload(self.logger, "Payload: %s", payload)
+        self.assertEqual(payload.formatted, 0)
+        self.assertEqual(self.handler.lines, [])
+
+        with patch("skill.log.PAYLOAD_SAMPLE_RATE", 1):
+            log.debug_payload(self.logger, "Payload: %s", payload)
+        self.assertEqual(payload.formatted, 1)
+        self.assertEqual(json.loads(self.handler.lines[0])["message"], "Payload: payload")
+
+    def test_module_levels(self):
+        self.assertEqual(log.parse_levels("skill.pyrogram=debug, skill.interceptors=WARNING,invalid"),
+                         {"skill.pyrogram": "DEBUG", "skill.interceptors": "WARNING"})
+
+        log.configure(level="INFO", levels="skill_test.log.module=ERROR")
+
+        self.assertEqual(logging.getLogger("skill_test.log.module").getEffectiveLevel(), logging.ERROR)
+        self.assertEqual(logging.getLogger("pyrogram").getEffectiveLevel(), logging.WARNING)
+        self.assertEqual(logging.getLogger("skill.intents").getEffectiveLevel(), logging.INFO)
@@ -0,0 +1,90 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from skill import metrics
+from skill.interceptors import StateRequestInterceptor
+from skill.metrics import MeteredPersistenceAdapter
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.telegram_connect import lambda_handler
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.util import SkillTestCase, update_request, capture_metrics
+
+
+def _dialog(chat_id, unread_messages_count):
+    chat = SimpleNamespace(id=chat_id, first_name='Bello', title=None, type='private')
+    return SimpleNamespace(chat=chat, unread_messages_count=unread_messages_count, unread_mentions_count=0,
+                           is_pinned=False, top_message=None)
+
+
+class MetricsTest(SkillTestCase):
+    def test_metrics_are_flushed_as_one_emf_line(self):
+        with patch("sys.stdout") as mock_stdout:
+            with metrics.collect():
+                metrics.set_dimension("Handler", "LaunchRequest")
+                metrics.increment("storage.writes")
+                metrics.increment("storage.writes")
+                metrics.record_time("handler.latency", 12.5)
+
+        self.assertEqual(mock_stdout.write.call_count, 1)
+        emf = json.loads(mock_stdout.write.call_args[0][0])
+        self.assertEqual(emf["_aws"]["CloudWatchMetrics"][0]["Dimensions"], [["Handler"]])
+        self.assertIn({"Name": "handler.latency", "Unit": "Milliseconds"},
+                      emf["_aws"]["CloudWatchMetrics"][0]["Metrics"])
+        self.assertEqual(emf["Handler"], "LaunchRequest")
+        self.assertEqual(emf["storage.writes"], 2)
+        self.assertEqual(emf["handler.latency"], [12.5])
+
+    def test_metrics_outside_of_an_invocation_are_ignored(self):
+        metrics.increment("storage.writes")
+        metrics.record_time("handler.latency", 1)
+
+    def test_storage_calls_are_counted(self):
+        persistence_adapter = MeteredPersistenceAdapter(Mock())
+
+        with capture_metrics() as flushed:
+            with metrics.collect():
+                persistence_adapter.get_attributes(None)
+                persistence_adapter.save_attributes(None, {})
+                persistence_adapter.save_attributes(None, {})
+
+        self.assertEqual(flushed[0].counters["storage.reads"], 1)
+        self.assertEqual(flushed[0].counters["storage.writes"], 2)
+        self.assertEqual(len(flushed[0].timers["storage.write.latency"]), 2)
+
+    @patch.object(PyrogramManager, "client_class")
+    def test_telegram_calls_are_counted(self, mock_client):
+        mock_client.return_value.get_dialogs = Mock(return_value=[_dialog(1, 3), _dialog(2, 0), _dialog(3, 2)])
+        mock_client.return_value.get_history = Mock(return_value=[])
+
+        with capture_metrics() as flushed:
+            with metrics.collect():
+                pyrogram_manager = PyrogramManager(Mock())
+                pyrogram_manager.get_unread_dialogs()
+                pyrogram_manager.read_history(1)
+
+        counters = flushed[0].counters
+        self.assertEqual(counters["telegram.connect.count"], 1)
+        self.assertEqual(counters["telegram.get_dialogs.count"], 1)
+        self.assertEqual(counters["telegram.get_history.count"], 2)
+        self.assertEqual(counters["telegram.read_history.count"], 1)
+        self.assertEqual(counters["unread.dialogs"], 2)
+        self.assertEqual(counters["unread.messages"], 5)
+
+    @patch.object(StateRequestInterceptor, "process", Mock(return_value=[]))
+    @patch("skill.telegram_connect.StateManager")
+    @patch("skill.telegram_connect.PyrogramManager", spec=PyrogramManager)
+    def test_invocation_is_metered(self, mock_pyrogram_manager, mock_state_manager):
+        mock_state_manager.return_value.state.unread_digest = None
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.expected_unread_seconds = Mock(return_value=0.1)
+        mock_pyrogram_manager.get_unread_dialogs = Mock(return_value=[])
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        with capture_metrics() as flushed:
+            event = lambda_handler(update_request(launch_request, "en-US"), None)
+
+        self.assertEqual(len(flushed), 1)
+        self.assertEqual(flushed[0].dimensions, {"Handler": "LaunchRequest"})
+        self.assertEqual(len(flushed[0].timers["handler.latency"]), 1)
+        self.assertEqual(flushed[0].counters["session_attrs.bytes"], len(json.dumps(event["sessionAttributes"])))
@@ -0,0 +1,107 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from skill.notifications import NotificationPipeline, ProactiveEventsSender, Notification
+from skill.poller import DigestPoller, PollerStateManager, DEBOUNCE_SECONDS
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.pyrogram.rate_limiter import RateLimiter
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+from skill_test.fakes.proactive_events_stub import ProactiveEventsApiStub, RecordingSender
+
+
+def _dialog(chat_id, unread_count, name="Anna"):
+    return {"name": name, "is_group": False, "chat_id": chat_id, "unread_count": unread_count, "telegrams": []}
+
+
+class NotificationPipelineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = InMemoryPersistenceAdapter()
+        self.sender = RecordingSender()
+        self.pipeline = NotificationPipeline(self.sender, window=30, batch_size=2)
+        self.state_manager = self._state_manager("user")
+
+    def _state_manager(self, key):
+        self.store.items[key] = {"user_id": 4242}
+        return PollerStateManager(self.store, key, self.store.items[key])
+
+    def test_new_messages_are_coalesced(self):
+        self.assertTrue(self.pipeline.offer("user", self.state_manager, [_dialog(1, 1)], now=0))
+        self.pipeline.offer("user", self.state_manager, [_dialog(1, 2), _dialog(2, 1, "Bob")], now=20)
+
+        self.assertEqual(self.pipeline.flush_due(now=29), 0)
+        self.assertEqual(self.pipeline.flush_due(now=30), 1)
+        notification = self.sender.notifications[0]
+        self.assertEqual((notification.key, notification.new_count), ("user", 3))
+        self.assertEqual(self.store.items["user"]["notified_unread"], {"1": 2, "2": 1})
+
+    def test_announced_messages_are_not_repeated(self):
+        self.pipeline.offer("user", self.state_manager, [_dialog(1, 2)], now=0)
+        self.pipeline.flush_due(now=30)
+
+        self.assertFalse(self.pipeline.offer("user", self.state_manager, [_dialog(1, 2)], now=40))
+        self.assertTrue(self.pipeline.offer("user", self.state_manager, [_dialog(1, 3)], now=50))
+        self.pipeline.flush_due(now=80)
+
+        self.assertEqual([n.new_count for n in self.sender.notifications], [2, 1])
+
+    def test_read_dialogs_are_announced_again(self):
+        self.pipeline.offer("user", self.state_manager, [_dialog(1, 2)], now=0)
+        self.pipeline.flush_due(now=30)
+
+        self.assertFalse(self.pipeline.offer("user", self.state_manager, [], now=40))
+        self.assertEqual(self.store.items["user"]["notified_unread"], {})
+        self.assertTrue(self.pipeline.offer("user", self.state_manager, [_dialog(1, 1)], now=50))
+
+    def test_notifications_are_sent_in_batches(self):
+        for key in "abcde":
+            self.pipeline.offer(key, self._state_manager(key), [_dialog(1, 1)], now=0)
+
+        self.assertEqual(self.pipeline.flush_due(now=30), 5)
+        self.assertEqual([len(batch) for batch in self.sender.batches], [2, 2, 1])
+        self.assertIsNone(self.pipeline.next_due())
+
+    def test_failed_notifications_are_offered_again(self):
+        self.sender.send = lambda notifications: [False] * len(notifications)
+        self.pipeline.offer("user", self.state_manager, [_dialog(1, 1)], now=0)
+
+        self.assertEqual(self.pipeline.flush_due(now=30), 0)
+        self.assertEqual(self.pipeline.failed, 1)
+        self.assertTrue(self.pipeline.offer("user", self.state_manager, [_dialog(1, 1)], now=60))
+
+    def test_proactive_events(self):
+        notifications = [Notification("amzn1.ask.account.a", [{"name": "Anna", "chat_id": 1, "new_count": 2}]),
+                         Notification("amzn1.ask.account.b", [{"name": "Bob", "chat_id": 2, "new_count": 1}])]
+        with ProactiveEventsApiStub() as stub:
+            sender = ProactiveEventsSender("id", "secret", api_endpoint=stub.endpoint, token_url=stub.token_url)
+            self.assertEqual(sender.send(notifications), [True, True])
+            stub.statuses = [403]
+            self.assertEqual(sender.send(notifications[:1]), [False])
+
+        self.assertEqual(len(stub.token_requests), 1)
+        self.assertEqual(stub.token_requests[0]["scope"], "alexa::proactive_events")
+        self.assertEqual(set(stub.authorizations), {"Bearer token"})
+        events = sorted(stub.events[:2], key=lambda e: e["relevantAudience"]["payload"]["user"])
+        self.assertEqual(events[0]["relevantAudience"], {"type": "Unicast", "payload": {"user": "amzn1.ask.account.a"}})
+        self.assertEqual(events[0]["event"]["payload"]["messageGroup"], {"creator": {"name": "Anna"}, "count": 2})
+
+    def test_poller_notifies_about_new_messages(self):
+        account = FakeAccount.generate(dialogs=3, unread_per_dialog=0, seed=3)
+        for patcher in [patch.object(PyrogramManager, "client_class", FakeClient),
+                        patch.object(PyrogramManager, "rate_limiter", RateLimiter()),
+                        patch.object(FakeClient, "account", account)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        poller = DigestPoller(self.store, self.pipeline)
+        self.addCleanup(lambda: [m.disconnect() for m, _ in poller.accounts.values()])
+        poller.connect_accounts()
+        poller.refresh_due()
+
+        account.receive(1001, "Hello")
+        account.receive(1001, "Are you there?")
+        poller.refresh_due(now=time.monotonic() + DEBOUNCE_SECONDS)
+
+        self.assertEqual(self.pipeline.flush_due(now=time.monotonic() + self.pipeline.window), 1)
+        self.assertEqual(self.sender.notifications[0].dialogs, [{"name": "Contact 1", "is_group": False,
+                                                                 "chat_id": 1001, "new_count": 2}])
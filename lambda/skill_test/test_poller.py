@@ -0,0 +1,193 @@
+import copy
+import json
+import time
+from unittest.mock import Mock, patch
+
+from ask_sdk_core.attributes_manager import AttributesManager
+from ask_sdk_core.handler_input import HandlerInput
+from ask_sdk_core.serialize import DefaultSerializer
+from ask_sdk_model import RequestEnvelope
+from botocore.exceptions import ClientError
+from pyrogram.errors import AuthKeyUnregistered
+
+from skill import digest
+from skill.poller import DigestPoller, DynamoDbStateStore, DEBOUNCE_SECONDS, REFRESH_INTERVAL
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.services.alexa_settings_service import AlexaSettingsService
+from skill.state_manager import PROFILES, StateManager
+from skill.telegram_connect import sb
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.util import SkillTestCase, update_request
+
+
+class DigestPollerTest(SkillTestCase):
+    """
+    Runs the poller and the skill against the same in-memory storage and fake Telegram account.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.account = FakeAccount.generate(dialogs=3, unread_per_dialog=2, seed=3)
+        for patcher in [patch.object(PyrogramManager, "client_class", FakeClient),
+                        patch.object(FakeClient, "account", self.account),
+                        patch.object(FakeClient, "flood_waits", {}),
+                        patch.object(AlexaSettingsService, "fetch_tz_database_name", return_value="Europe/Rome")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.req = update_request(launch_request, "en-US")
+        self.key = self.req["context"]["System"]["user"]["userId"]
+        self.persistence_adapter.items = {
+            self.key: {"user_id": 4242, "new_session_count": 7},
+            "not_authorized": {"user_id": 0}
+        }
+        self.poller = DigestPoller(self.persistence_adapter)
+        self.addCleanup(lambda: [m.disconnect() for m, _ in self.poller.accounts.values()])
+
+    def test_digest_is_written(self):
+        self.assertEqual(self.poller.connect_accounts(), 1)
+        self.assertEqual(self.poller.refresh_due(), 1)
+
+        item = self.persistence_adapter.items[self.key]
+        self.assertEqual([d["chat_id"] for d in item["unread_digest"]["dialogs"]], [1000, 1001, 1002])
+        # Attributes of the skill are left alone
+        self.assertEqual(item["new_session_count"], 7)
+        self.assertEqual(self.poller.connect_accounts(), 0)
+
+    def test_launch_answers_from_digest(self):
+        self.poller.connect_accounts()
+        self.poller.refresh_due()
+
+        with patch.object(FakeClient, "connect") as mock_connect:
+            event = sb.lambda_handler()(self.req, None)
+
+        mock_connect.assert_not_called()
+        self.assertEqual([d["chat_id"] for d in event["sessionAttributes"]["unread_dialogs"]], [1000, 1001, 1002])
+
+    def test_logged_out_account_does_not_hear_digest(self):
+        self.poller.connect_accounts()
+        self.poller.refresh_due()
+
+        with patch.object(FakeClient, "get_dialogs", side_effect=AuthKeyUnregistered()):
+            self.poller.refresh_due(now=time.monotonic() + REFRESH_INTERVAL)
+        self.assertIsNone(self.persistence_adapter.items[self.key]["unread_digest"])
+        self.assertEqual(self.poller.accounts, {})
+        # Not connected again with the same auth key
+        self.assertEqual(self.poller.connect_accounts(), 0)
+
+        with patch.object(FakeClient, "connect", return_value=False):
+            event = sb.lambda_handler()(self.req, None)
+
+        self.assertNotIn("unread_dialogs", event["sessionAttributes"])
+        self.assertIn("setup", event["response"]["outputSpeech"]["ssml"])
+
+    def test_voice_profiles_get_digests(self):
+        # Profile B uses the Telegram session of the household, profile A its own
+        self.persistence_adapter.items[self.key][PROFILES] = {"amzn1.ask.person.A": {"user_id": 7, "auth_key": b"A"},
+                                                              "amzn1.ask.person.B": {"user_id": 4242}}
+
+        self.assertEqual(self.poller.connect_accounts(), 2)
+        self.assertEqual(self.poller.refresh_due(), 2)
+
+        item = self.persistence_adapter.items[self.key]
+        for partition in [item, item[PROFILES]["amzn1.ask.person.A"], item[PROFILES]["amzn1.ask.person.B"]]:
+            self.assertEqual(len(partition["unread_digest"]["dialogs"]), 3)
+        self.assertEqual(item[PROFILES]["amzn1.ask.person.A"]["user_id"], 7)
+
+        request = copy.deepcopy(self.req)
+        request["context"]["System"]["person"] = {"personId": "amzn1.ask.person.A"}
+        with patch.object(FakeClient, "connect") as mock_connect:
+            event = sb.lambda_handler()(request, None)
+
+        mock_connect.assert_not_called()
+        self.assertEqual(len(event["sessionAttributes"]["unread_dialogs"]), 3)
+
+    def test_skill_keeps_concurrent_poller_writes(self):
+        self.poller.connect_accounts()
+        request_envelope = DefaultSerializer().deserialize(json.dumps(self.req), RequestEnvelope)
+        handler_input = HandlerInput(request_envelope, AttributesManager(request_envelope, self.persistence_adapter))
+        state_manager = StateManager(handler_input)
+
+        # The poller writes the digest while the skill handles a request of the same user
+        self.poller.refresh_due()
+        state_manager.state.new_session_count += 1
+        state_manager.save_to_database()
+
+        item = self.persistence_adapter.items[self.key]
+        self.assertEqual(len(item["unread_digest"]["dialogs"]), 3)
+        self.assertEqual(item["new_session_count"], 8)
+
+    def test_stale_digest_asks_telegram(self):
+        self.persistence_adapter.items[self.key]["unread_digest"] = digest.build_digest(
+            [], now=time.time() - digest.DIGEST_MAX_AGE - 1)
+
+        event = sb.lambda_handler()(self.req, None)
+
+        self.assertEqual(len(event["sessionAttributes"]["unread_dialogs"]), 3)
+
+    def test_new_message_refreshes_digest(self):
+        self.poller.connect_accounts()
+        self.poller.refresh_due()
+
+        self.account.receive(1002, "Hello")
+
+        # Refreshes are debounced
+        self.assertEqual(self.poller.refresh_due(), 0)
+        self.assertEqual(self.poller.refresh_due(now=time.monotonic() + DEBOUNCE_SECONDS), 1)
+        dialogs = self.persistence_adapter.items[self.key]["unread_digest"]["dialogs"]
+        self.assertEqual((dialogs[0]["chat_id"], dialogs[0]["unread_count"]), (1002, 3))
+        self.assertEqual(dialogs[0]["telegrams"][-1][0], "Hello")
+
+    def test_flood_wait_postpones_refresh(self):
+        self.poller.connect_accounts()
+        FakeClient.flood_waits["get_dialogs"] = 30
+
+        self.poller.refresh_due()
+        self.poller.schedule((self.key, None), DEBOUNCE_SECONDS)
+
+        self.assertGreater(self.poller.due[(self.key, None)], time.monotonic() + 20)
+        self.assertNotIn("unread_digest", self.persistence_adapter.items[self.key])
+
+    def test_dynamo_db_update_keeps_other_attributes(self):
+        dynamodb_resource = Mock()
+        store = DynamoDbStateStore(dynamodb_resource=dynamodb_resource)
+
+        store.update_attributes("user", {"unread_digest": {"dialogs": [], "updated_at": 1}})
+
+        dynamodb_resource.Table.return_value.update_item.assert_called_once_with(
+            Key={"id": "user"}, UpdateExpression="SET #a.#f0 = :v0", ConditionExpression="attribute_exists(#a)",
+            ExpressionAttributeNames={"#a": "attributes", "#f0": "unread_digest"},
+            ExpressionAttributeValues={":v0": {"dialogs": [], "updated_at": 1}})
+
+    def test_dynamo_db_update_creates_new_item(self):
+        dynamodb_resource = Mock()
+        update_item = dynamodb_resource.Table.return_value.update_item
+        update_item.side_effect = [ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"),
+                                   None]
+        store = DynamoDbStateStore(dynamodb_resource=dynamodb_resource)
+
+        store.update_attributes("user", {"user_id": 4242})
+
+        update_item.assert_called_with(
+            Key={"id": "user"}, UpdateExpression="SET #a = :a", ConditionExpression="attribute_not_exists(#a)",
+            ExpressionAttributeNames={"#a": "attributes"}, ExpressionAttributeValues={":a": {"user_id": 4242}})
+
+    def test_dynamo_db_update_of_nested_attribute(self):
+        dynamodb_resource = Mock()
+        update_item = dynamodb_resource.Table.return_value.update_item
+        # The profiles map doesn't exist yet
+        update_item.side_effect = [ClientError({"Error": {"Code": "ValidationException"}}, "UpdateItem"), None, None,
+                                   None]
+        store = DynamoDbStateStore(dynamodb_resource=dynamodb_resource)
+
+        store.update_attributes("user", {("profiles", "person", "user_id"): 4242})
+
+        names = {"#a": "attributes", "#f0": "profiles", "#f1": "person", "#f2": "user_id"}
+        self.assertEqual(update_item.call_args_list[0][1], dict(
+            Key={"id": "user"}, UpdateExpression="SET #a.#f0.#f1.#f2 = :v0", ConditionExpression="attribute_exists(#a)",
+            ExpressionAttributeNames=names, ExpressionAttributeValues={":v0": 4242}))
+        self.assertEqual([c[1]["UpdateExpression"] for c in update_item.call_args_list[1:3]],
+                         ["SET #a.#f0 = if_not_exists(#a.#f0, :empty)",
+                          "SET #a.#f0.#f1 = if_not_exists(#a.#f0.#f1, :empty)"])
+        update_item.assert_called_with(Key={"id": "user"}, UpdateExpression="SET #a.#f0.#f1.#f2 = :v0",
+                                       ExpressionAttributeNames=names, ExpressionAttributeValues={":v0": 4242})
@@ -0,0 +1,118 @@
+import asyncio
+import copy
+import http.client
+import json
+import threading
+from unittest.mock import Mock, patch
+
+from skill.pyrogram.pyrogram_manager import ClientCache, PyrogramManager
+from skill.server import SkillServer, VerificationError, CachedPersistenceAdapter
+from skill.services.alexa_settings_service import AlexaSettingsService
+from skill_test.fakes.fake_telegram import FakeAccount, FakeClient
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.util import SkillTestCase, update_request, capture_metrics
+
+
+class _StubVerifier:
+    def verify(self, headers, body, event):
+        if headers.get("Signature") != "valid":
+            raise VerificationError("Invalid signature")
+
+
+class SkillServerTest(SkillTestCase):
+    """
+    Serves the skill on a local port, with the fake Telegram backend and a stubbed signature verification.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        for patcher in [patch.object(PyrogramManager, "client_class", FakeClient),
+                        patch.object(PyrogramManager, "client_cache", ClientCache()),
+                        patch.object(FakeClient, "account", FakeAccount.generate(dialogs=2)),
+                        patch.object(AlexaSettingsService, "fetch_tz_database_name", return_value="Europe/Rome")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.req = update_request(copy.deepcopy(launch_request), "en-US")
+        self.persistence_adapter.items[self.req["context"]["System"]["user"]["userId"]] = {"user_id": 4242}
+
+        self.loop = asyncio.new_event_loop()
+        self.server = SkillServer(_StubVerifier(), workers=2)
+        port = self.loop.run_until_complete(self.server.start(port=0))
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.addCleanup(self._stop)
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        self.addCleanup(self.connection.close)
+
+    def _stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def _post(self, event, signature="valid"):
+        self.connection.request("POST", "/", body=json.dumps(event), headers={"Signature": signature})
+        response = self.connection.getresponse()
+        body = response.read()
+        return response.status, json.loads(body) if body else None
+
+    def test_skill_is_served(self):
+        status, event = self._post(self.req)
+
+        self.assertEqual(status, 200)
+        self.assertIn("new telegrams", event["response"]["outputSpeech"]["ssml"])
+
+    def test_invalid_signature_is_rejected(self):
+        status, _ = self._post(self.req, signature="forged")
+
+        self.assertEqual(status, 400)
+        self.assertEqual(self.persistence_adapter.items[self.req["context"]["System"]["user"]["userId"]],
+                         {"user_id": 4242})
+
+    def test_warm_client_is_reused_on_a_kept_alive_connection(self):
+        with capture_metrics() as flushed:
+            self.assertEqual(self._post(self.req)[0], 200)
+            self.assertEqual(self._post(self.req)[0], 200)
+
+        self.assertEqual([m.counters.get("telegram.connect.count") for m in flushed], [1, None])
+        self.assertEqual([m.counters.get("telegram.connect.cached") for m in flushed], [None, 1])
+
+    def test_health(self):
+        self.connection.request("GET", "/health")
+        response = self.connection.getresponse()
+
+        self.assertEqual((response.status, json.loads(response.read())), (200, {"status": "ok"}))
+
+    def test_persistent_attributes_are_cached(self):
+        persistence_adapter = InMemoryPersistenceAdapter()
+        cached_adapter = CachedPersistenceAdapter(persistence_adapter)
+        request_envelope = Mock()
+        request_envelope.context.system.user.user_id = "user"
+        persistence_adapter.partition_keygen = lambda envelope: envelope.context.system.user.user_id
+        persistence_adapter.items["user"] = {"user_id": 1}
+
+        self.assertEqual(cached_adapter.get_attributes(request_envelope), {"user_id": 1})
+        persistence_adapter.items["user"]["user_id"] = 2
+
+        self.assertEqual(cached_adapter.get_attributes(request_envelope), {"user_id": 1})
+        cached_adapter.ttl = 0
+        self.assertEqual(cached_adapter.get_attributes(request_envelope), {"user_id": 2})
+
+    def test_cached_attributes_do_not_overwrite_poller_writes(self):
+        persistence_adapter = InMemoryPersistenceAdapter()
+        cached_adapter = CachedPersistenceAdapter(persistence_adapter)
+        request_envelope = Mock()
+        request_envelope.context.system.user.user_id = "user"
+        persistence_adapter.partition_keygen = lambda envelope: envelope.context.system.user.user_id
+        persistence_adapter.items["user"] = {"user_id": 1, "notified_unread": {}}
+        cached_adapter.get_attributes(request_envelope)
+
+        # The poller notifies while the skill serves the cached copy
+        persistence_adapter.update_attributes("user", {"notified_unread": {"1000": 2}})
+        cached_adapter.save_attributes(request_envelope, {"new_session_count": 1})
+
+        self.assertEqual(persistence_adapter.items["user"],
+                         {"user_id": 1, "notified_unread": {"1000": 2}, "new_session_count": 1})
+        self.assertEqual(cached_adapter.get_attributes(request_envelope),
+                         {"user_id": 1, "notified_unread": {}, "new_session_count": 1})
@@ -0,0 +1,52 @@
+import unittest
+from types import SimpleNamespace
+
+from ask_sdk_core.response_helper import ResponseFactory
+
+from skill.i18n.ssml import Speech, compile_template
+from skill.interceptors import CardResponseInterceptor
+from skill_test.util import get_i18n_for_tests
+
+
+class SSMLTest(unittest.TestCase):
+    def test_telegrams_are_escaped(self):
+        i18n = get_i18n_for_tests('en-US')
+
+        speech = Speech().add(i18n.PERSONAL_DIALOG_INTRO, 'Tom & Jerry').add_text('1 < 2 <break/>')
+
+        self.assertEqual(speech.ssml, 'Tom &amp; Jerry wrote: 1 &lt; 2 &lt;break/&gt;')
+        self.assertEqual(speech.text, 'Tom & Jerry wrote: 1 < 2 <break/>')
+
+    def test_ssml_and_text_are_rendered_in_one_pass(self):
+        i18n = get_i18n_for_tests('en-US')
+        names = Speech.join(', ', [Speech().add_text('Tom'), Speech().add_text('Paul')]).add(i18n.BREAK_200)
+
+        speech = Speech().add(i18n.NEW_TELEGRAMS_FROM, names).add(i18n.NEW_SETUP)
+
+        self.assertEqual(speech.ssml, "You received new telegrams from: Tom, Paul<break time='200ms'/>. "
+                                      + i18n.NEW_SETUP)
+        self.assertEqual(speech.text, "You received new telegrams from: Tom, Paul. Welcome to Telegram Connect. "
+                                      "Telegram Connect couples Alexa with your Telegram Messenger. Now, are you "
+                                      "ready to start the setup?")
+
+    def test_templates_are_compiled_once(self):
+        i18n = get_i18n_for_tests('de-DE')
+
+        self.assertIs(compile_template(i18n.PERSONAL_DIALOG_INTRO), compile_template(i18n.PERSONAL_DIALOG_INTRO))
+
+    def test_card_shows_the_text_of_the_spoken_speech(self):
+        i18n = get_i18n_for_tests('en-US')
+        handler_input = SimpleNamespace(
+            attributes_manager=SimpleNamespace(session_attributes={}, request_attributes={}),
+            request_envelope=SimpleNamespace(request=SimpleNamespace(locale='en-US')),
+            response_builder=ResponseFactory()
+        )
+
+        response = Speech().add(i18n.PERSONAL_DIALOG_INTRO, 'Tom & Jerry').speak(handler_input).response
+        CardResponseInterceptor().process(handler_input, response)
+        self.assertEqual(response.card.content, 'Tom & Jerry wrote: ')
+
+        # Speech which replaced the spoken one, e.g.: of an exception handler, is stripped
+        response = handler_input.response_builder.speak("Tom &amp; Jerry<break time='1s'/>failed").response
+        CardResponseInterceptor().process(handler_input, response)
+        self.assertEqual(response.card.content, 'Tom & Jerry failed')
@@ -0,0 +1,72 @@
+import contextlib
+import timeit
+from unittest.mock import Mock, patch
+
+from skill import tracing
+from skill.interceptors import StateRequestInterceptor
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.telegram_connect import lambda_handler
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.util import SkillTestCase, update_request
+
+
+class TracingTest(SkillTestCase):
+    @patch("skill.tracing.emit")
+    def test_sampled_trace_records_spans(self, mock_emit):
+        with tracing.trace("test", sample_rate=1) as current_trace:
+            with tracing.span("outer"):
+                with tracing.span("inner"):
+                    tracing.set_attribute("key", "value")
+
+        self.assertIs(mock_emit.call_args[0][0], current_trace)
+        record = current_trace.to_record()
+        self.assertEqual([s["name"] for s in record["spans"]], ["outer", "inner"])
+        self.assertEqual(record["key"], "value")
+        self.assertGreaterEqual(record["duration_ms"], record["spans"][0]["duration_ms"])
+
+    @patch("skill.tracing.emit")
+    def test_not_sampled_trace_is_not_recorded(self, mock_emit):
+        with tracing.trace("test", sample_rate=0) as current_trace:
+            with tracing.span("outer"):
+                tracing.set_attribute("key", "value")
+
+        self.assertIsNone(current_trace)
+        mock_emit.assert_not_called()
+
+    def test_not_sampled_span_is_cheap(self):
+        def traced_stage():
+            with tracing.span("stage"):
+                pass
+
+        def empty_stage():
+            with contextlib.nullcontext():
+                pass
+
+        number = 100000
+        traced = min(timeit.repeat(traced_stage, number=number, repeat=5)) / number
+        empty = min(timeit.repeat(empty_stage, number=number, repeat=5)) / number
+
+        # Compared with an empty with-block, so the test holds on a busy machine as well. Usually it's below 1us.
+        self.assertLess(traced, 2 * empty)
+
+    @patch("skill.tracing.emit")
+    @patch.object(StateRequestInterceptor, "process", Mock(return_value=[]))
+    @patch("skill.telegram_connect.StateManager")
+    @patch("skill.telegram_connect.PyrogramManager", spec=PyrogramManager)
+    def test_invocation_is_traced(self, mock_pyrogram_manager, mock_state_manager, mock_emit):
+        mock_state_manager.return_value.state.unread_digest = None
+        mock_pyrogram_manager.get_is_authorized = Mock(return_value=True)
+        mock_pyrogram_manager.expected_unread_seconds = Mock(return_value=0.1)
+        mock_pyrogram_manager.get_unread_dialogs = Mock(return_value=[])
+        mock_pyrogram_manager.return_value = mock_pyrogram_manager
+
+        with patch("skill.tracing.SAMPLE_RATE", 1):
+            lambda_handler(update_request(launch_request, "en-US"), None)
+
+        record = mock_emit.call_args[0][0].to_record()
+        span_names = [s["name"] for s in record["spans"]]
+        self.assertEqual(record["request_type"], "LaunchRequest")
+        for name in ["skill.build", "envelope.deserialize", "interceptor.LoggingRequestInterceptor",
+                     "interceptor.StateRequestInterceptor", "speech.render", "interceptor.CardResponseInterceptor",
+                     "response.serialize"]:
+            self.assertIn(name, span_names)
@@ -0,0 +1,74 @@
+import copy
+from unittest.mock import Mock, patch
+
+import pytz
+
+from skill import warmup
+from skill.i18n.util import get_language_model
+from skill.interceptors import StateRequestInterceptor
+from skill.pyrogram.pyrogram_manager import ClientCache, PyrogramManager
+from skill.state import State
+from skill.telegram_connect import lambda_handler
+from skill_test.fakes.fake_telegram import FakeClient
+from skill_test.launch_intent.launch_request import launch_request
+from skill_test.util import SkillTestCase, capture_metrics
+
+SCHEDULED_EVENT = {
+    "version": "0",
+    "id": "53dc4d37-cffa-4f76-80c9-8b7d4a4d2eaa",
+    "detail-type": "Scheduled Event",
+    "source": "aws.events",
+    "account": "123456789012",
+    "time": "2020-11-01T12:00:00Z",
+    "region": "us-east-1",
+    "resources": ["arn:aws:events:us-east-1:123456789012:rule/telegram-connect-warmup"],
+    "detail": {}
+}
+
+
+class WarmupTest(SkillTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        patcher = patch.object(warmup, "_is_warm", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warmup_events(self):
+        self.assertTrue(warmup.is_warmup_event(SCHEDULED_EVENT))
+        self.assertTrue(warmup.is_warmup_event({"warmup": True}))
+        self.assertFalse(warmup.is_warmup_event(copy.deepcopy(launch_request)))
+        self.assertFalse(warmup.is_warmup_event({"source": "aws.s3"}))
+
+    def test_warmup_skips_the_skill(self):
+        get_language_model.cache_clear()
+
+        with patch.object(StateRequestInterceptor, "process") as process, capture_metrics() as flushed:
+            first = lambda_handler(SCHEDULED_EVENT, None)
+            second = lambda_handler(SCHEDULED_EVENT, None)
+
+        process.assert_not_called()
+        self.assertEqual(self.persistence_adapter.items, {})
+        self.assertEqual((first["was_cold"], second["was_cold"]), (True, False))
+        self.assertEqual(get_language_model.cache_info().currsize, len(warmup.WARM_LOCALES))
+        # German users without the timezone of their device get the warm language model
+        hits = get_language_model.cache_info().hits
+        get_language_model("de-DE", "Europe/Vienna")
+        self.assertEqual(get_language_model.cache_info().hits, hits + 1)
+        self.assertEqual(flushed[0].dimensions["Handler"], "Warmup")
+        self.assertEqual(flushed[0].counters["warmup.cold"], 1)
+        self.assertEqual(flushed[1].counters["warmup.warm"], 1)
+
+    def test_disconnected_clients_are_dropped(self):
+        client_cache = ClientCache()
+        for user_id in [1, 2]:
+            client = FakeClient(Mock(state=State(pytz.utc, {"user_id": user_id})))
+            client.connect()
+            client_cache.put(user_id, client)
+        client_cache.get(1).disconnect()
+
+        with patch.object(PyrogramManager, "client_cache", client_cache):
+            self.assertEqual(lambda_handler({"warmup": True}, None)["dropped_clients"], 0)
+            self.assertEqual(lambda_handler({"warmup": True, "refresh_connections": True}, None)["dropped_clients"], 1)
+
+        self.assertIsNone(client_cache.get(1))
+        self.assertIsNotNone(client_cache.get(2))
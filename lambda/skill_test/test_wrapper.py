@@ -1,23 +1,122 @@
+import argparse
+import io
+import os
 import unittest
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+# Tests use an in-memory persistence adapter, but boto3 needs a region to create the DynamoDB adapter of sb
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
 
 from skill_test.launch_intent.test_launch import LaunchIntentTest
 from skill_test.message_intent.test_message import MessageIntentTest
+from skill_test.pygrogram.test_client_host import ClientHostTest
+from skill_test.pygrogram.test_media import MediaTest
+from skill_test.pygrogram.test_pyrogram_manager import PyrogramManagerTest
+from skill_test.pygrogram.test_ranking import RankingTest
+from skill_test.pygrogram.test_rate_limiter import RateLimiterTest
+from skill_test.pygrogram.test_text_normalizer import TextNormalizerTest
+from skill_test.services.test_alexa_settings_service import AlexaSettingsServiceTest
+from skill_test.services.test_directive_service import DirectiveServiceTest
+from skill_test.services.test_timezone_cache import TimezoneCacheTest
 from skill_test.setup_intent.test_setup import SetupIntentTest
+from skill_test.test_deadline import DeadlineTest
+from skill_test.test_helper_functions import HelperFunctionsTest
+from skill_test.test_in_memory_persistence import InMemoryPersistenceTest
 from skill_test.test_language_model import LanguageModelTest
+from skill_test.test_log import LogTest
+from skill_test.test_metrics import MetricsTest
+from skill_test.test_notifications import NotificationPipelineTest
+from skill_test.test_poller import DigestPollerTest
+from skill_test.test_server import SkillServerTest
+from skill_test.test_ssml import SSMLTest
+from skill_test.test_tracing import TracingTest
+from skill_test.test_warmup import WarmupTest
 
-if __name__ == "__main__":
-    """
-    Given-When-Then structure of tests.
-    Read more: https://martinfowler.com/bliki/GivenWhenThen.html
-    """
 
+def build_suite() -> unittest.TestSuite:
     suite = unittest.TestSuite()
     suite.addTest(LanguageModelTest("test_language_model"))
+    suite.addTest(LanguageModelTest("test_language_model_memory_stays_flat"))
+    suite.addTest(LanguageModelTest("test_locale_registry"))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SSMLTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(HelperFunctionsTest))
     suite.addTest(LaunchIntentTest("test_launch_intent"))
+    suite.addTest(LaunchIntentTest("test_progressive_response"))
+    suite.addTest(LaunchIntentTest("test_flood_wait"))
     suite.addTest(SetupIntentTest("test_setup_intent"))
     suite.addTest(MessageIntentTest("test_message_intent"))
+    suite.addTest(MessageIntentTest("test_pending_dialog"))
+    suite.addTest(MessageIntentTest("test_other_dialogs_are_announced"))
+    suite.addTest(MessageIntentTest("test_normalized_telegrams"))
+    suite.addTest(MessageIntentTest("test_media_descriptions"))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(InMemoryPersistenceTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PyrogramManagerTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(RateLimiterTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(RankingTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TextNormalizerTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(MediaTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(DigestPollerTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(NotificationPipelineTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(ClientHostTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(SkillServerTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(AlexaSettingsServiceTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TimezoneCacheTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(DirectiveServiceTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TracingTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(LogTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(MetricsTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(DeadlineTest))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(WarmupTest))
+    return suite
+
+
+def _iter_tests(suite: unittest.TestSuite) -> Iterator[unittest.TestCase]:
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
+
+
+def _run_in_worker(test_ids: List[str]) -> Tuple[int, int, str]:
+    suite = unittest.TestSuite(unittest.defaultTestLoader.loadTestsFromName(test_id) for test_id in test_ids)
+    stream = io.StringIO()
+    result = unittest.TextTestRunner(stream=stream).run(suite)
+    return result.testsRun, len(result.failures) + len(result.errors), stream.getvalue()
+
+
+def run_parallel(suite: unittest.TestSuite, workers: int) -> bool:
+    """
+    Distributes the tests over worker processes. Every worker has its own module state, e.g.: sb.
+    """
+    test_ids = [[test.id()] for test in _iter_tests(suite)]
+
+    tests_run = 0
+    problems = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for run, failed, output in executor.map(_run_in_worker, test_ids):
+            tests_run += run
+            problems += failed
+            if failed:
+                print(output)
+    print("Ran {} tests in {} workers: {}".format(tests_run, workers, "FAILED" if problems else "OK"))
+    return problems == 0
+
+
+if __name__ == "__main__":
+    """
+    Given-When-Then structure of tests.
+    Read more: https://martinfowler.com/bliki/GivenWhenThen.html
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-j", "--workers", type=int, default=1, help="run the tests in parallel processes")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        sys.exit(not run_parallel(build_suite(), args.workers))
 
     runner = unittest.TextTestRunner()
-    res = not runner.run(suite).wasSuccessful()
+    res = not runner.run(build_suite()).wasSuccessful()
     sys.exit(res)
@@ -1,7 +1,19 @@
+import math
+import unittest
+from contextlib import contextmanager
+from typing import List
+from unittest.mock import patch
+
 import pytz
 
 from skill.i18n.language_model_de import LanguageModelDE
 from skill.i18n.language_model_en import LanguageModelEN
+from skill.metrics import Metrics
+from skill.pyrogram.pyrogram_manager import PyrogramManager
+from skill.pyrogram.rate_limiter import RateLimiter
+from skill.services import directive_service
+from skill.telegram_connect import sb
+from skill_test.fakes.in_memory_persistence import InMemoryPersistenceAdapter
 
 
 def update_request(request, locale):
@@ -17,3 +29,30 @@ def get_i18n_for_tests(locale):
     if locale == 'de-DE':
         language_model = LanguageModelDE(timezone)
     return language_model
+
+
+@contextmanager
+def capture_metrics():
+    """
+    Collects the metrics flushed while the block runs instead of writing them to stdout.
+    """
+    flushed = []  # type: List[Metrics]
+    with patch("skill.metrics.emit", side_effect=flushed.append):
+        yield flushed
+
+
+class SkillTestCase(unittest.TestCase):
+    """
+    Every test gets its own in-memory persistence adapter in sb, so tests neither need DynamoDB nor see the data
+    of other tests. Parallel workers are separate processes, each with its own sb.
+    Progressive responses are turned off, tests which want them use a DirectiveApiStub. Every test starts with
+    fresh rate limits.
+    """
+
+    def setUp(self) -> None:
+        self.persistence_adapter = InMemoryPersistenceAdapter()
+        for patcher in [patch.object(sb, "persistence_adapter", self.persistence_adapter),
+                        patch.object(directive_service, "PROGRESSIVE_RESPONSE_THRESHOLD", math.inf),
+                        patch.object(PyrogramManager, "rate_limiter", RateLimiter())]:
+            patcher.start()
+            self.addCleanup(patcher.stop)